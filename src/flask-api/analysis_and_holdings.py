@@ -1,6 +1,13 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
 
+from app import market_data
+from app.cache import TTLCache
+from app.config import Config
+from app.fanout import fan_out, fan_out_iter
+from app.quote_cache import FUNDAMENTALS
+from app.rate_limit import UpstreamThrottled, upstream
+
 def safe_to_text(name, obj):
     """Convert any yfinance object (DataFrame / Series /dict / scalar / None) to readable text."""
     if obj is None:
@@ -15,19 +22,130 @@ def safe_to_text(name, obj):
     return f"=== {name} ===\n{text}\n\n"
 
 
-def _get_analyst_price_target(ticker) -> dict:
+# --- compact renderers -------------------------------------------------------
+# to_string() pads every cell to its column width; for the LLM pipeline the
+# formats below carry the same data in far fewer characters (and tokens).
+
+FORMATS = ("text", "csv", "tsv", "markdown", "json")
+
+
+def _prepare(obj, precision=None, max_rows=None):
+    """Return (frame, omitted rows) for a DataFrame/Series, rounded and capped; (obj, 0) otherwise."""
+    if isinstance(obj, pd.Series):
+        obj = obj.to_frame()
+    if not isinstance(obj, pd.DataFrame):
+        return obj, 0
+    omitted = 0
+    if max_rows is not None and len(obj) > max_rows:
+        omitted = len(obj) - max_rows
+        obj = obj.iloc[:max_rows]
+    if precision is not None:
+        obj = obj.round(precision)
+    return obj, omitted
+
+
+def _has_index(frame) -> bool:
+    # a default 0..n-1 index carries no information; leave it out of compact output
+    return not (isinstance(frame.index, pd.RangeIndex) and frame.index.start == 0 and frame.index.step == 1)
+
+
+def _delimited(frame, sep: str) -> str:
+    return frame.to_csv(sep=sep, index=_has_index(frame), lineterminator="\n").rstrip("\n")
+
+
+def _cell(v) -> str:
+    if v is None or (isinstance(v, float) and np.isnan(v)) or v is pd.NaT:
+        return ""
+    if isinstance(v, pd.Timestamp) and v == v.normalize():
+        return v.date().isoformat()
+    return str(v).replace("|", "\\|").replace("\n", " ")
+
+
+def _markdown(frame) -> str:
+    index = _has_index(frame)
+    header = ([_cell(frame.index.name)] if index else []) + [_cell(c) for c in frame.columns]
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    for idx, row in zip(frame.index, frame.itertuples(index=False, name=None)):
+        cells = ([_cell(idx)] if index else []) + [_cell(v) for v in row]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+_TABLE_RENDERERS = {
+    "text": lambda frame: frame.to_string(),
+    "csv": lambda frame: _delimited(frame, ","),
+    "tsv": lambda frame: _delimited(frame, "\t"),
+    "markdown": _markdown,
+}
+
+
+def render_section(name, obj, fmt: str = "text", precision=None, max_rows=None) -> str:
+    """Render one section in a text format (see FORMATS; "json" uses section_to_json)."""
+    if fmt == "text" and precision is None and max_rows is None:
+        return safe_to_text(name, obj)
+    if precision is None and fmt != "text":
+        precision = Config.ANALYSIS_PRECISION
+    if obj is None:
+        return f"=== {name} ===\nNone\n\n"
+    obj, omitted = _prepare(obj, precision, max_rows)
+    text = _TABLE_RENDERERS[fmt](obj) if isinstance(obj, pd.DataFrame) else repr(obj)
+    if omitted:
+        text += f"\n... {omitted} more rows"
+    return f"=== {name} ===\n{text}\n\n"
+
+
+def _json_safe(v):
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and not np.isfinite(v):
+        return None
+    if isinstance(v, (pd.Timestamp, np.datetime64)) or v is pd.NaT:
+        return None if pd.isna(v) else _cell(pd.Timestamp(v))
+    if isinstance(v, dict):
+        return {str(k): _json_safe(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_json_safe(x) for x in v]
+    if v is None or isinstance(v, (str, int, float, bool)):
+        return v
+    return None if pd.isna(v) is True else str(v)
+
+
+def section_to_json(obj, precision=None, max_rows=None):
+    """Structured form of one section: tables become {"index", "columns", "data"} (row-major).
+
+    "index" is omitted for a default 0..n-1 index.
+    """
+    obj, omitted = _prepare(obj, precision, max_rows)
+    if not isinstance(obj, pd.DataFrame):
+        if precision is not None and isinstance(obj, float):
+            obj = round(obj, precision)
+        return _json_safe(obj)
+    table = {
+        "columns": [_json_safe(c) for c in obj.columns],
+        "data": [[_json_safe(v) for v in row] for row in obj.itertuples(index=False, name=None)],
+    }
+    if _has_index(obj):
+        table["index"] = [_json_safe(v) for v in obj.index]
+    if omitted:
+        table["omitted_rows"] = omitted
+    return table
+
+
+def _get_analyst_price_target(ticker, info=None) -> dict:
     """Return analyst price target as a dict with keys 'avg', 'low', 'high'.
 
-    Preferred source: ticker.info (targetMeanPrice/targetLowPrice/targetHighPrice).
+    Preferred source: ticker.info (targetMeanPrice/targetLowPrice/targetHighPrice),
+    or ``info`` when the caller already has it.
     Backwards-compatible fallbacks: ticker.analyst_price_target or
     ticker.analyst_price_targets (legacy yfinance attributes).
     Always returns a dict (empty if no data).
     """
     # Try ticker.info first (most reliable across yfinance versions)
-    try:
-        info = getattr(ticker, "info", {}) or {}
-    except Exception:
-        info = {}
+    if info is None:
+        try:
+            info = getattr(ticker, "info", {}) or {}
+        except Exception:
+            info = {}
 
     mean = info.get("targetMeanPrice")
     low = info.get("targetLowPrice")
@@ -39,7 +157,8 @@ def _get_analyst_price_target(ticker) -> dict:
     for attr in ("analyst_price_target", "analyst_price_targets"):
         if hasattr(ticker, attr):
             try:
-                val = getattr(ticker, attr)
+                # a separate quoteSummary request (financialData)
+                val = upstream.call(lambda: getattr(ticker, attr))
                 if isinstance(val, dict):
                     # normalize keys if possible
                     if "avg" in val or "mean" in val or "targetMeanPrice" in val:
@@ -49,6 +168,8 @@ def _get_analyst_price_target(ticker) -> dict:
                         high_v = val.get("high") or val.get("targetHighPrice")
                         return {"avg": avg, "low": low_v, "high": high_v}
                     return val
+            except UpstreamThrottled:
+                raise
             except Exception:
                 pass
 
@@ -154,113 +275,274 @@ def _get_net_share_purchase_activity(ticker):
     return pd.DataFrame()
 
 
-def get_full_analysis_and_holdings_text(ticker: str) -> str:
-    """
-    Fetch all Analysis & Holdings information exposed on:
-    https://ranaroussi.github.io/yfinance/reference/yfinance.analysis.html
-    and return as a single text string for LLM consumption.
-    """
-
-    t = yf.Ticker(ticker)
-
-    sections = []
-
+# Sections in output order: (name, source, getter taking the yf.Ticker). The
+# source is the upstream request behind the section: yfinance derives several
+# sections from one lazy quoteSummary fetch (every holdings table comes from
+# the same response), so sources are fetched concurrently and each section is
+# then read from its source's already loaded Ticker.
+SECTIONS = [
     # --- Analysis section (all documented methods) ---
     # The page documents methods like these, each with an `as_dict` option. [page:0]
     # You can add/remove methods here as the API evolves.
 
     # Recommendations summary (strongBuy, buy, hold, sell, strongSell)
-    try:
-        sections.append(safe_to_text("analysis.recommendations", t.recommendations))
-    except Exception as e:
-        sections.append(f"=== analysis.recommendations ===\nERROR: {e}\n\n")
-
+    ("analysis.recommendations", "recommendations", lambda t: t.recommendations),
     # Recommendations with changes (upgrades/downgrades)
-    try:
-        sections.append(safe_to_text("analysis.recommendations_summary", t.recommendations_summary))
-    except Exception as e:
-        sections.append(f"=== analysis.recommendations_summary ===\nERROR: {e}\n\n")
-
+    ("analysis.recommendations_summary", "recommendations", lambda t: t.recommendations_summary),
     # Price target (current, low, high, mean, median)
-    try:
-        pt = _get_analyst_price_target(t)
-        sections.append(safe_to_text("analysis.analyst_price_target", pt))
-    except Exception as e:
-        sections.append(f"=== analysis.analyst_price_target ===\nERROR: {e}\n\n")
-
+    ("analysis.analyst_price_target", "price_target", _get_analyst_price_target),
     # Earnings estimates (EPS) by quarter/year
-    try:
-        sections.append(safe_to_text("analysis.earnings_estimates", _get_earnings_estimates(t)))
-    except Exception as e:
-        sections.append(f"=== analysis.earnings_estimates ===\nERROR: {e}\n\n")
-
+    ("analysis.earnings_estimates", "earnings_trend", _get_earnings_estimates),
     # Revenue estimates by quarter/year
-    try:
-        sections.append(safe_to_text("analysis.revenue_estimates", _get_revenue_estimates(t)))
-    except Exception as e:
-        sections.append(f"=== analysis.revenue_estimates ===\nERROR: {e}\n\n")
-
+    ("analysis.revenue_estimates", "earnings_trend", _get_revenue_estimates),
     # EPS history (estimate vs actual, surprise, etc.)
-    try:
-        sections.append(safe_to_text("analysis.eps_trend", t.eps_trend))
-    except Exception as e:
-        sections.append(f"=== analysis.eps_trend ===\nERROR: {e}\n\n")
-
+    ("analysis.eps_trend", "earnings_trend", lambda t: t.eps_trend),
     # EPS revision (current vs 7, 30, 60, 90 days ago)
-    try:
-        sections.append(safe_to_text("analysis.eps_revisions", t.eps_revisions))
-    except Exception as e:
-        sections.append(f"=== analysis.eps_revisions ===\nERROR: {e}\n\n")
-
+    ("analysis.eps_revisions", "earnings_trend", lambda t: t.eps_revisions),
     # EPS revision summary (up/down last 7/30 days)
-    try:
-        sections.append(safe_to_text("analysis.eps_revisions_summary", _get_eps_revisions_summary(t)))
-    except Exception as e:
-        sections.append(f"=== analysis.eps_revisions_summary ===\nERROR: {e}\n\n")
-
+    ("analysis.eps_revisions_summary", "earnings_trend", _get_eps_revisions_summary),
     # Growth estimates (stock/industry/sector/index over 0q, +1q, 0y, +1y, +5y, -5y) [page:0]
-    try:
-        sections.append(safe_to_text("analysis.growth_estimates", t.growth_estimates))
-    except Exception as e:
-        sections.append(f"=== analysis.growth_estimates ===\nERROR: {e}\n\n")
+    ("analysis.growth_estimates", "earnings_trend", lambda t: t.growth_estimates),
 
     # --- Holdings section (all documented methods) --- [page:0]
 
     # Main institutional holders table
-    try:
-        sections.append(safe_to_text("holdings.institutional_holders", t.institutional_holders))
-    except Exception as e:
-        sections.append(f"=== holdings.institutional_holders ===\nERROR: {e}\n\n")
-
+    ("holdings.institutional_holders", "holders", lambda t: t.institutional_holders),
     # Major holders (top owners breakdown)
-    try:
-        sections.append(safe_to_text("holdings.major_holders", t.major_holders))
-    except Exception as e:
-        sections.append(f"=== holdings.major_holders ===\nERROR: {e}\n\n")
-
+    ("holdings.major_holders", "holders", lambda t: t.major_holders),
     # Fund holders
-    try:
-        sections.append(safe_to_text("holdings.fund_holders", _get_fund_holders(t)))
-    except Exception as e:
-        sections.append(f"=== holdings.fund_holders ===\nERROR: {e}\n\n")
-
+    ("holdings.fund_holders", "holders", _get_fund_holders),
     # Insider holders
-    try:
-        sections.append(safe_to_text("holdings.insider_holders", _get_insider_holders(t)))
-    except Exception as e:
-        sections.append(f"=== holdings.insider_holders ===\nERROR: {e}\n\n")
-
+    ("holdings.insider_holders", "holders", _get_insider_holders),
     # Insider transactions
-    try:
-        sections.append(safe_to_text("holdings.insider_transactions", t.insider_transactions))
-    except Exception as e:
-        sections.append(f"=== holdings.insider_transactions ===\nERROR: {e}\n\n")
-
+    ("holdings.insider_transactions", "holders", lambda t: t.insider_transactions),
     # Net share purchase activity
-    try:
-        sections.append(safe_to_text("holdings.net_share_purchase_activity", _get_net_share_purchase_activity(t)))
-    except Exception as e:
-        sections.append(f"=== holdings.net_share_purchase_activity ===\nERROR: {e}\n\n")
+    ("holdings.net_share_purchase_activity", "holders", _get_net_share_purchase_activity),
+]
+
+SECTION_NAMES = [name for name, _, _ in SECTIONS]
+SECTION_SOURCES = {name: source for name, source, _ in SECTIONS}
+
+# analyst and holder data moves slowly; cached per (ticker, source) with
+# every section of the source
+_section_cache = TTLCache("analysis", Config.ANALYSIS_CACHE_TTL)
+
+
+def _derive(t, names: list) -> dict:
+    """{section: (value, error message)} for sections read from an already loaded Ticker."""
+    getters = {name: getter for name, _, getter in SECTIONS}
+    derived = {}
+    for name in names:
+        try:
+            derived[name] = (getters[name](t), None)
+        except Exception as e:
+            derived[name] = (None, str(e))
+    return derived
+
+
+def _source_ttl(derived: dict) -> float:
+    """Cache TTL of a loaded source: short when any of its sections failed."""
+    if any(message is not None for _, message in derived.values()):
+        return Config.ANALYSIS_ERROR_TTL
+    return Config.ANALYSIS_CACHE_TTL
+
+
+def _ticker_source(*warm):
+    """Source loader: each ``warm`` step is one upstream request on a shared Ticker, then every getter reads it.
+
+    yfinance's lazy fetches are not locked, so the steps run serially
+    before any getter; concurrent getters would each repeat the request.
+    """
+    def load(symbol: str, names: list) -> dict:
+        t = market_data.get_ticker(symbol)
+        for step in warm:
+            upstream.call(lambda: step(t))
+        return _derive(t, names)
+
+    return load
+
+
+def _load_price_target(symbol: str, names: list) -> dict:
+    # Ticker.info comes from the quote cache shared with /info and /quote
+    t = market_data.get_ticker(symbol)
+    info = market_data.get_info(symbol, FUNDAMENTALS, ticker=t)
+    return {name: (_get_analyst_price_target(t, info), None) for name in names}
+
+
+# source -> loader(symbol, names) returning {section: (value, error message)}
+_SOURCES = {
+    # quoteSummary recommendationTrend
+    "recommendations": _ticker_source(lambda t: t.recommendations),
+    "price_target": _load_price_target,
+    # quoteSummary earningsTrend, then the industry/sector/index trends growth_estimates adds
+    "earnings_trend": _ticker_source(lambda t: t.eps_trend, lambda t: t.growth_estimates),
+    # one quoteSummary request for every holder module
+    "holders": _ticker_source(lambda t: t.major_holders),
+}
+SOURCE_SECTIONS = {source: [name for name in SECTION_NAMES if SECTION_SOURCES[name] == source] for source in _SOURCES}
+
+
+def select_sections(sections=None) -> list:
+    """Resolve a sections filter to full section names in output order.
+
+    Accepts full names ("holdings.major_holders"), short names
+    ("major_holders") or a whole group ("analysis", "holdings"), either as a
+    list or a comma-separated string. ``None``/empty selects everything.
+    """
+    if not sections:
+        return list(SECTION_NAMES)
+    if isinstance(sections, str):
+        sections = sections.split(",")
+    wanted = set()
+    for raw in sections:
+        key = raw.strip().lower()
+        if not key:
+            continue
+        matches = [n for n in SECTION_NAMES if key in (n, n.split(".", 1)[1], n.split(".", 1)[0])]
+        if not matches:
+            raise ValueError(f"Unknown section '{raw.strip()}'. Use: {', '.join(SECTION_NAMES)}")
+        wanted.update(matches)
+    return [n for n in SECTION_NAMES if n in wanted]
+
+
+def _check_format(fmt: str, precision=None, max_rows=None):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use: {', '.join(FORMATS)}")
+    if precision is not None and precision < 0:
+        raise ValueError("precision must be >= 0")
+    if max_rows is not None and max_rows < 0:
+        raise ValueError("max_rows must be >= 0")
+
+
+def _load_sections(ticker: str, sections=None):
+    """Return (names, results, errors) for the selected sections."""
+    market_data.note_access(ticker)
+    names = select_sections(sections)
+    results, errors = _fetch_sections(ticker, names, _section_cache.get_or_fetch)
+    if not results and errors and all(isinstance(e, UpstreamThrottled) for e in errors.values()):
+        # nothing came back because Yahoo is throttling us, not because of the ticker
+        raise next(iter(errors.values()))
+    return names, results, errors
+
+
+def get_full_analysis_and_holdings_text(ticker: str, sections=None, fmt: str = "text", precision=None,
+                                        max_rows=None) -> str:
+    """
+    Fetch all Analysis & Holdings information exposed on:
+    https://ranaroussi.github.io/yfinance/reference/yfinance.analysis.html
+    and return as a single text string for LLM consumption.
+
+    Each upstream source is fetched once, concurrently with the others and
+    with its own timeout, and sections are assembled in SECTIONS order;
+    ``sections`` restricts the output (see select_sections). Tables are
+    rendered as ``fmt`` ("text" is DataFrame.to_string(); "csv", "tsv" and
+    "markdown" are compact), rounded to ``precision`` decimals
+    (ANALYSIS_PRECISION by default for the compact formats) and cut to
+    ``max_rows`` rows each.
+    """
+    _check_format(fmt, precision, max_rows)
+    if fmt == "json":
+        raise ValueError("Use get_full_analysis_and_holdings for format 'json'")
+    names, results, errors = _load_sections(ticker, sections)
+
+    out = []
+    for name in names:
+        if name in results:
+            out.append(render_section(name, results[name], fmt, precision, max_rows))
+        else:
+            out.append(f"=== {name} ===\nERROR: {errors[name]}\n\n")
 
     # Combine everything into a single text block
-    return "".join(sections)
+    return "".join(out)
+
+
+def get_full_analysis_and_holdings(ticker: str, sections=None, precision=None, max_rows=None) -> dict:
+    """Structured variant of get_full_analysis_and_holdings_text: {section: value} plus {section: error}."""
+    _check_format("json", precision, max_rows)
+    precision = Config.ANALYSIS_PRECISION if precision is None else precision
+    names, results, errors = _load_sections(ticker, sections)
+    return {
+        "sections": {name: section_to_json(results[name], precision, max_rows) for name in names if name in results},
+        "errors": {name: str(errors[name]) for name in names if name in errors},
+    }
+
+
+def stream_full_analysis_and_holdings(ticker: str, sections=None, fmt: str = "text", precision=None,
+                                      max_rows=None):
+    """Streaming variant: returns (names, generator) where the generator yields each section as it completes.
+
+    Items are ``(name, content, error)`` in completion order, so the caller
+    can send the fast sections while slow ones are still fetching; content
+    is rendered text, or the section_to_json value for ``fmt == "json"``.
+    Arguments are validated before anything is fetched.
+    """
+    _check_format(fmt, precision, max_rows)
+    names = select_sections(sections)
+    market_data.note_access(ticker)
+    if fmt == "json" and precision is None:
+        precision = Config.ANALYSIS_PRECISION
+
+    def sections_as_completed():
+        for name, value, error in _iter_sections(ticker, names, _section_cache.get_or_fetch):
+            if error is not None:
+                yield name, None, error
+            elif fmt == "json":
+                yield name, section_to_json(value, precision, max_rows), None
+            else:
+                yield name, render_section(name, value, fmt, precision, max_rows), None
+
+    return names, sections_as_completed()
+
+
+def refresh_sections(ticker: str, sections=None) -> dict:
+    """Refetch analysis sections for ticker ahead of expiry; returns {section: error}."""
+    _, errors = _fetch_sections(ticker, select_sections(sections), _section_cache.refresh)
+    return errors
+
+
+def _source_fetcher(ticker: str, load):
+    symbol = ticker.upper()
+
+    def fetch(source):
+        # keyed on the upstream request, so every section of a source (and
+        # every concurrent request for the ticker) shares one fetch
+        return load(f"{symbol}:{source}", lambda: _SOURCES[source](ticker, SOURCE_SECTIONS[source]),
+                    ttl=_source_ttl)
+
+    return fetch
+
+
+def _sources(names: list) -> list:
+    return list(dict.fromkeys(SECTION_SOURCES[name] for name in names))
+
+
+def _section(name: str, derived, error):
+    """(value, error) of one section from its source's fetch outcome."""
+    if error is not None:
+        return None, error
+    value, message = derived[name]
+    return (None, RuntimeError(message)) if message is not None else (value, None)
+
+
+def _fetch_sections(ticker: str, names: list, load):
+    """Fetch the sections' sources concurrently through the section cache; returns (results, errors)."""
+    derived, failed = fan_out(_source_fetcher(ticker, load), _sources(names),
+                              timeout=Config.ANALYSIS_SECTION_TIMEOUT)
+    results, errors = {}, {}
+    for name in names:
+        source = SECTION_SOURCES[name]
+        value, error = _section(name, derived.get(source), failed.get(source))
+        if error is not None:
+            errors[name] = error
+        else:
+            results[name] = value
+    return results, errors
+
+
+def _iter_sections(ticker: str, names: list, load):
+    """Like _fetch_sections, but yields (name, result, error) for each section as its source completes."""
+    for source, derived, error in fan_out_iter(_source_fetcher(ticker, load), _sources(names),
+                                               timeout=Config.ANALYSIS_SECTION_TIMEOUT):
+        for name in names:
+            if SECTION_SOURCES[name] == source:
+                yield (name,) + _section(name, derived, error)
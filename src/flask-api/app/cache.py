@@ -0,0 +1,267 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+
+from app.config import Config
+from app.singleflight import flight
+
+
+def _sizeof(value) -> int:
+    """Approximate the memory footprint of a cached value by its pickled size."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class MemoryBackend:
+    """In-process LRU store bounded by entry count and approximate byte size.
+
+    Entries are kept as (value, stored_at, expires_at, size) tuples; the most
+    recently used entry sits at the end of the OrderedDict.
+    """
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (value, stored_at) for a live entry or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, value, stored_at: float, expires_at: float):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (value, stored_at, expires_at, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+    def lock(self, key):
+        # a private store has no other workers to coordinate with
+        return nullcontext()
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+
+
+def _default_backend():
+    if Config.CACHE_BACKEND == "sqlite":
+        from app.shared_cache import SqliteBackend
+        return SqliteBackend(Config.SHARED_CACHE_PATH, Config.CACHE_MAX_ENTRIES, Config.CACHE_MAX_BYTES,
+                             lock_timeout=Config.SHARED_CACHE_LOCK_TIMEOUT)
+    return MemoryBackend(Config.CACHE_MAX_ENTRIES, Config.CACHE_MAX_BYTES)
+
+
+def bounded_backend(name: str, max_entries: int, max_bytes: int):
+    """A backend of the configured kind with its own size bounds.
+
+    For caches of large values that should not evict everything else; with
+    CACHE_BACKEND=sqlite it is a separate file next to SHARED_CACHE_PATH.
+    """
+    if Config.CACHE_BACKEND == "sqlite":
+        from app.shared_cache import SqliteBackend
+        path = os.path.join(os.path.dirname(Config.SHARED_CACHE_PATH), f"{name}.sqlite")
+        return SqliteBackend(path, max_entries, max_bytes, lock_timeout=Config.SHARED_CACHE_LOCK_TIMEOUT)
+    return MemoryBackend(max_entries, max_bytes)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the process-wide cache backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _default_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the process-wide cache backend (e.g. with a shared store)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+_caches = {}
+
+
+class TTLCache:
+    """Named, TTL-bounded view over a pluggable cache backend.
+
+    Keys are namespaced with the cache name so several caches can share one
+    backend. ``max_age`` on reads lets callers demand fresher data than the
+    entry's own TTL without evicting it for less demanding readers.
+
+    With ``stale_ttl`` set, entries outlive their TTL by that many seconds
+    and get_or_fetch serves them stale while one background fetch
+    revalidates the key (stale-while-revalidate).
+    """
+
+    def __init__(self, name: str, ttl: float, backend=None, stale_ttl: float = 0):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.revalidations = 0
+        self.revalidation_errors = 0
+        self._backend = backend
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        _caches[name] = self
+
+    @property
+    def backend(self):
+        return self._backend if self._backend is not None else get_backend()
+
+    def _key(self, key) -> str:
+        return f"{self.name}:{key}"
+
+    def get(self, key, max_age: float = None, default=None):
+        if max_age is None and self.stale_ttl:
+            # entries are kept past their TTL only for get_or_fetch to serve stale
+            max_age = self.ttl
+        entry = self.backend.get(self._key(key))
+        if entry is not None:
+            value, stored_at = entry
+            if max_age is None or time.time() - stored_at <= max_age:
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl=None):
+        """Store value; ``ttl`` may be a callable computing the TTL from the value."""
+        if callable(ttl):
+            ttl = ttl(value)
+        now = time.time()
+        self.backend.set(self._key(key), value, now, now + (self.ttl if ttl is None else ttl) + self.stale_ttl)
+
+    def delete(self, key):
+        self.backend.delete(self._key(key))
+
+    def get_or_fetch(self, key, fetch, ttl: float = None, max_age: float = None):
+        """Return the cached value for key, calling fetch() and storing on a miss.
+
+        On a miss, concurrent callers in this process share one in-flight
+        fetch, and the backend's fetch lock is taken so that, with a shared
+        backend, only one worker fetches a cold key while the others wait and
+        then read its result. ``None`` results are returned but never stored.
+        """
+        if self.stale_ttl:
+            entry = self.backend.get(self._key(key))
+            if entry is not None:
+                value, stored_at = entry
+                fresh_for = max_age if max_age is not None else (self.ttl if ttl is None else ttl)
+                if time.time() - stored_at <= fresh_for:
+                    self.hits += 1
+                    return value
+                self.stale_hits += 1
+                self._revalidate(key, fetch, ttl)
+                return value
+            self.misses += 1
+        else:
+            value = self.get(key, max_age=max_age)
+            if value is not None:
+                return value
+
+        return flight.do(self._key(key), self._loader(key, fetch, ttl, max_age))
+
+    def refresh(self, key, fetch, ttl: float = None):
+        """Fetch and store key now, even if the cached entry is still fresh (cache warming)."""
+        return flight.do(self._key(key), self._loader(key, fetch, ttl, 0))
+
+    def _loader(self, key, fetch, ttl, max_age):
+        fresh_for = max_age
+        if fresh_for is None and self.stale_ttl:
+            fresh_for = self.ttl if ttl is None else ttl
+
+        def load():
+            backend = self.backend
+            with backend.lock(self._key(key)):
+                entry = backend.get(self._key(key))
+                if entry is not None and (fresh_for is None or time.time() - entry[1] <= fresh_for):
+                    return entry[0]
+                value = fetch()
+                if value is not None:
+                    self.set(key, value, ttl)
+            return value
+
+        return load
+
+    def _revalidate(self, key, fetch, ttl):
+        """Refresh a stale key on a daemon thread, at most once at a time per key."""
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def run():
+            try:
+                flight.do(self._key(key), self._loader(key, fetch, ttl, None))
+                self.revalidations += 1
+            except Exception:
+                # keep serving the stale copy; the next stale read retries
+                self.revalidation_errors += 1
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=run, name=f"revalidate-{self.name}", daemon=True).start()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses + self.stale_hits
+        stats = {"hits": self.hits, "misses": self.misses,
+                 "hit_ratio": ((self.hits + self.stale_hits) / total) if total else None}
+        if self.stale_ttl:
+            stats.update(stale_hits=self.stale_hits, revalidations=self.revalidations,
+                         revalidation_errors=self.revalidation_errors)
+        if self._backend is not None:
+            stats["backend"] = self._backend.usage()
+        return stats
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for every named cache plus backend usage."""
+    return {"backend": get_backend().usage(), "caches": {name: c.stats() for name, c in _caches.items()}}
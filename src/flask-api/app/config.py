@@ -7,6 +7,133 @@ class Config:
     JWT_AUDIENCE = os.environ.get('JWT_AUDIENCE', 'MyApp')
     DOTNET_API_BASE_URL = os.environ.get('DOTNET_API_BASE_URL', 'http://dotnet-api:8080')
 
+    # yfinance result caching (seconds / entries / bytes); CACHE_BACKEND=sqlite
+    # shares one WAL-mode SQLite file between all gunicorn workers
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH', '/tmp/irs-cache/yfinance.sqlite')
+    SHARED_CACHE_LOCK_TIMEOUT = float(os.environ.get('SHARED_CACHE_LOCK_TIMEOUT', 30))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 2048))
+    CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    QUOTE_CACHE_PRICE_TTL = float(os.environ.get('QUOTE_CACHE_PRICE_TTL', 15))
+    QUOTE_CACHE_FUNDAMENTALS_TTL = float(os.environ.get('QUOTE_CACHE_FUNDAMENTALS_TTL', 15 * 60))
+    QUOTE_CACHE_PROFILE_TTL = float(os.environ.get('QUOTE_CACHE_PROFILE_TTL', 6 * 60 * 60))
+    HISTORY_CACHE_TTL = float(os.environ.get('HISTORY_CACHE_TTL', 5 * 60))
+    STATEMENT_CACHE_TTL = float(os.environ.get('STATEMENT_CACHE_TTL', 12 * 60 * 60))
+    # statements expire at the next earnings date (+ grace, capped at MAX_AGE);
+    # a reported period missing upstream is re-polled every OVERDUE_TTL until
+    # FILING_DEADLINE after its period end. STATEMENT_CACHE_TTL is the fallback
+    STATEMENT_EARNINGS_GRACE = float(os.environ.get('STATEMENT_EARNINGS_GRACE', 24 * 60 * 60))
+    STATEMENT_MAX_AGE = float(os.environ.get('STATEMENT_MAX_AGE', 45 * 24 * 60 * 60))
+    STATEMENT_OVERDUE_TTL = float(os.environ.get('STATEMENT_OVERDUE_TTL', 6 * 60 * 60))
+    STATEMENT_FILING_DEADLINE = float(os.environ.get('STATEMENT_FILING_DEADLINE', 90 * 24 * 60 * 60))
+    OPTIONS_CACHE_TTL = float(os.environ.get('OPTIONS_CACHE_TTL', 60))
+    # /options/<symbol>/surface: annual risk-free rate for Black-Scholes and the
+    # default strike window (fraction of spot either side; 0 = every strike)
+    OPTIONS_RISK_FREE_RATE = float(os.environ.get('OPTIONS_RISK_FREE_RATE', 0.04))
+    OPTIONS_SURFACE_STRIKE_RANGE = float(os.environ.get('OPTIONS_SURFACE_STRIKE_RANGE', 0.5))
+
+    # on-disk OHLCV store for /history (incrementally refreshed)
+    HISTORY_STORE_ENABLED = os.environ.get('HISTORY_STORE_ENABLED', 'true').lower() == 'true'
+    HISTORY_STORE_PATH = os.environ.get('HISTORY_STORE_PATH', '/tmp/irs-cache/history')
+    HISTORY_STORE_REFRESH = float(os.environ.get('HISTORY_STORE_REFRESH', 60))
+    HISTORY_STORE_PRICE_DTYPE = os.environ.get('HISTORY_STORE_PRICE_DTYPE', 'float64')
+    # bars per record when /history is streamed as NDJSON
+    HISTORY_STREAM_BATCH = int(os.environ.get('HISTORY_STREAM_BATCH', 1000))
+
+    # /indicators: default indicator set, bars returned, and the memo of
+    # computed indicator frames (keyed by last bar, so the TTL only bounds memory)
+    INDICATORS_DEFAULT = os.environ.get(
+        'INDICATORS_DEFAULT', 'sma:20,sma:50,sma:200,ema:12,ema:26,rsi:14,atr:14,volatility:20,drawdown,macd,bollinger')
+    INDICATORS_TAIL = int(os.environ.get('INDICATORS_TAIL', 5))
+    INDICATORS_CACHE_TTL = float(os.environ.get('INDICATORS_CACHE_TTL', 24 * 60 * 60))
+    INDICATORS_CACHE_MAX_ENTRIES = int(os.environ.get('INDICATORS_CACHE_MAX_ENTRIES', 512))
+    INDICATORS_CACHE_MAX_BYTES = int(os.environ.get('INDICATORS_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # concurrent fan-out for multi-symbol commands (threads / seconds per symbol)
+    FANOUT_MAX_WORKERS = int(os.environ.get('FANOUT_MAX_WORKERS', 16))
+    FANOUT_TIMEOUT = float(os.environ.get('FANOUT_TIMEOUT', 20))
+    ANALYSIS_SECTION_TIMEOUT = float(os.environ.get('ANALYSIS_SECTION_TIMEOUT', 30))
+    ANALYSIS_CACHE_TTL = float(os.environ.get('ANALYSIS_CACHE_TTL', 60 * 60))
+    # a source with a failed section is cached only this long, so one bad
+    # upstream read is retried soon instead of served for ANALYSIS_CACHE_TTL
+    ANALYSIS_ERROR_TTL = float(os.environ.get('ANALYSIS_ERROR_TTL', 60))
+    # decimals kept by the compact /analysis formats (csv, tsv, markdown, json)
+    ANALYSIS_PRECISION = int(os.environ.get('ANALYSIS_PRECISION', 4))
+
+    # background cache warming for a watchlist; with CACHE_BACKEND=sqlite one
+    # worker is elected through PREFETCH_LOCK_PATH (otherwise every worker
+    # warms its own caches) and refreshes each job when PREFETCH_LEAD of its
+    # TTL is left (0.2 = at 80% of the TTL)
+    PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', 'false').lower() == 'true'
+    PREFETCH_WATCHLIST = [s.strip().upper() for s in os.environ.get('PREFETCH_WATCHLIST', '').split(',') if s.strip()]
+    PREFETCH_JOBS = [s.strip() for s in os.environ.get('PREFETCH_JOBS', 'info,history,statements,analysis').split(',') if s.strip()]
+    PREFETCH_HISTORY_PERIOD = os.environ.get('PREFETCH_HISTORY_PERIOD', '1y')
+    PREFETCH_LEAD = float(os.environ.get('PREFETCH_LEAD', 0.2))
+    PREFETCH_LOCK_PATH = os.environ.get('PREFETCH_LOCK_PATH', '/tmp/irs-cache/prefetch.lock')
+
+    # /correlation: default trailing window (daily returns), beta benchmark and
+    # the cache of rolling-window moments advanced incrementally per universe
+    CORRELATION_WINDOW = int(os.environ.get('CORRELATION_WINDOW', 60))
+    CORRELATION_BENCHMARK = os.environ.get('CORRELATION_BENCHMARK', 'SPY')
+    CORRELATION_MAX_SYMBOLS = int(os.environ.get('CORRELATION_MAX_SYMBOLS', 100))
+    CORRELATION_STATE_TTL = float(os.environ.get('CORRELATION_STATE_TTL', 7 * 24 * 60 * 60))
+    CORRELATION_STATE_MAX_ENTRIES = int(os.environ.get('CORRELATION_STATE_MAX_ENTRIES', 256))
+    CORRELATION_STATE_MAX_BYTES = int(os.environ.get('CORRELATION_STATE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # POST /portfolio/risk: lookback window (daily returns), limits, and the
+    # Monte Carlo engine (batched draws; spread over RISK_MC_PROCESSES spawned
+    # processes when a request asks for it or holds RISK_MC_PROCESS_MIN_SYMBOLS+).
+    # The pool is per worker process: gunicorn.conf.py defaults
+    # RISK_MC_PROCESSES to cores / workers so the workers share the machine
+    RISK_WINDOW = int(os.environ.get('RISK_WINDOW', 252))
+    RISK_MAX_SYMBOLS = int(os.environ.get('RISK_MAX_SYMBOLS', 500))
+    RISK_MAX_HORIZON = int(os.environ.get('RISK_MAX_HORIZON', 60))
+    RISK_MC_SIMULATIONS = int(os.environ.get('RISK_MC_SIMULATIONS', 10000))
+    RISK_MC_MAX_SIMULATIONS = int(os.environ.get('RISK_MC_MAX_SIMULATIONS', 200000))
+    RISK_MC_BATCH_ELEMENTS = int(os.environ.get('RISK_MC_BATCH_ELEMENTS', 4_000_000))
+    RISK_MC_PROCESSES = int(os.environ.get('RISK_MC_PROCESSES', os.cpu_count() or 1))
+    RISK_MC_PROCESS_MIN_SYMBOLS = int(os.environ.get('RISK_MC_PROCESS_MIN_SYMBOLS', 200))
+
+    # /batch endpoints
+    BATCH_MAX_SYMBOLS = int(os.environ.get('BATCH_MAX_SYMBOLS', 500))
+    BATCH_CHUNK_SIZE = int(os.environ.get('BATCH_CHUNK_SIZE', 100))
+
+    # Brave LLM-context results for /news_summary: fresh for the TTL, then served
+    # stale for up to NEWS_SUMMARY_STALE_TTL while refreshed in the background
+    NEWS_SUMMARY_CACHE_TTL = float(os.environ.get('NEWS_SUMMARY_CACHE_TTL', 30 * 60))
+    NEWS_SUMMARY_STALE_TTL = float(os.environ.get('NEWS_SUMMARY_STALE_TTL', 2 * 60 * 60))
+    NEWS_SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get('NEWS_SUMMARY_CACHE_MAX_ENTRIES', 256))
+    NEWS_SUMMARY_CACHE_MAX_BYTES = int(os.environ.get('NEWS_SUMMARY_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+    # limiter for yfinance calls: token bucket shared by all workers through
+    # RATE_LIMIT_PATH (rate adapts AIMD between MIN and MAX calls/s) plus an
+    # adaptive per-worker concurrency cap (gunicorn.conf.py starts it at the
+    # worker's threads/connections); callers wait up to RATE_LIMIT_WAIT
+    # seconds and throttled responses carry Retry-After: RATE_LIMIT_COOLDOWN
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_PATH = os.environ.get('RATE_LIMIT_PATH', '/tmp/irs-cache/yahoo-rate-limit')
+    RATE_LIMIT_RATE = float(os.environ.get('RATE_LIMIT_RATE', 5))
+    RATE_LIMIT_MIN_RATE = float(os.environ.get('RATE_LIMIT_MIN_RATE', 0.5))
+    RATE_LIMIT_MAX_RATE = float(os.environ.get('RATE_LIMIT_MAX_RATE', 30))
+    RATE_LIMIT_INCREASE = float(os.environ.get('RATE_LIMIT_INCREASE', 0.5))
+    RATE_LIMIT_BURST = float(os.environ.get('RATE_LIMIT_BURST', 20))
+    RATE_LIMIT_CONCURRENCY = int(os.environ.get('RATE_LIMIT_CONCURRENCY', 32))
+    RATE_LIMIT_MIN_CONCURRENCY = int(os.environ.get('RATE_LIMIT_MIN_CONCURRENCY', 1))
+    RATE_LIMIT_MAX_CONCURRENCY = int(os.environ.get('RATE_LIMIT_MAX_CONCURRENCY', 256))
+    RATE_LIMIT_WAIT = float(os.environ.get('RATE_LIMIT_WAIT', 10))
+    RATE_LIMIT_COOLDOWN = float(os.environ.get('RATE_LIMIT_COOLDOWN', 30))
+
+    # pooled keep-alive HTTP sessions for Yahoo / Brave (per worker process)
+    HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 10))
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 64))
+    HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 3))
+    HTTP_BACKOFF = float(os.environ.get('HTTP_BACKOFF', 0.5))
+    HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 10))
+
+    # benchmarking only: when > 0, yf.Ticker is replaced by a synthetic ticker
+    # whose info/history requests each take this many seconds (app.sim_upstream)
+    UPSTREAM_SIMULATED_LATENCY = float(os.environ.get('UPSTREAM_SIMULATED_LATENCY', 0))
+
     # flask-smorest settings
     API_TITLE = "Flask API"
     API_VERSION = "v1"
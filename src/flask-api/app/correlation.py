@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+RETURN_KINDS = ("log", "simple")
+
+# smallest history period covering a window of daily returns (plus the extra
+# bar the first return needs)
+_PERIOD_BARS = [("3mo", 60), ("6mo", 123), ("1y", 250), ("2y", 500), ("5y", 1255), ("10y", 2510)]
+
+
+def history_period(window: int) -> str:
+    """History period to load so that ``window`` aligned daily returns are available."""
+    for period, bars in _PERIOD_BARS:
+        # margin for holidays that differ between the symbols' exchanges
+        if bars >= (window + 1) * 1.05:
+            return period
+    return "max"
+
+
+def aligned_returns(closes: dict, kind: str = "log") -> pd.DataFrame:
+    """(date x symbol) returns on the dates every symbol traded, oldest first.
+
+    Each close series is keyed by its calendar date (dropping the exchange
+    time zone) so symbols from different exchanges line up.
+    """
+    if kind not in RETURN_KINDS:
+        raise ValueError(f"Unknown return kind '{kind}'. Use: {', '.join(RETURN_KINDS)}")
+    columns = {}
+    for symbol, close in closes.items():
+        index = close.index
+        if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+            index = index.tz_localize(None)
+        series = pd.Series(close.to_numpy(dtype=float), index=pd.DatetimeIndex(index).normalize())
+        columns[symbol] = series[~series.index.duplicated(keep="last")]
+    prices = pd.concat(columns, axis=1).sort_index().dropna()
+    values = prices.to_numpy()
+    if kind == "log":
+        returns = np.diff(np.log(values), axis=0)
+    else:
+        returns = values[1:] / values[:-1] - 1
+    return pd.DataFrame(returns, index=prices.index[1:], columns=prices.columns)
+
+
+class RollingMoments:
+    """Sums of x and x xᵀ over the last ``window`` return rows, updated bar by bar.
+
+    Covariance and correlation of the window follow from the two sums, so
+    when a bar arrives only its outer product is added (and the oldest
+    bar's subtracted): O(N²) per bar instead of O(window·N²) for a
+    recomputation. The sums are rebuilt from the retained rows every
+    ``window`` updates to keep floating-point drift bounded.
+    """
+
+    def __init__(self, window: int, dates: list, rows: np.ndarray):
+        self.window = window
+        self.dates = list(dates)
+        self.rows = rows
+        self.rebuild()
+
+    @classmethod
+    def from_returns(cls, returns: pd.DataFrame, window: int) -> "RollingMoments":
+        tail = returns.iloc[-window:]
+        return cls(window, list(tail.index), tail.to_numpy(dtype=float))
+
+    def rebuild(self):
+        self.sum = self.rows.sum(axis=0)
+        self.cross = self.rows.T @ self.rows
+        self.updates = 0
+
+    def _push(self, date, row: np.ndarray):
+        self.dates.append(date)
+        self.rows = np.vstack([self.rows, row])
+        self.sum += row
+        self.cross += np.outer(row, row)
+        if len(self.dates) > self.window:
+            old = self.rows[0]
+            self.sum -= old
+            self.cross -= np.outer(old, old)
+            self.dates.pop(0)
+            self.rows = self.rows[1:]
+        self.updates += 1
+
+    def _pop(self):
+        row = self.rows[-1]
+        self.sum -= row
+        self.cross -= np.outer(row, row)
+        self.dates.pop()
+        self.rows = self.rows[:-1]
+
+    def advanced(self, returns: pd.DataFrame) -> tuple:
+        """Return (moments for the latest window of ``returns``, bars applied incrementally).
+
+        A copy is updated in place of this instance, which may be shared
+        through a cache. Falls back to a full rebuild (reported as -1) when
+        the retained rows no longer match ``returns`` (e.g. the history was
+        re-adjusted) or more than a window of bars is new.
+        """
+        if not self.dates or not returns.index.isin(self.dates[:1]).any():
+            return RollingMoments.from_returns(returns, self.window), -1
+        retained = returns.reindex(self.dates)
+        new = returns[returns.index > self.dates[-1]]
+        # the newest retained bar may still be forming (intraday); replace it if it moved
+        changed_last = not np.allclose(retained.iloc[-1].to_numpy(), self.rows[-1], equal_nan=False)
+        stale = retained.iloc[:-1].to_numpy()
+        if (np.isnan(stale).any() or not np.allclose(stale, self.rows[:-1])
+                or len(new) + changed_last >= self.window):
+            return RollingMoments.from_returns(returns, self.window), -1
+
+        moments = RollingMoments.__new__(RollingMoments)
+        moments.__dict__.update(window=self.window, dates=list(self.dates), rows=self.rows.copy(),
+                                sum=self.sum.copy(), cross=self.cross.copy(), updates=self.updates)
+        applied = 0
+        if changed_last:
+            moments._pop()
+            new = returns[returns.index >= self.dates[-1]]
+        for date, row in zip(new.index, new.to_numpy(dtype=float)):
+            moments._push(date, row)
+            applied += 1
+        if moments.updates >= self.window:
+            moments.rebuild()
+        return moments, applied
+
+    def covariance(self) -> np.ndarray:
+        n = len(self.dates)
+        mean = self.sum / n
+        return (self.cross - n * np.outer(mean, mean)) / (n - 1)
+
+    def correlation(self) -> np.ndarray:
+        cov = self.covariance()
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        return np.clip(corr, -1.0, 1.0)
+
+
+def betas(cov: np.ndarray) -> np.ndarray:
+    """beta[i, j]: regression slope of asset i's returns on asset j's (cov_ij / var_j)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cov / np.diag(cov)[None, :]
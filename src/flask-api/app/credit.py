@@ -0,0 +1,270 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Canonical credit line items: name -> (statement, row labels in order of
+# preference). Yahoo's statement schemas differ by company type, so each
+# item falls back through the labels until one has a value.
+LINE_ITEMS = {
+    "Total Debt": ("balance_sheet", ["Total Debt", "Long Term Debt And Capital Lease Obligation", "Long Term Debt",
+                                     "Total Non Current Liabilities Net Minority Interest"]),
+    "Short-term Debt": ("balance_sheet", ["Current Debt", "Current Debt And Capital Lease Obligation",
+                                          "Current Portion Of Long Term Debt"]),
+    "Long-term Debt": ("balance_sheet", ["Long Term Debt", "Long Term Debt And Capital Lease Obligation"]),
+    "Cash & Equivalents": ("balance_sheet", ["Cash And Cash Equivalents",
+                                             "Cash Cash Equivalents And Short Term Investments", "Cash Financial"]),
+    "Total Assets": ("balance_sheet", ["Total Assets"]),
+    "Total Equity": ("balance_sheet", ["Total Equity Gross Minority Interest", "Stockholders Equity",
+                                       "Common Stock Equity"]),
+    "EBITDA": ("financials", ["EBITDA", "Normalized EBITDA"]),
+    "EBIT": ("financials", ["EBIT", "Operating Income"]),
+    "Interest Expense": ("financials", ["Interest Expense", "Interest Expense Non Operating", "Net Interest Income"]),
+    "Revenue": ("financials", ["Total Revenue"]),
+    "Net Income": ("financials", ["Net Income", "Net Income Common Stockholders"]),
+}
+
+# income-statement (flow) items; quarterly flows are annualized in ratios
+FLOW_ITEMS = ["EBITDA", "EBIT", "Interest Expense", "Revenue", "Net Income"]
+ANNUALIZE = {"annual": 1, "quarterly": 4}
+
+RATIOS = ["Debt/Equity", "Debt/Assets", "Debt/EBITDA", "Net Debt/EBITDA",
+          "Interest Coverage (EBITDA)", "Interest Coverage (EBIT)"]
+
+# order of the metrics in cmd_credit output
+METRICS = ["Total Debt", "Short-term Debt", "Long-term Debt", "Cash & Equivalents", "Net Debt", "Total Assets",
+           "Total Equity", "EBITDA", "EBIT", "Interest Expense", "Revenue", "Net Income"] + RATIOS
+
+
+# line items grouped per statement, in LINE_ITEMS order
+ITEMS_BY_STATEMENT = {}
+for _item, (_statement, _labels) in LINE_ITEMS.items():
+    ITEMS_BY_STATEMENT.setdefault(_statement, {})[_item] = _labels
+
+
+class LabelResolver:
+    """Compiled fallback chains of one statement schema (its row labels).
+
+    ``positions[i, k]`` is the row of the k-th candidate label of item i,
+    or the extra all-NaN row past the end when that label is absent, so
+    resolving every item for every period is one fancy-indexing step plus
+    a first-non-NaN pick.
+    """
+
+    def __init__(self, labels: tuple, items: dict):
+        row_of = {}
+        for pos, label in enumerate(labels):
+            row_of.setdefault(label, pos)
+        missing = len(labels)
+        width = max(len(chain) for chain in items.values())
+        self.positions = np.full((len(items), width), missing, dtype=np.intp)
+        for i, chain in enumerate(items.values()):
+            for k, label in enumerate(chain):
+                self.positions[i, k] = row_of.get(label, missing)
+
+    def extract(self, values: np.ndarray) -> np.ndarray:
+        """(row x period) statement values -> (item x period) resolved values."""
+        padded = np.vstack([values, np.full((1, values.shape[1]), np.nan)])
+        block = padded[self.positions]  # item x candidate x period
+        valid = ~np.isnan(block)
+        first = valid.argmax(axis=1)
+        out = np.take_along_axis(block, first[:, None, :], axis=1)[:, 0, :]
+        out[~valid.any(axis=1)] = np.nan
+        return out
+
+
+@lru_cache(maxsize=1024)
+def _resolver(statement: str, labels: tuple) -> LabelResolver:
+    # one compiled table per (statement, schema); schemas repeat across symbols
+    return LabelResolver(labels, ITEMS_BY_STATEMENT[statement])
+
+
+def _values(df) -> np.ndarray:
+    try:
+        return df.to_numpy(dtype=float)
+    except (TypeError, ValueError):
+        return df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+
+def resolve(df, statement: str) -> np.ndarray:
+    """(item x period) values of one statement's line items (no columns if the statement is empty)."""
+    items = ITEMS_BY_STATEMENT[statement]
+    if df is None or df.empty:
+        return np.empty((len(items), 0))
+    return _resolver(statement, tuple(df.index)).extract(_values(df))
+
+
+def latest_items(statements: dict) -> pd.DataFrame:
+    """(symbol x line item) matrix of latest-period values.
+
+    ``statements`` maps symbol -> {statement name: DataFrame}. Each
+    statement is resolved through the label resolver cached for its schema,
+    so no per-label membership scans are repeated across symbols.
+    """
+    symbols = list(statements)
+    blocks = []
+    for statement, items in ITEMS_BY_STATEMENT.items():
+        block = np.full((len(symbols), len(items)), np.nan)
+        for row, symbol in enumerate(symbols):
+            values = resolve(statements[symbol].get(statement), statement)
+            if values.shape[1]:
+                block[row] = values[:, 0]
+        blocks.append(pd.DataFrame(block, columns=list(items)))
+    table = pd.concat(blocks, axis=1) if blocks else pd.DataFrame()
+    table.index = pd.Index(symbols, name="symbol")
+    return table[list(LINE_ITEMS)]
+
+
+def period_items(statements: dict) -> pd.DataFrame:
+    """(period x line item) values of one symbol for every period any statement reports.
+
+    Statement columns are aligned on their period end date; periods are
+    ordered newest first. All periods are resolved in one pass per
+    statement.
+    """
+    frames = []
+    for statement, items in ITEMS_BY_STATEMENT.items():
+        df = statements.get(statement)
+        values = resolve(df, statement)
+        if not values.shape[1]:
+            continue
+        periods = pd.to_datetime(pd.Index(df.columns), errors="coerce")
+        frame = pd.DataFrame(values.T, index=periods, columns=list(items))
+        frames.append(frame[frame.index.notna() & ~frame.index.duplicated()])
+    if not frames:
+        return pd.DataFrame(columns=list(LINE_ITEMS), index=pd.DatetimeIndex([], name="period"), dtype=float)
+    table = pd.concat(frames, axis=1).reindex(columns=list(LINE_ITEMS)).sort_index(ascending=False)
+    table.index.name = "period"
+    return table
+
+
+def trend(table: pd.DataFrame) -> pd.DataFrame:
+    """Per-metric trend statistics over a (period x metric) table, newest period first.
+
+    ``latest``/``previous``/``earliest`` are the newest, second newest and
+    oldest non-NaN values; ``change`` is latest - earliest (``change_pct``
+    relative to abs(earliest)), ``last_change`` latest - previous, and
+    ``slope_per_year`` the least-squares slope against the period dates.
+    """
+    values = table.to_numpy(dtype=float)
+    n_periods, n_metrics = values.shape
+    stats = pd.DataFrame(index=table.columns, columns=["latest", "previous", "earliest", "change", "change_pct",
+                                                       "last_change", "slope_per_year", "periods"], dtype=float)
+    if n_periods == 0:
+        stats["periods"] = 0
+        return stats
+
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    rows = np.arange(n_periods)[:, None]
+    cols = np.arange(n_metrics)
+    first = np.where(valid, rows, n_periods).min(axis=0)
+    second = np.where(valid & (rows > first), rows, n_periods).min(axis=0)
+    last = np.where(valid, rows, -1).max(axis=0)
+    padded = np.vstack([values, np.full((1, n_metrics), np.nan)])
+    latest = padded[first, cols]
+    previous = padded[second, cols]
+    earliest = np.where(last >= 0, padded[last.clip(0), cols], np.nan)
+
+    # years relative to the newest period, so slopes are per year for any frequency
+    x = ((table.index - table.index.max()) / pd.Timedelta(days=365.25)).to_numpy(dtype=float)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_mean = np.where(valid, x, 0).sum(axis=0) / count
+        y_mean = np.where(valid, values, 0).sum(axis=0) / count
+        dx = np.where(valid, x - x_mean, 0)
+        dy = np.where(valid, values - y_mean, 0)
+        slope = (dx * dy).sum(axis=0) / (dx * dx).sum(axis=0)
+        change = latest - earliest
+        change_pct = _div(change, np.abs(earliest)) * 100
+
+    stats["latest"] = latest
+    stats["previous"] = previous
+    stats["earliest"] = earliest
+    stats["change"] = np.where(count >= 2, change, np.nan)
+    stats["change_pct"] = np.where(count >= 2, change_pct, np.nan)
+    stats["last_change"] = latest - previous
+    stats["slope_per_year"] = np.where(count >= 2, slope, np.nan)
+    stats["periods"] = count
+    return stats
+
+
+def signals(stats: pd.DataFrame) -> dict:
+    """Credit trajectory flags from trend() output (None when not enough periods)."""
+    def change(metric):
+        v = stats.loc[metric, "change"]
+        return None if np.isnan(v) else float(v)
+
+    leverage = change("Net Debt/EBITDA")
+    coverage = change("Interest Coverage (EBIT)")
+    return {
+        "leverage_change": change("Debt/EBITDA"),
+        "net_leverage_change": leverage,
+        "coverage_change": coverage,
+        "leverage_rising": None if leverage is None else leverage > 0,
+        "coverage_deteriorating": None if coverage is None else coverage < 0,
+    }
+
+
+def _div(num, den):
+    den = np.where(den == 0, np.nan, den)
+    return num / den
+
+
+def ratios(items: pd.DataFrame, frequency: str = "annual") -> pd.DataFrame:
+    """Line items plus Net Debt and the credit ratios, computed column-wise (NaN where undefined).
+
+    Rows may be symbols or periods. For quarterly items the flows are
+    annualized before dividing debt by them; coverage ratios are unaffected.
+    """
+    scale = ANNUALIZE[frequency]
+    debt = items["Total Debt"].to_numpy(dtype=float)
+    cash = items["Cash & Equivalents"].to_numpy(dtype=float)
+    equity = items["Total Equity"].to_numpy(dtype=float)
+    assets = items["Total Assets"].to_numpy(dtype=float)
+    ebitda = items["EBITDA"].to_numpy(dtype=float) * scale
+    ebit = items["EBIT"].to_numpy(dtype=float) * scale
+    interest = np.abs(items["Interest Expense"].to_numpy(dtype=float)) * scale
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        net_debt = debt - cash
+        out = items.copy()
+        out["Net Debt"] = net_debt
+        out["Debt/Equity"] = _div(debt, equity)
+        out["Debt/Assets"] = _div(debt, assets)
+        out["Debt/EBITDA"] = _div(debt, ebitda)
+        out["Net Debt/EBITDA"] = _div(net_debt, ebitda)
+        out["Interest Coverage (EBITDA)"] = _div(ebitda, interest)
+        out["Interest Coverage (EBIT)"] = _div(ebit, interest)
+    return out[METRICS]
+
+
+def screen(table: pd.DataFrame, filters: dict = None, sort: str = None, ascending: bool = True,
+           limit: int = None) -> pd.DataFrame:
+    """Filter and rank a (symbol x metric) table.
+
+    ``filters`` maps a metric to ``{"min": x, "max": y}`` (either bound
+    optional); a NaN value never passes a filter. Rows are sorted on
+    ``sort`` with NaNs last, then cut to ``limit``.
+    """
+    mask = np.ones(len(table), dtype=bool)
+    for metric, bounds in (filters or {}).items():
+        if metric not in table.columns:
+            raise ValueError(f"Unknown metric '{metric}'. Use: {', '.join(table.columns)}")
+        if not isinstance(bounds, dict) or not set(bounds) <= {"min", "max"}:
+            raise ValueError(f"Filter for '{metric}' must be an object with 'min' and/or 'max'")
+        values = table[metric].to_numpy(dtype=float)
+        with np.errstate(invalid="ignore"):
+            if bounds.get("min") is not None:
+                mask &= values >= float(bounds["min"])
+            if bounds.get("max") is not None:
+                mask &= values <= float(bounds["max"])
+    out = table[mask]
+    if sort is not None:
+        if sort not in table.columns:
+            raise ValueError(f"Unknown sort metric '{sort}'. Use: {', '.join(table.columns)}")
+        out = out.sort_values(sort, ascending=ascending, na_position="last", kind="stable")
+    if limit is not None:
+        if limit < 0:
+            raise ValueError("'limit' must be a non-negative integer")
+        out = out.head(int(limit))
+    return out
@@ -0,0 +1,69 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from app.config import Config
+
+
+def fan_out_iter(fn, items, max_workers: int = None, timeout: float = None):
+    """Call fn(item) for every item on a bounded thread pool, yielding as each finishes.
+
+    Yields ``(item, result, error)`` in completion order; exactly one of
+    result/error is meaningful (error is None on success). An item that runs
+    longer than ``timeout`` seconds once it has started yields a TimeoutError.
+    Closing the generator early cancels the items not yet started.
+    """
+    items = list(dict.fromkeys(items))
+    max_workers = max_workers or Config.FANOUT_MAX_WORKERS
+    timeout = Config.FANOUT_TIMEOUT if timeout is None else timeout
+    if not items:
+        return
+
+    started = {}
+
+    def run(item):
+        started[item] = time.monotonic()
+        return fn(item)
+
+    pool = ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="fanout")
+    try:
+        futures = {pool.submit(run, item): item for item in items}
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            deadlines = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else 0.05
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for f in done:
+                try:
+                    result = f.result()
+                except Exception as e:
+                    yield futures[f], None, e
+                else:
+                    yield futures[f], result, None
+            now = time.monotonic()
+            for f in [f for f in pending if futures[f] in started and now - started[futures[f]] >= timeout]:
+                pending.discard(f)
+                yield futures[f], None, TimeoutError(f"Timed out after {timeout:g}s")
+    finally:
+        # timed-out calls cannot be interrupted; let them finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fan_out(fn, items, max_workers: int = None, timeout: float = None):
+    """Call fn(item) for every item on a bounded thread pool.
+
+    Returns ``(results, errors)``: two dicts keyed by item, in input order.
+    An item that raises, or runs longer than ``timeout`` seconds once it has
+    started, lands in ``errors`` instead of failing the whole batch.
+    """
+    items = list(dict.fromkeys(items))
+    results, errors = {}, {}
+    for item, result, error in fan_out_iter(fn, items, max_workers, timeout):
+        if error is None:
+            results[item] = result
+        else:
+            errors[item] = error
+
+    order = {item: i for i, item in enumerate(items)}
+    return (dict(sorted(results.items(), key=lambda kv: order[kv[0]])),
+            dict(sorted(errors.items(), key=lambda kv: order[kv[0]])))
@@ -0,0 +1,89 @@
+import io
+import json
+
+import numpy as np
+
+# Binary columnar encodings offered on data-heavy endpoints. The DataFrame is
+# handed to the encoder as-is, so no per-row Python objects are built.
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/x-parquet"
+NPZ = "application/x-npz"
+
+BINARY_FORMATS = [ARROW_STREAM, PARQUET, NPZ]
+
+# Incremental encodings: one self-contained record per line / event, so a
+# response can be written while the data is still being produced.
+NDJSON = "application/x-ndjson"
+EVENT_STREAM = "text/event-stream"
+
+STREAM_FORMATS = {"ndjson": NDJSON, "sse": EVENT_STREAM}
+
+_ALIASES = {"application/vnd.apache.parquet": PARQUET}
+
+
+def negotiate(accept_mimetypes) -> str:
+    """Pick the response format from a request's Accept header (JSON by default)."""
+    offered = [JSON] + BINARY_FORMATS + list(_ALIASES)
+    best = accept_mimetypes.best_match(offered, default=JSON)
+    return _ALIASES.get(best, best)
+
+
+def stream_format(stream: str, accept_mimetypes, offered=STREAM_FORMATS) -> str:
+    """Streaming mimetype for a request: ``?stream=`` wins over the Accept header; None to buffer."""
+    if stream:
+        key = stream.lower()
+        if key not in offered:
+            raise ValueError(f"Unknown stream '{stream}'. Use: {', '.join(offered)}")
+        return STREAM_FORMATS[key]
+    best = accept_mimetypes.best_match([JSON] + [STREAM_FORMATS[k] for k in offered], default=JSON)
+    return None if best == JSON else best
+
+
+def stream_record(mimetype: str, event: str, data: dict) -> str:
+    """Encode one record: an SSE event, or an NDJSON line tagged with ``"event"``."""
+    if mimetype == EVENT_STREAM:
+        return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+    return json.dumps({"event": event, **data}, separators=(",", ":")) + "\n"
+
+
+def _arrow_table(frame):
+    import pyarrow as pa
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def _encode_arrow(frame) -> bytes:
+    import pyarrow as pa
+    table = _arrow_table(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _encode_parquet(frame) -> bytes:
+    import pyarrow.parquet as pq
+    buf = io.BytesIO()
+    pq.write_table(_arrow_table(frame), buf)
+    return buf.getvalue()
+
+
+def _encode_npz(frame) -> bytes:
+    buf = io.BytesIO()
+    arrays = {}
+    for name in frame.columns:
+        col = frame[name].to_numpy()
+        # object columns (labels) become fixed-width unicode so no pickle is needed
+        arrays[str(name)] = col.astype(str) if col.dtype == object else col
+    np.savez_compressed(buf, **arrays)
+    return buf.getvalue()
+
+
+_ENCODERS = {ARROW_STREAM: _encode_arrow, PARQUET: _encode_parquet, NPZ: _encode_npz}
+
+
+def encode(frame, mimetype: str) -> bytes:
+    """Serialize a flat DataFrame to one of BINARY_FORMATS."""
+    if mimetype not in _ENCODERS:
+        raise ValueError(f"Unsupported format '{mimetype}'")
+    return _ENCODERS[mimetype](frame)
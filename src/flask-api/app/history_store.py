@@ -0,0 +1,303 @@
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# periods Yahoo counts in trading sessions rather than calendar time
+_SESSION_PERIODS = {"1d": 1, "5d": 5}
+
+_CALENDAR_PERIODS = {
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+# bars re-fetched before the last stored bar to detect split/dividend re-adjustment
+_OVERLAP_DAYS = 7
+
+
+def _period_start(period: str, now: pd.Timestamp):
+    """Earliest date a period needs, or None for 'max' / bar-counted periods."""
+    if period == "ytd":
+        return pd.Timestamp(now.year, 1, 1)
+    if period in _CALENDAR_PERIODS:
+        return (now - _CALENDAR_PERIODS[period]).normalize()
+    return None
+
+
+def _wall_clock(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+class HistoryStore:
+    """On-disk OHLCV store keyed by (symbol, interval) with incremental refresh.
+
+    Each series is a directory of fixed-width column files: ``ts.npy``
+    (int64 UTC nanoseconds), ``open/high/low/close.npy`` (``price_dtype``)
+    and ``volume.npy`` (int64), plus ``meta.json`` naming the current
+    version and how far back the series is known to be complete. Columns
+    are opened with ``mmap_mode="r"`` so every gunicorn worker reads the
+    same page-cache pages, and date ranges are cut with a binary search
+    over ``ts`` into zero-copy views.
+
+    Writers build a new version directory and atomically swap
+    ``meta.json``. A request that is already covered only fetches the bars
+    since the last stored one, and nothing upstream within
+    ``refresh_interval`` seconds.
+    """
+
+    def __init__(self, root: str, fetch, refresh_interval: float = 60.0, price_dtype: str = "float64"):
+        self.root = root
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.price_dtype = np.dtype(price_dtype)
+        self.full_fetches = 0
+        self.tail_fetches = 0
+        self.local_reads = 0
+        self._mapped = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # -- storage -------------------------------------------------------------
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9._=^-]", "_", symbol.upper())
+        return os.path.join(self.root, interval, safe)
+
+    @staticmethod
+    def _read_meta(path: str):
+        try:
+            with open(os.path.join(path, "meta.json")) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+
+    def _open(self, path: str, meta: dict) -> dict:
+        """Map the column files of the current version (cached per version)."""
+        version = os.path.join(path, meta["version"])
+        arrays = self._mapped.get(version)
+        if arrays is None:
+            arrays = {"ts": np.load(os.path.join(version, "ts.npy"), mmap_mode="r")}
+            for name in COLUMNS:
+                arrays[name] = np.load(os.path.join(version, f"{name.lower()}.npy"), mmap_mode="r")
+            with self._locks_guard:
+                # drop maps of superseded versions of this series
+                for key in [k for k in self._mapped if os.path.dirname(k) == path]:
+                    del self._mapped[key]
+                self._mapped[version] = arrays
+        return arrays
+
+    def _load(self, path: str):
+        """Return (arrays, meta) or None when nothing is stored yet."""
+        for _ in range(3):
+            meta = self._read_meta(path)
+            if meta is None:
+                return None
+            try:
+                return self._open(path, meta), meta
+            except FileNotFoundError:
+                # a writer swapped versions between reading meta and the columns
+                continue
+        return None
+
+    def _write(self, path: str, frame: pd.DataFrame, meta: dict):
+        os.makedirs(path, exist_ok=True)
+        version = f"v{time.time_ns()}"
+        tmp = os.path.join(path, f".{version}.{os.getpid()}.tmp")
+        os.makedirs(tmp)
+        index = frame.index
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        ts = index.tz_convert("UTC").tz_localize(None).values.astype("datetime64[ns]").view(np.int64)
+        np.save(os.path.join(tmp, "ts.npy"), ts)
+        for name in COLUMNS:
+            dtype = np.int64 if name == "Volume" else self.price_dtype
+            np.save(os.path.join(tmp, f"{name.lower()}.npy"), frame[name].to_numpy(dtype=dtype))
+        os.rename(tmp, os.path.join(path, version))
+
+        meta = {**meta, "version": version, "tz": str(frame.index.tz) if frame.index.tz is not None else None}
+        meta_tmp = os.path.join(path, f".meta.{os.getpid()}.tmp")
+        with open(meta_tmp, "w") as fh:
+            json.dump(meta, fh)
+        os.replace(meta_tmp, os.path.join(path, "meta.json"))
+
+        # workers still holding an old version keep their maps; the inode lives on
+        for entry in os.listdir(path):
+            if entry.startswith("v") and entry != version:
+                shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+
+    @contextmanager
+    def _lock(self, path: str):
+        # threads in this worker share one lock; workers coordinate via flock
+        with self._locks_guard:
+            lock = self._locks.setdefault(path, threading.Lock())
+        with lock:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, ".lock"), "w") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    # -- views ---------------------------------------------------------------
+
+    @staticmethod
+    def _frame(arrays: dict, tz, lo: int, hi: int) -> pd.DataFrame:
+        """DataFrame over rows [lo, hi) whose columns are views of the mapped files."""
+        index = pd.DatetimeIndex(np.asarray(arrays["ts"][lo:hi]).view("M8[ns]"), tz="UTC")
+        index = index.tz_convert(tz) if tz is not None else index.tz_localize(None)
+        return pd.DataFrame({name: arrays[name][lo:hi] for name in COLUMNS}, index=index, copy=False)
+
+    @staticmethod
+    def _search(arrays: dict, tz, start: pd.Timestamp) -> int:
+        """Binary-search the first row at or after a wall-clock date."""
+        start = start.tz_localize(tz if tz is not None else "UTC")
+        ns = np.datetime64(start.tz_convert("UTC").tz_localize(None), "ns").astype(np.int64)
+        return int(np.searchsorted(arrays["ts"], ns, side="left"))
+
+    @staticmethod
+    def _sessions_back(arrays: dict, tz, sessions: int) -> int:
+        """First row of the last ``sessions`` trading days (one bar each for daily data, many intraday)."""
+        index = pd.DatetimeIndex(np.asarray(arrays["ts"]).view("M8[ns]"), tz="UTC")
+        days = (index.tz_convert(tz) if tz is not None else index.tz_localize(None)).normalize()
+        first = days.unique()[-sessions:][0]
+        return int(days.searchsorted(first, side="left"))
+
+    # -- refresh -------------------------------------------------------------
+
+    @staticmethod
+    def _clean(frame) -> pd.DataFrame:
+        if frame is None or frame.empty:
+            return pd.DataFrame(columns=COLUMNS)
+        frame = frame.reindex(columns=COLUMNS)
+        frame["Volume"] = frame["Volume"].fillna(0).astype(np.int64)
+        return frame
+
+    @staticmethod
+    def _merge(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+        merged = pd.concat([old, new]) if not old.empty else new
+        merged = merged[~merged.index.duplicated(keep="last")]
+        return merged.sort_index()
+
+    @staticmethod
+    def _readjusted(old: pd.DataFrame, tail: pd.DataFrame) -> bool:
+        """True when bars before the last stored one changed (split/dividend re-adjustment)."""
+        overlap = old.index[:-1].intersection(tail.index)
+        if overlap.empty:
+            return False
+        return not np.allclose(old.loc[overlap, "Close"].to_numpy(dtype=float),
+                               tail.loc[overlap, "Close"].to_numpy(dtype=float), rtol=1e-5, equal_nan=True)
+
+    def _covers(self, meta: dict, period: str, now: pd.Timestamp) -> bool:
+        if meta.get("complete"):
+            return True
+        if period == "max":
+            return False
+        start = _period_start(period, now)
+        covered_from = meta.get("covered_from")
+        if start is None:
+            return covered_from is not None
+        return covered_from is not None and pd.Timestamp(covered_from) <= start
+
+    def _full_fetch(self, symbol, interval, period, now) -> tuple:
+        """Download a whole period; it always spans at least what was stored before."""
+        fresh = self._clean(self.fetch(symbol, interval=interval, period=period))
+        self.full_fetches += 1
+        start = _period_start(period, now)
+        if start is None and not fresh.empty:
+            start = _wall_clock(fresh.index).min().normalize()
+        meta = {
+            "complete": period == "max",
+            "covered_from": str(start.date()) if start is not None else None,
+            "refreshed_at": time.time(),
+        }
+        return fresh, meta
+
+    def _fresh(self, meta: dict, period: str, now: pd.Timestamp) -> bool:
+        return self._covers(meta, period, now) and time.time() - meta.get("refreshed_at", 0) < self.refresh_interval
+
+    def _refresh(self, symbol: str, interval: str, period: str, force: bool = False):
+        """Bring the stored series up to date for period; return (arrays, meta) or None.
+
+        ``force`` fetches the tail even if the series was refreshed recently.
+        """
+        path = self._dir(symbol, interval)
+        now = pd.Timestamp.now().normalize()
+
+        # fast path: covered and recently refreshed, no lock needed
+        stored = self._load(path)
+        if not force and stored is not None and self._fresh(stored[1], period, now):
+            self.local_reads += 1
+            return stored
+
+        with self._lock(path):
+            stored = self._load(path)
+            if not force and stored is not None and self._fresh(stored[1], period, now):
+                self.local_reads += 1
+                return stored
+
+            if stored is None or not self._covers(stored[1], period, now):
+                frame, meta = self._full_fetch(symbol, interval, period, now)
+                if frame.empty:
+                    return None
+                self._write(path, frame, meta)
+                return self._load(path)
+
+            arrays, meta = stored
+            frame = self._frame(arrays, meta["tz"], 0, len(arrays["ts"]))
+            since = (_wall_clock(frame.index).max() - pd.Timedelta(days=_OVERLAP_DAYS)).date()
+            tail = self._clean(self.fetch(symbol, interval=interval, start=str(since)))
+            self.tail_fetches += 1
+            if self._readjusted(frame, tail):
+                # history was re-adjusted upstream: reload everything already covered
+                if meta.get("complete"):
+                    frame, meta = self._full_fetch(symbol, interval, "max", now)
+                else:
+                    frame = self._clean(self.fetch(symbol, interval=interval, start=meta["covered_from"]))
+                    self.full_fetches += 1
+                    meta["refreshed_at"] = time.time()
+            else:
+                frame = self._merge(frame, tail)
+                meta["refreshed_at"] = time.time()
+            self._write(path, frame, meta)
+            return self._load(path)
+
+    # -- public --------------------------------------------------------------
+
+    def get(self, symbol: str, period: str = "1mo", interval: str = "1d", force: bool = False):
+        """Return the OHLCV DataFrame for a yfinance-style period (None if empty).
+
+        The frame's columns are views of the memory-mapped files; treat it
+        as read-only. ``force`` refreshes the stored tail before reading.
+        """
+        stored = self._refresh(symbol, interval, period, force)
+        if stored is None:
+            return None
+        arrays, meta = stored
+        n = len(arrays["ts"])
+        if n == 0:
+            return None
+        if period in _SESSION_PERIODS:
+            lo = self._sessions_back(arrays, meta["tz"], _SESSION_PERIODS[period])
+        else:
+            start = _period_start(period, pd.Timestamp.now())
+            lo = 0 if start is None else self._search(arrays, meta["tz"], start)
+        return self._frame(arrays, meta["tz"], lo, n)
+
+    def stats(self) -> dict:
+        return {"full_fetches": self.full_fetches, "tail_fetches": self.tail_fetches,
+                "local_reads": self.local_reads, "mapped_series": len(self._mapped)}
@@ -0,0 +1,82 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import Config
+
+try:
+    # yfinance >= 0.2.54 talks to Yahoo through curl_cffi (browser TLS
+    # fingerprint); a plain requests.Session is rejected or rate-limited
+    from curl_cffi import requests as curl_requests
+except ImportError:  # pragma: no cover - older yfinance without curl_cffi
+    curl_requests = None
+
+# Process-wide keep-alive sessions for the upstream APIs. Built lazily on
+# first use and rebuilt in forked gunicorn workers, so sockets are never
+# shared between processes.
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def _retry() -> Retry:
+    return Retry(
+        total=Config.HTTP_RETRIES,
+        backoff_factor=Config.HTTP_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _requests_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=Config.HTTP_POOL_CONNECTIONS,
+                          pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+                          max_retries=_retry())
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _yahoo_session():
+    if curl_requests is None:
+        return _requests_session()
+    # curl_cffi keeps one curl handle (and its connection cache) per thread
+    return curl_requests.Session(impersonate="chrome")
+
+
+_FACTORIES = {"brave": _requests_session, "yahoo": _yahoo_session}
+
+
+def _get(name: str):
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _sessions[name] = _FACTORIES[name]()
+    return session
+
+
+def brave_session() -> requests.Session:
+    """Pooled session (keep-alive, retry with backoff on 429/5xx) for the Brave Search API."""
+    return _get("brave")
+
+
+def yahoo_session():
+    """Shared session handed to yf.Ticker / yf.Search / yf.download."""
+    return _get("yahoo")
+
+
+def _reset_after_fork():
+    global _lock
+    _lock = threading.Lock()
+    _sessions.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+# Technical indicators over an OHLCV frame (yfinance column names). Each
+# kernel is a whole-column pandas rolling/ewm operation returning one or
+# more named columns aligned with the bars.
+
+# bars per year, to annualize volatility
+BARS_PER_YEAR = {"1m": 252 * 390, "5m": 252 * 78, "15m": 252 * 26, "30m": 252 * 13, "1h": 252 * 7,
+                 "1d": 252, "1wk": 52, "1mo": 12}
+INTERVALS = list(BARS_PER_YEAR)
+
+
+def _close(frame) -> pd.Series:
+    return frame["Close"].astype(float)
+
+
+def _wilder(series: pd.Series, n: int) -> pd.Series:
+    # Wilder's smoothing is an EMA with alpha = 1/n, undefined until n bars exist
+    return series.ewm(alpha=1 / n, adjust=False, min_periods=n).mean()
+
+
+def sma(frame, n: int = 20) -> dict:
+    return {f"sma_{n}": _close(frame).rolling(n).mean()}
+
+
+def ema(frame, n: int = 20) -> dict:
+    return {f"ema_{n}": _close(frame).ewm(span=n, adjust=False, min_periods=n).mean()}
+
+
+def rsi(frame, n: int = 14) -> dict:
+    delta = _close(frame).diff()
+    gain = _wilder(delta.clip(lower=0), n)
+    loss = _wilder(-delta.clip(upper=0), n)
+    rs = gain / loss.where(loss != 0)
+    # no losses in the window: RSI is 100 by definition
+    return {f"rsi_{n}": (100 - 100 / (1 + rs)).where(loss != 0, 100.0).where(gain.notna())}
+
+
+def atr(frame, n: int = 14) -> dict:
+    high = frame["High"].to_numpy(dtype=float)
+    low = frame["Low"].to_numpy(dtype=float)
+    prev_close = _close(frame).shift(1).to_numpy()
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return {f"atr_{n}": _wilder(pd.Series(true_range, index=frame.index), n)}
+
+
+def volatility(frame, n: int = 20, interval: str = "1d") -> dict:
+    """Annualized standard deviation of log returns over n bars."""
+    returns = np.log(_close(frame)).diff()
+    return {f"volatility_{n}": returns.rolling(n).std() * np.sqrt(BARS_PER_YEAR[interval])}
+
+
+def drawdown(frame) -> dict:
+    """Fraction below the running peak close (0 at a new high)."""
+    close = _close(frame)
+    return {"drawdown": close / close.cummax() - 1}
+
+
+def macd(frame, fast: int = 12, slow: int = 26, signal: int = 9) -> dict:
+    close = _close(frame)
+    line = (close.ewm(span=fast, adjust=False, min_periods=fast).mean()
+            - close.ewm(span=slow, adjust=False, min_periods=slow).mean())
+    sig = line.ewm(span=signal, adjust=False, min_periods=signal).mean()
+    suffix = f"{fast}_{slow}_{signal}"
+    return {f"macd_{suffix}": line, f"macd_signal_{suffix}": sig, f"macd_hist_{suffix}": line - sig}
+
+
+def bollinger(frame, n: int = 20, k: float = 2.0) -> dict:
+    close = _close(frame)
+    mid = close.rolling(n).mean()
+    width = k * close.rolling(n).std(ddof=0)
+    suffix = f"{n}_{k:g}"
+    return {f"bb_mid_{suffix}": mid, f"bb_upper_{suffix}": mid + width, f"bb_lower_{suffix}": mid - width,
+            f"bb_pctb_{suffix}": (close - (mid - width)) / (2 * width).where(width != 0)}
+
+
+INDICATORS = {
+    "sma": sma,
+    "ema": ema,
+    "rsi": rsi,
+    "atr": atr,
+    "volatility": volatility,
+    "drawdown": drawdown,
+    "macd": macd,
+    "bollinger": bollinger,
+}
+
+
+def parse(spec) -> list:
+    """Parse "sma:20,sma:50,rsi,macd:12:26:9" into [(name, (params...)), ...], duplicates dropped."""
+    if isinstance(spec, str):
+        spec = spec.split(",")
+    parsed = []
+    for raw in spec:
+        parts = [p.strip() for p in raw.split(":")]
+        name = parts[0].lower()
+        if not name:
+            continue
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{name}'. Use: {', '.join(INDICATORS)}")
+        try:
+            params = tuple(float(p) if "." in p else int(p) for p in parts[1:])
+        except ValueError:
+            raise ValueError(f"Invalid parameters in '{raw.strip()}'") from None
+        if any(p <= 0 for p in params):
+            raise ValueError(f"Parameters must be positive in '{raw.strip()}'")
+        if (name, params) not in parsed:
+            parsed.append((name, params))
+    if not parsed:
+        raise ValueError("No indicators requested")
+    return parsed
+
+
+def compute(frame: pd.DataFrame, spec: list, interval: str = "1d") -> pd.DataFrame:
+    """Evaluate parsed indicators over the whole frame; one column per output, indexed like frame."""
+    columns = {}
+    for name, params in spec:
+        kwargs = {"interval": interval} if name == "volatility" else {}
+        try:
+            columns.update(INDICATORS[name](frame, *params, **kwargs))
+        except TypeError:
+            raise ValueError(f"Too many parameters for '{name}'") from None
+    return pd.DataFrame(columns, index=frame.index)
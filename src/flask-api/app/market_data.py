@@ -0,0 +1,201 @@
+from collections import Counter
+
+import pandas as pd
+import yfinance as yf
+
+from app import http_pool
+from app.cache import TTLCache
+from app.config import Config
+from app.history_store import HistoryStore
+from app.quote_cache import quote_cache, PRICE, PROFILE
+from app.rate_limit import UpstreamThrottled, upstream
+from app.sim_upstream import SimulatedTicker
+from app.singleflight import flight
+from app.statement_store import STATEMENTS, StatementStore
+
+# Single access layer for the yfinance calls the routes make. Every result
+# goes through a named TTLCache so that, with CACHE_BACKEND=sqlite, all
+# gunicorn workers share one copy and only one of them fetches a cold key.
+# Every upstream call is gated by the shared rate limiter (app.rate_limit).
+
+_history_cache = TTLCache("history", Config.HISTORY_CACHE_TTL)
+_options_cache = TTLCache("options", Config.OPTIONS_CACHE_TTL)
+
+# per-symbol read counts in this worker only (not shared through the cache
+# backend); the prefetch scheduler warms the symbols it has served most first
+access_counts = Counter()
+
+
+def note_access(symbol: str):
+    access_counts[symbol.upper()] += 1
+
+
+def get_ticker(symbol: str) -> yf.Ticker:
+    """yf.Ticker bound to the process-wide pooled Yahoo session."""
+    if Config.UPSTREAM_SIMULATED_LATENCY > 0:
+        return SimulatedTicker(symbol, Config.UPSTREAM_SIMULATED_LATENCY)
+    return yf.Ticker(symbol, session=http_pool.yahoo_session())
+
+
+def _fetch_history(symbol: str, **kwargs):
+    return upstream.call(lambda: get_ticker(symbol).history(**kwargs))
+
+
+history_store = HistoryStore(Config.HISTORY_STORE_PATH, _fetch_history,
+                             refresh_interval=Config.HISTORY_STORE_REFRESH,
+                             price_dtype=Config.HISTORY_STORE_PRICE_DTYPE) if Config.HISTORY_STORE_ENABLED else None
+
+
+def get_info(symbol: str, fields: str = PRICE, ticker=None) -> dict:
+    """Return Ticker.info for symbol, fresh enough for the given field class."""
+    note_access(symbol)
+    t = ticker if ticker is not None else get_ticker(symbol)
+    return quote_cache.get_info(symbol, _info_fetcher(t), fields)
+
+
+def refresh_info(symbol: str) -> dict:
+    """Refetch Ticker.info ahead of expiry."""
+    return quote_cache.refresh(symbol, _info_fetcher(get_ticker(symbol)))
+
+
+def _info_fetcher(t):
+    def fetch():
+        info = upstream.call(lambda: t.info)
+        if not info and upstream.recently_throttled():
+            # Yahoo answers throttled quote requests with an empty dict; do not
+            # cache it or let callers report the symbol as unknown
+            raise UpstreamThrottled(retry_after=upstream.cooldown)
+        return info
+
+    return fetch
+
+
+def get_history(symbol: str, period: str = "1mo", interval: str = "1d"):
+    """Return the OHLCV DataFrame from Ticker.history (None if empty).
+
+    With the on-disk history store enabled, repeat queries are local reads
+    plus, at most once per refresh interval, a small tail fetch.
+    """
+    note_access(symbol)
+    if history_store is not None:
+        return flight.do(f"history:{symbol.upper()}:{period}:{interval}",
+                         lambda: history_store.get(symbol, period, interval))
+    return _history_cache.get_or_fetch(f"{symbol.upper()}:{period}:{interval}",
+                                       _history_fetcher(symbol, period, interval))
+
+
+def refresh_history(symbol: str, period: str = "1mo", interval: str = "1d"):
+    """Bring the stored (or cached) history for symbol up to date ahead of expiry."""
+    if history_store is not None:
+        return flight.do(f"history:{symbol.upper()}:{period}:{interval}",
+                         lambda: history_store.get(symbol, period, interval, force=True))
+    return _history_cache.refresh(f"{symbol.upper()}:{period}:{interval}",
+                                  _history_fetcher(symbol, period, interval))
+
+
+def _history_fetcher(symbol: str, period: str, interval: str):
+    def fetch():
+        hist = upstream.call(lambda: get_ticker(symbol).history(period=period, interval=interval))
+        return None if hist is None or hist.empty else hist
+
+    return fetch
+
+
+def get_attr(symbol: str, attr: str):
+    """Read an uncached Ticker attribute (news, dividends, ...), coalescing concurrent identical reads."""
+    note_access(symbol)
+    return flight.do(f"{attr}:{symbol.upper()}", lambda: upstream.call(lambda: getattr(get_ticker(symbol), attr)))
+
+
+def search(query: str):
+    """Run yf.Search for query, coalescing concurrent identical searches."""
+    return flight.do(f"search:{query}", lambda: upstream.call(
+        lambda: yf.Search(query, session=http_pool.yahoo_session())))
+
+
+def _fetch_statement(symbol: str, attr: str):
+    return upstream.call(lambda: getattr(get_ticker(symbol), attr))
+
+
+def _next_earnings(symbol: str):
+    """Next earnings date (epoch seconds) from the cached profile info, or None."""
+    info = get_info(symbol, PROFILE)
+    return info.get("earningsTimestampStart") or info.get("earningsTimestamp")
+
+
+statement_store = StatementStore(TTLCache("statements", Config.STATEMENT_CACHE_TTL), _fetch_statement, _next_earnings)
+
+
+def get_statement(symbol: str, name: str, frequency: str = "annual"):
+    """Return one financial statement DataFrame (financials, balance_sheet or cashflow)."""
+    note_access(symbol)
+    return statement_store.get(symbol, name, frequency)
+
+
+def get_statements(symbol: str, frequency: str = "annual") -> dict:
+    """Return {name: DataFrame} for all of STATEMENTS, fetching any missing ones concurrently."""
+    note_access(symbol)
+    return statement_store.get_all(symbol, frequency)
+
+
+def refresh_statement(symbol: str, name: str, frequency: str = "annual"):
+    """Refetch one financial statement ahead of expiry."""
+    return statement_store.refresh(symbol, name, frequency)
+
+
+def get_option_expirations(symbol: str) -> tuple:
+    """Return the listed option expiry dates for symbol."""
+    def fetch():
+        try:
+            return tuple(upstream.call(lambda: get_ticker(symbol).options))
+        except UpstreamThrottled:
+            raise
+        except Exception:
+            return None
+
+    return _options_cache.get_or_fetch(f"{symbol.upper()}:expirations", fetch) or ()
+
+
+def get_option_chain(symbol: str, expiry: str) -> dict:
+    """Return {"calls": DataFrame, "puts": DataFrame} for one expiry."""
+    def fetch():
+        chain = upstream.call(lambda: get_ticker(symbol).option_chain(expiry))
+        # yfinance's Options namedtuple is built at call time and cannot be
+        # pickled into a shared backend, so keep the frames in a plain dict
+        return {"calls": chain.calls, "puts": chain.puts}
+
+    return _options_cache.get_or_fetch(f"{symbol.upper()}:chain:{expiry}", fetch)
+
+
+def download_daily(symbols, period: str = "5d", fields=("Close", "Volume"), chunk_size: int = None) -> dict:
+    """Bulk-download daily bars for many symbols with yf.download.
+
+    Symbols are requested in chunks of ``chunk_size``; the result maps each
+    field name to a (date x symbol) DataFrame whose columns are exactly
+    ``symbols`` (all-NaN for symbols Yahoo returned nothing for).
+    """
+    symbols = [s.upper() for s in symbols]
+    chunk_size = chunk_size or Config.BATCH_CHUNK_SIZE
+    parts = {field: [] for field in fields}
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        df = upstream.call(lambda: yf.download(chunk, period=period, interval="1d", auto_adjust=False,
+                                               group_by="column", threads=True, progress=False,
+                                               session=http_pool.yahoo_session()))
+        if df is None or df.empty:
+            continue
+        for field in fields:
+            if isinstance(df.columns, pd.MultiIndex):
+                if field not in df.columns.get_level_values(0):
+                    continue
+                frame = df[field]
+            elif field in df.columns:
+                # older yfinance returns flat columns for a single ticker
+                frame = df[[field]].set_axis(chunk[:1], axis=1)
+            else:
+                continue
+            parts[field].append(frame)
+    return {
+        field: (pd.concat(frames, axis=1) if frames else pd.DataFrame()).reindex(columns=symbols)
+        for field, frames in parts.items()
+    }
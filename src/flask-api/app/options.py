@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+# Black-Scholes analytics over whole option chains. Every function takes
+# NumPy arrays (one element per contract) and works element-wise, so a full
+# surface is priced, inverted and differentiated in a handful of array
+# operations instead of a Python loop per strike.
+
+_YEAR = 365.0 * 24 * 60 * 60
+# US equity options stop trading at 16:00 New York time (~20:00-21:00 UTC)
+_EXPIRY_CLOSE = pd.Timedelta(hours=20)
+
+SIDES = {"call": "calls", "put": "puts"}
+GREEKS = ["iv", "delta", "gamma", "vega", "theta"]
+# per-contract fields that can be put on the grid, with their rounding
+FIELDS = {"price": 4, "iv": 4, "delta": 4, "gamma": 6, "vega": 4, "theta": 4, "volume": 0, "openInterest": 0}
+
+# Abramowitz & Stegun 7.1.26 (|error| < 1.5e-7); scipy is not a dependency
+_ERF_P = 0.3275911
+_ERF_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+
+def _erf(x):
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + _ERF_P * x)
+    a1, a2, a3, a4, a5 = _ERF_A
+    poly = ((((a5 * t + a4) * t + a3) * t + a2) * t + a1) * t
+    return sign * (1.0 - poly * np.exp(-x * x))
+
+
+def norm_cdf(x):
+    return 0.5 * (1.0 + _erf(x / np.sqrt(2.0)))
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2.0 * np.pi)
+
+
+def _d1_d2(spot, strike, t, rate, div, sigma):
+    vol_t = sigma * np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate - div + 0.5 * sigma * sigma) * t) / vol_t
+    return d1, d1 - vol_t
+
+
+def bs_price(spot, strike, t, rate, div, sigma, is_call):
+    """European option value (continuous dividend yield ``div``)."""
+    d1, d2 = _d1_d2(spot, strike, t, rate, div, sigma)
+    fwd_spot = spot * np.exp(-div * t)
+    pv_strike = strike * np.exp(-rate * t)
+    call = fwd_spot * norm_cdf(d1) - pv_strike * norm_cdf(d2)
+    put = pv_strike * norm_cdf(-d2) - fwd_spot * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def _vega(spot, strike, t, rate, div, sigma):
+    d1, _ = _d1_d2(spot, strike, t, rate, div, sigma)
+    return spot * np.exp(-div * t) * norm_pdf(d1) * np.sqrt(t)
+
+
+def greeks(spot, strike, t, rate, div, sigma, is_call) -> dict:
+    """Delta, gamma, vega (per vol point) and theta (per calendar day)."""
+    d1, d2 = _d1_d2(spot, strike, t, rate, div, sigma)
+    carry = np.exp(-div * t)
+    discount = np.exp(-rate * t)
+    pdf = norm_pdf(d1)
+    sqrt_t = np.sqrt(t)
+    decay = -spot * carry * pdf * sigma / (2 * sqrt_t)
+    call_theta = decay - rate * strike * discount * norm_cdf(d2) + div * spot * carry * norm_cdf(d1)
+    put_theta = decay + rate * strike * discount * norm_cdf(-d2) - div * spot * carry * norm_cdf(-d1)
+    return {
+        "delta": np.where(is_call, carry * norm_cdf(d1), carry * (norm_cdf(d1) - 1)),
+        "gamma": carry * pdf / (spot * sigma * sqrt_t),
+        "vega": spot * carry * pdf * sqrt_t / 100,
+        "theta": np.where(is_call, call_theta, put_theta) / 365,
+    }
+
+
+def implied_vol(price, spot, strike, t, rate, div, is_call, tol: float = 1e-6, max_iter: int = 100,
+                low: float = 1e-4, high: float = 5.0, min_vega: float = 1e-3):
+    """Implied volatility of every contract at once; NaN where there is no solution.
+
+    Safeguarded Newton: each contract keeps a bracket [lo, hi] around its
+    root, takes the Newton step when it stays inside the bracket and
+    bisects otherwise, so it converges even where vega is tiny (deep in or
+    out of the money). Prices outside the no-arbitrage bounds are NaN, and
+    so are solutions with vega below ``min_vega``: there the price barely
+    depends on volatility and any vol in a wide band would match it.
+    """
+    price, spot, strike, t = (np.asarray(a, dtype=float) for a in (price, spot, strike, t))
+    price, spot, strike, t, is_call = np.broadcast_arrays(price, spot, strike, t, is_call)
+    fwd_spot = spot * np.exp(-div * t)
+    pv_strike = strike * np.exp(-rate * t)
+    lower = np.where(is_call, np.maximum(fwd_spot - pv_strike, 0), np.maximum(pv_strike - fwd_spot, 0))
+    upper = np.where(is_call, fwd_spot, pv_strike)
+    with np.errstate(invalid="ignore"):
+        valid = (t > 0) & (price > lower) & (price < upper) & (strike > 0) & (spot > 0)
+
+    sigma = np.full(price.shape, np.nan)
+    idx = np.flatnonzero(valid)
+    p, s, k, tt, c = (a[valid] for a in (price, spot, strike, t, is_call))
+    lo = np.full(idx.size, low)
+    hi = np.full(idx.size, high)
+    # Brenner-Subrahmanyam at-the-money estimate as the starting point
+    x = np.clip(np.sqrt(2 * np.pi / tt) * p / s, low * 10, high / 2)
+    done = np.zeros(idx.size, dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(max_iter):
+            active = ~done
+            if not active.any():
+                break
+            xa = x[active]
+            diff = bs_price(s[active], k[active], tt[active], rate, div, xa, c[active]) - p[active]
+            converged = np.abs(diff) < tol
+            too_high = diff > 0
+            lo[active] = np.where(too_high, lo[active], xa)
+            hi[active] = np.where(too_high, xa, hi[active])
+            step = xa - diff / _vega(s[active], k[active], tt[active], rate, div, xa)
+            inside = (step > lo[active]) & (step < hi[active])
+            x[active] = np.where(converged, xa, np.where(inside, step, 0.5 * (lo[active] + hi[active])))
+            done[active] = converged | (hi[active] - lo[active] < 1e-10)
+        identified = _vega(s, k, tt, rate, div, x) >= min_vega
+    sigma[idx] = np.where(done & identified, x, np.nan)
+    return sigma
+
+
+def years_to_expiry(expiries, now: pd.Timestamp) -> np.ndarray:
+    """Year fractions from now to each expiry date's close (<= 0 once expired)."""
+    close = pd.to_datetime(pd.Index(expiries)) + _EXPIRY_CLOSE
+    return ((close - now.tz_localize(None)) / pd.Timedelta(seconds=1)).to_numpy(dtype=float) / _YEAR
+
+
+def chain_table(chains: dict) -> pd.DataFrame:
+    """Long table (one row per contract) from {expiry: {"calls": DataFrame, "puts": DataFrame}}."""
+    frames = []
+    for expiry, chain in chains.items():
+        for side, key in SIDES.items():
+            frame = chain.get(key)
+            if frame is None or frame.empty:
+                continue
+            part = pd.DataFrame({
+                "expiry": expiry,
+                "type": side,
+                "strike": frame["strike"].to_numpy(dtype=float),
+            })
+            for col in ("bid", "ask", "lastPrice", "volume", "openInterest"):
+                part[col] = frame[col].to_numpy(dtype=float) if col in frame else np.nan
+            frames.append(part)
+    if not frames:
+        return pd.DataFrame(columns=["expiry", "type", "strike", "bid", "ask", "lastPrice", "volume", "openInterest"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def analyze(table: pd.DataFrame, spot: float, now: pd.Timestamp, rate: float, div: float = 0.0) -> pd.DataFrame:
+    """Add price (bid/ask mid, else last), implied vol and greeks to a chain_table()."""
+    table = table.copy()
+    bid = table["bid"].to_numpy(dtype=float)
+    ask = table["ask"].to_numpy(dtype=float)
+    quoted = (bid > 0) & (ask >= bid)
+    table["price"] = np.where(quoted, 0.5 * (bid + ask), table["lastPrice"].to_numpy(dtype=float))
+
+    expiries = table["expiry"].unique()
+    t = pd.Series(years_to_expiry(expiries, now), index=expiries).reindex(table["expiry"]).to_numpy()
+    strike = table["strike"].to_numpy(dtype=float)
+    is_call = (table["type"] == "call").to_numpy()
+    iv = implied_vol(table["price"].to_numpy(dtype=float), spot, strike, t, rate, div, is_call)
+    table["years"] = t
+    table["iv"] = iv
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, values in greeks(spot, strike, t, rate, div, iv, is_call).items():
+            table[name] = values
+    return table
+
+
+def grid(table: pd.DataFrame, fields=GREEKS) -> dict:
+    """Strike x expiry matrices per side and field: {"expiries", "strikes", "calls": {field: [[...]]}, "puts": ...}.
+
+    Rows follow ``strikes`` (ascending), columns follow ``expiries``; a
+    strike not listed for an expiry is None.
+    """
+    expiries = sorted(table["expiry"].unique())
+    strikes = np.sort(table["strike"].unique())
+    out = {"expiries": [str(e) for e in expiries], "strikes": strikes.tolist()}
+    for side, key in SIDES.items():
+        part = table[table["type"] == side]
+        out[key] = {}
+        for field in fields:
+            matrix = part.pivot_table(index="strike", columns="expiry", values=field, aggfunc="first", dropna=False)
+            values = matrix.reindex(index=strikes, columns=expiries).to_numpy(dtype=float)
+            values = np.round(values, FIELDS[field])
+            cells = values.astype(object)
+            cells[~np.isfinite(values)] = None
+            out[key][field] = cells.tolist()
+    return out
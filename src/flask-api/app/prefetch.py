@@ -0,0 +1,175 @@
+import fcntl
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+
+from app import market_data
+from app.config import Config
+from app.rate_limit import UpstreamThrottled
+from app.statement_store import FREQUENCIES
+
+# how often a non-leader worker retries the election, and the retry delay
+# for a job that failed for a reason other than throttling (seconds)
+_ELECTION_RETRY = 30.0
+_FAILURE_RETRY = 60.0
+
+
+def _refresh_statements(symbol: str):
+    # statements expire at earnings dates; only renew those about to lapse,
+    # annual and quarterly alike (/credit/screen reads either)
+    for frequency in FREQUENCIES:
+        market_data.statement_store.warm(symbol, within=Config.STATEMENT_CACHE_TTL, frequency=frequency)
+
+
+def _refresh_analysis(symbol: str):
+    from analysis_and_holdings import refresh_sections
+    refresh_sections(symbol)
+
+
+def default_jobs() -> dict:
+    """Prefetch job kinds: name -> (ttl seconds, refresh(symbol))."""
+    history_ttl = Config.HISTORY_STORE_REFRESH if market_data.history_store is not None else Config.HISTORY_CACHE_TTL
+    return {
+        # price fields (15 s) are too short-lived to warm; keep fundamentals fresh
+        "info": (Config.QUOTE_CACHE_FUNDAMENTALS_TTL, market_data.refresh_info),
+        "history": (history_ttl, lambda s: market_data.refresh_history(s, Config.PREFETCH_HISTORY_PERIOD)),
+        "statements": (Config.STATEMENT_CACHE_TTL, _refresh_statements),
+        "analysis": (Config.ANALYSIS_CACHE_TTL, _refresh_analysis),
+    }
+
+
+class PrefetchScheduler:
+    """Keep a watchlist's cache entries warm ahead of their expiry.
+
+    Every (symbol, job) pair sits in a heap ordered by the time its entry
+    reaches ``1 - lead`` of its TTL; jobs that come due together run the
+    symbols this worker has served most often first (``accesses`` counts
+    only its own requests). With a ``lock_path`` exactly one gunicorn
+    worker runs the scheduler: the one holding the ``flock`` (another takes
+    over if it exits), and the other workers read the warmed entries
+    through the shared cache backend and history store. Without one every
+    worker runs its own scheduler.
+    """
+
+    def __init__(self, symbols, jobs: dict, lead: float = 0.2, lock_path: str = None, accesses=None):
+        self.symbols = [s.upper() for s in symbols]
+        self.jobs = jobs
+        self.lead = lead
+        self.lock_path = lock_path
+        self.accesses = accesses if accesses is not None else market_data.access_counts
+        self.leader = False
+        self.runs = 0
+        self.failures = 0
+        self.throttled = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock_fd = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _push(self, due: float, symbol: str, kind: str):
+        heapq.heappush(self._heap, (due, next(self._seq), symbol, kind))
+
+    def seed(self, now: float = None):
+        """Schedule every job for every symbol immediately."""
+        now = time.time() if now is None else now
+        self._heap = []
+        for symbol in self.symbols:
+            for kind in self.jobs:
+                self._push(now, symbol, kind)
+
+    def _pop_due(self, now: float) -> list:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        due.sort(key=lambda entry: (-self.accesses[entry[2]], entry[0]))
+        return due
+
+    def run_pending(self, now: float = None) -> int:
+        """Run every job that is due and reschedule it; returns how many ran."""
+        now = time.time() if now is None else now
+        due = self._pop_due(now)
+        for _, _, symbol, kind in due:
+            ttl, refresh = self.jobs[kind]
+            delay = ttl * (1 - self.lead)
+            try:
+                refresh(symbol)
+                self.runs += 1
+            except UpstreamThrottled as e:
+                self.throttled += 1
+                delay = e.retry_after
+            except Exception as e:
+                self.failures += 1
+                delay = min(delay, _FAILURE_RETRY)
+                print(f"[prefetch] {kind} {symbol} failed: {e}", file=sys.stderr)
+            self._push(time.time() + delay, symbol, kind)
+        return len(due)
+
+    def _elect(self) -> bool:
+        if self.lock_path is None:
+            return True
+        directory = os.path.dirname(self.lock_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        # held for the life of the process; released by the kernel on exit
+        self._lock_fd = fd
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.leader:
+                self.leader = self._elect()
+                if not self.leader:
+                    self._stop.wait(_ELECTION_RETRY)
+                    continue
+                self.seed()
+            self.run_pending()
+            wait = self._heap[0][0] - time.time() if self._heap else _ELECTION_RETRY
+            self._stop.wait(min(max(wait, 0.5), _ELECTION_RETRY))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        next_due = self._heap[0][0] - time.time() if self._heap else None
+        return {"leader": self.leader, "symbols": len(self.symbols), "jobs": list(self.jobs),
+                "runs": self.runs, "failures": self.failures, "throttled": self.throttled,
+                "queued": len(self._heap), "next_due_in": next_due}
+
+
+scheduler = None
+
+
+def start():
+    """Start the watchlist scheduler in this worker if PREFETCH_ENABLED (idempotent)."""
+    global scheduler
+    if scheduler is not None or not Config.PREFETCH_ENABLED or not Config.PREFETCH_WATCHLIST:
+        return scheduler
+    available = default_jobs()
+    unknown = [j for j in Config.PREFETCH_JOBS if j not in available]
+    if unknown:
+        raise ValueError(f"Unknown PREFETCH_JOBS {unknown}. Use: {', '.join(available)}")
+    jobs = {name: available[name] for name in Config.PREFETCH_JOBS}
+    lock_path = Config.PREFETCH_LOCK_PATH
+    if Config.CACHE_BACKEND != "sqlite":
+        # a leader would only warm its own in-memory caches; each worker has
+        # to warm itself (the shared rate limiter still bounds the upstream)
+        print("[prefetch] CACHE_BACKEND is not shared between workers; every worker runs its own "
+              "scheduler. Set CACHE_BACKEND=sqlite to warm the watchlist once.", file=sys.stderr)
+        lock_path = None
+    scheduler = PrefetchScheduler(Config.PREFETCH_WATCHLIST, jobs, Config.PREFETCH_LEAD, lock_path).start()
+    return scheduler
@@ -0,0 +1,44 @@
+from app.cache import TTLCache
+from app.config import Config
+
+# Ticker.info is one upstream payload, but its fields go stale at very
+# different rates. Callers say which class of fields they read and the entry
+# is only refetched once that class has outlived its TTL.
+PRICE = "price"
+FUNDAMENTALS = "fundamentals"
+PROFILE = "profile"
+
+
+def _field_ttls() -> dict:
+    return {
+        PRICE: Config.QUOTE_CACHE_PRICE_TTL,
+        FUNDAMENTALS: Config.QUOTE_CACHE_FUNDAMENTALS_TTL,
+        PROFILE: Config.QUOTE_CACHE_PROFILE_TTL,
+    }
+
+
+class QuoteInfoCache:
+    """Ticker.info cache with per-field-class freshness."""
+
+    def __init__(self, cache: TTLCache, ttls: dict):
+        self.cache = cache
+        self.ttls = ttls
+
+    def get_info(self, symbol: str, fetch, fields: str = PRICE) -> dict:
+        """Return info for symbol, calling fetch() when the requested field class is stale."""
+        if fields not in self.ttls:
+            raise ValueError(f"Unknown field class '{fields}'")
+        return self.cache.get_or_fetch(
+            symbol.upper(), lambda: fetch() or None,
+            ttl=max(self.ttls.values()), max_age=self.ttls[fields],
+        ) or {}
+
+    def refresh(self, symbol: str, fetch) -> dict:
+        """Refetch info for symbol ahead of expiry (used by the prefetch scheduler)."""
+        return self.cache.refresh(symbol.upper(), lambda: fetch() or None, ttl=max(self.ttls.values())) or {}
+
+    def invalidate(self, symbol: str):
+        self.cache.delete(symbol.upper())
+
+
+quote_cache = QuoteInfoCache(TTLCache("quote_info", Config.QUOTE_CACHE_PROFILE_TTL), _field_ttls())
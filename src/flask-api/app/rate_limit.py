@@ -0,0 +1,224 @@
+import fcntl
+import os
+import struct
+import threading
+import time
+
+from app.config import Config
+
+# tokens, updated_at, rate (tokens/s), throttled_at
+_STATE = struct.Struct("4d")
+
+
+class UpstreamThrottled(Exception):
+    """Yahoo is rate limiting us (or our own limiter is saturated); retry later."""
+
+    def __init__(self, message: str = "Upstream rate limit reached, retry later", retry_after: float = 30.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for yfinance's YFRateLimitError or any HTTP 429 surfaced as an exception."""
+    try:
+        from yfinance.exceptions import YFRateLimitError
+        if isinstance(error, YFRateLimitError):
+            return True
+    except ImportError:  # pragma: no cover - yfinance < 0.2.50
+        pass
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    return "Too Many Requests" in str(error)
+
+
+class SharedTokenBucket:
+    """Token bucket whose state lives in a small file shared by all workers.
+
+    Every operation is a read-modify-write of one fixed-size record under
+    ``flock``, so gunicorn workers draw from one global budget. The refill
+    rate itself adapts (AIMD): it grows by ``increase`` tokens/s for every
+    second of successful traffic and halves on a throttle signal, between
+    ``min_rate`` and ``max_rate``.
+    """
+
+    def __init__(self, path: str, rate: float, burst: float, min_rate: float, max_rate: float,
+                 increase: float):
+        self.path = path
+        self.initial_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self._fd = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _file(self) -> int:
+        # reopened after fork: flock is per open file, not per descriptor number
+        if self._fd is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _update(self, fn):
+        """Apply fn(tokens, rate, throttled_at, now) -> (tokens, rate, throttled_at, result) atomically."""
+        with self._lock:
+            fd = self._file()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                raw = os.pread(fd, _STATE.size, 0)
+                if len(raw) == _STATE.size:
+                    tokens, updated_at, rate, throttled_at = _STATE.unpack(raw)
+                    tokens = min(self.burst, tokens + max(0.0, now - updated_at) * rate)
+                else:
+                    tokens, rate, throttled_at = self.burst, self.initial_rate, 0.0
+                tokens, rate, throttled_at, result = fn(tokens, rate, throttled_at, now)
+                os.pwrite(fd, _STATE.pack(tokens, now, rate, throttled_at), 0)
+                return result
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def acquire(self, timeout: float) -> bool:
+        """Take one token, sleeping for the refill if needed; False after timeout seconds."""
+        deadline = time.monotonic() + timeout
+
+        def take(tokens, rate, throttled_at, now):
+            if tokens >= 1:
+                return tokens - 1, rate, throttled_at, 0.0
+            return tokens, rate, throttled_at, (1 - tokens) / rate
+
+        while True:
+            wait = self._update(take)
+            if wait == 0.0:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(wait, remaining))
+
+    def on_success(self):
+        def grow(tokens, rate, throttled_at, now):
+            # +increase/rate per call at `rate` calls/s is +increase per second
+            return tokens, min(self.max_rate, rate + self.increase / rate), throttled_at, None
+
+        self._update(grow)
+
+    def on_throttle(self):
+        def shrink(tokens, rate, throttled_at, now):
+            return 0.0, max(self.min_rate, rate / 2), now, None
+
+        self._update(shrink)
+
+    def state(self) -> dict:
+        def read(tokens, rate, throttled_at, now):
+            return tokens, rate, throttled_at, {"tokens": tokens, "rate": rate, "throttled_at": throttled_at or None}
+
+        return self._update(read)
+
+
+class AdaptiveConcurrency:
+    """Per-process cap on in-flight upstream calls, adjusted AIMD-style.
+
+    Each successful call raises the limit by 1/limit (about +1 per window of
+    ``limit`` calls); a throttled call halves it.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        with self._cond:
+            ok = self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout=timeout)
+            if ok:
+                self.in_flight += 1
+            return ok
+
+    def release(self, throttled: bool):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(float(self.minimum), self.limit / 2)
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class UpstreamLimiter:
+    """Gate for every yfinance call: shared token bucket plus adaptive concurrency.
+
+    Rate-limit errors from Yahoo are converted to UpstreamThrottled so
+    callers can answer 503 instead of reporting a bad symbol.
+    """
+
+    def __init__(self, bucket: SharedTokenBucket, concurrency: AdaptiveConcurrency, wait: float,
+                 cooldown: float, enabled: bool = True):
+        self.bucket = bucket
+        self.concurrency = concurrency
+        self.wait = wait
+        self.cooldown = cooldown
+        self.enabled = enabled
+        self.calls = 0
+        self.throttled = 0
+        self.rejected = 0
+
+    def call(self, fn):
+        if not self.enabled:
+            return fn()
+        if not self.concurrency.acquire(self.wait):
+            self.rejected += 1
+            raise UpstreamThrottled("Too many concurrent upstream requests, retry later", self.cooldown)
+        throttled = False
+        try:
+            if not self.bucket.acquire(self.wait):
+                self.rejected += 1
+                raise UpstreamThrottled("Upstream request budget exhausted, retry later", self.cooldown)
+            self.calls += 1
+            try:
+                result = fn()
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    throttled = True
+                    self.throttled += 1
+                    self.bucket.on_throttle()
+                    raise UpstreamThrottled(retry_after=self.cooldown) from e
+                raise
+            self.bucket.on_success()
+            return result
+        finally:
+            self.concurrency.release(throttled)
+
+    def recently_throttled(self) -> bool:
+        """True while any worker saw a throttle signal within the cooldown window."""
+        if not self.enabled:
+            return False
+        throttled_at = self.bucket.state()["throttled_at"]
+        return throttled_at is not None and time.time() - throttled_at < self.cooldown
+
+    def stats(self) -> dict:
+        stats = {"enabled": self.enabled, "calls": self.calls, "throttled": self.throttled,
+                 "rejected": self.rejected, "concurrency_limit": int(self.concurrency.limit),
+                 "in_flight": self.concurrency.in_flight}
+        if self.enabled:
+            stats.update(self.bucket.state())
+        return stats
+
+
+# shared by every yfinance access point in the process
+upstream = UpstreamLimiter(
+    SharedTokenBucket(Config.RATE_LIMIT_PATH, Config.RATE_LIMIT_RATE, Config.RATE_LIMIT_BURST,
+                      Config.RATE_LIMIT_MIN_RATE, Config.RATE_LIMIT_MAX_RATE, Config.RATE_LIMIT_INCREASE),
+    AdaptiveConcurrency(Config.RATE_LIMIT_CONCURRENCY, Config.RATE_LIMIT_MIN_CONCURRENCY,
+                        Config.RATE_LIMIT_MAX_CONCURRENCY),
+    wait=Config.RATE_LIMIT_WAIT,
+    cooldown=Config.RATE_LIMIT_COOLDOWN,
+    enabled=Config.RATE_LIMIT_ENABLED,
+)
@@ -0,0 +1,148 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from statistics import NormalDist
+
+import numpy as np
+
+# Portfolio risk over a (date x asset) matrix of simple daily returns and a
+# weight vector. Every measure is a matrix operation over the whole
+# universe; Monte Carlo paths are drawn in fixed-size batches that can be
+# spread over a process pool.
+
+TRADING_DAYS = 252
+MC_MODELS = ("normal", "bootstrap")
+_STD_NORMAL = NormalDist()
+
+
+def tail_measures(pnl: np.ndarray, confidence) -> tuple:
+    """Historical (empirical) VaR and CVaR of returns, as positive loss fractions per confidence level."""
+    losses = -np.asarray(pnl, dtype=float)
+    levels = np.asarray(confidence, dtype=float)
+    var = np.quantile(losses, levels)
+    tail = losses[None, :] >= var[:, None]
+    cvar = (losses[None, :] * tail).sum(axis=1) / tail.sum(axis=1)
+    return var, cvar
+
+
+def horizon_returns(returns: np.ndarray, horizon: int) -> np.ndarray:
+    """Overlapping compounded ``horizon``-day returns of each column (all at once via log cumsums)."""
+    if horizon == 1:
+        return returns
+    growth = np.vstack([np.zeros((1,) + returns.shape[1:]), np.cumsum(np.log1p(returns), axis=0)])
+    return np.expm1(growth[horizon:] - growth[:-horizon])
+
+
+def parametric_measures(mean: float, vol: float, confidence, horizon: int) -> tuple:
+    """Gaussian VaR and CVaR for a return with daily ``mean``/``vol``, scaled to ``horizon`` days."""
+    mu, sigma = mean * horizon, vol * np.sqrt(horizon)
+    z = np.array([_STD_NORMAL.inv_cdf(1 - c) for c in confidence])
+    pdf = np.array([_STD_NORMAL.pdf(v) for v in z])
+    var = -(mu + z * sigma)
+    cvar = -mu + sigma * pdf / (1 - np.asarray(confidence, dtype=float))
+    return var, cvar
+
+
+def vol_contributions(cov: np.ndarray, weights: np.ndarray) -> dict:
+    """Portfolio volatility and its Euler decomposition: marginal, component and share per asset."""
+    sigma_w = cov @ weights
+    vol = float(np.sqrt(weights @ sigma_w))
+    marginal = sigma_w / vol if vol > 0 else np.full_like(weights, np.nan)
+    component = weights * marginal
+    return {"vol": vol, "marginal": marginal, "component": component,
+            "share": component / vol if vol > 0 else np.full_like(weights, np.nan)}
+
+
+def betas(returns: np.ndarray, benchmark: np.ndarray) -> np.ndarray:
+    """OLS beta of every column of ``returns`` to the benchmark return series."""
+    b = benchmark - benchmark.mean()
+    centered = returns - returns.mean(axis=0)
+    return (centered.T @ b) / (b @ b)
+
+
+def covariance_factor(returns: np.ndarray) -> np.ndarray:
+    """F with F Fᵀ equal to the sample covariance, using the narrower of the two exact forms.
+
+    With fewer bars than assets the centered returns themselves (assets x
+    bars) are the factor: no decomposition, and fewer normal draws per day.
+    Otherwise a Cholesky factor (eigen-decomposition if only semidefinite).
+    """
+    centered = (returns - returns.mean(axis=0)) / np.sqrt(len(returns) - 1)
+    if len(returns) <= returns.shape[1]:
+        return centered.T
+    cov = centered.T @ centered
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(np.clip(values, 0, None))
+
+
+def simulate_batch(seed, paths: int, horizon: int, weights: np.ndarray, model: str, mean: np.ndarray = None,
+                   factor: np.ndarray = None, history: np.ndarray = None) -> np.ndarray:
+    """Buy-and-hold portfolio returns over ``horizon`` days for ``paths`` simulated paths.
+
+    "normal" draws daily returns from N(mean, factor factorᵀ); "bootstrap"
+    resamples whole historical days (keeping their cross-section). Module
+    level so it can run in a pool process.
+    """
+    rng = np.random.default_rng(seed)
+    if model == "normal":
+        draws = rng.standard_normal((paths, horizon, factor.shape[1])) @ factor.T + mean
+    else:
+        draws = history[rng.integers(0, len(history), size=(paths, horizon))]
+    growth = np.prod(1 + draws, axis=1)
+    return (growth - 1) @ weights
+
+
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    # one pool per worker process, shared by its request threads
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: forking a threaded gunicorn worker can copy held locks
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn"))
+            _pool_size = processes
+        return _pool
+
+
+def _reset_after_fork():
+    global _pool, _pool_size, _pool_lock
+    _pool, _pool_size, _pool_lock = None, 0, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def monte_carlo(returns: np.ndarray, weights: np.ndarray, horizon: int, simulations: int, model: str = "normal",
+                seed: int = None, batch_elements: int = 4_000_000, processes: int = 0) -> np.ndarray:
+    """Simulated horizon returns of the portfolio, drawn in batches of at most ``batch_elements`` numbers.
+
+    Each batch gets its own child seed of ``seed``, so results are the same
+    whether the batches run in this process or on ``processes`` pool workers.
+    """
+    if model not in MC_MODELS:
+        raise ValueError(f"Unknown Monte Carlo model '{model}'. Use: {', '.join(MC_MODELS)}")
+    per_batch = max(1, batch_elements // (horizon * returns.shape[1]))
+    sizes = [min(per_batch, simulations - start) for start in range(0, simulations, per_batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if model == "normal":
+        kwargs = {"mean": returns.mean(axis=0), "factor": covariance_factor(returns)}
+    else:
+        kwargs = {"history": returns}
+
+    if processes > 1 and len(sizes) > 1:
+        pool = _get_pool(processes)
+        futures = [pool.submit(simulate_batch, s, n, horizon, weights, model, **kwargs) for s, n in zip(seeds, sizes)]
+        batches = [f.result() for f in futures]
+    else:
+        batches = [simulate_batch(s, n, horizon, weights, model, **kwargs) for s, n in zip(seeds, sizes)]
+    return np.concatenate(batches)
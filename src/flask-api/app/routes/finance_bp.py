@@ -1,12 +1,24 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_smorest import Blueprint as SmorestBlueprint
 import os
 import sys
 import datetime
+import math
 import jwt
+import numpy as np
+import pandas as pd
 import requests
-import yfinance as yf
-from analysis_and_holdings import get_full_analysis_and_holdings_text
+from analysis_and_holdings import (get_full_analysis_and_holdings, get_full_analysis_and_holdings_text,
+                                   stream_full_analysis_and_holdings)
+from app import formats, http_pool, indicators as indicator_kernels, market_data, options as option_analytics, risk
+from app.correlation import RETURN_KINDS, RollingMoments, aligned_returns, betas, history_period
+from app.credit import latest_items, period_items, ratios as credit_ratios, screen as screen_table, signals, trend
+from app.cache import TTLCache, bounded_backend
+from app.config import Config
+from app.fanout import fan_out
+from app.quote_cache import PRICE, FUNDAMENTALS, PROFILE
+from app.rate_limit import UpstreamThrottled
+from app.statement_store import FREQUENCIES as STATEMENT_FREQUENCIES
 
 # create a smorest blueprint so that swagger UI pick up descriptions
 finance_bp = SmorestBlueprint(
@@ -59,15 +71,84 @@ def _color_change(v):
         return str(v)
 
 
-def _get_ticker(symbol: str):
-    t = yf.Ticker(symbol)
-    info = t.info
+def _error_response(e: Exception):
+    """Route error reply: 503 with Retry-After when Yahoo is throttling us, else 400."""
+    if isinstance(e, UpstreamThrottled):
+        resp = jsonify({"error": str(e), "retry_after": e.retry_after})
+        resp.headers["Retry-After"] = str(int(math.ceil(e.retry_after)))
+        return resp, 503
+    return jsonify({"error": str(e)}), 400
+
+
+def _get_ticker(symbol: str, fields: str = PRICE):
+    t = market_data.get_ticker(symbol)
+    info = market_data.get_info(symbol, fields, ticker=t)
     if not info or (info.get("regularMarketPrice") is None and info.get("previousClose") is None):
         if info.get("symbol") is None:
             raise ValueError(f"Ticker '{symbol}' not found")
     return t, info
 
 
+def _price_change(symbol: str) -> tuple:
+    """Return (price, changePct) from the cached quote info for symbol."""
+    info = market_data.get_info(symbol)
+    price = info.get("regularMarketPrice", info.get("previousClose"))
+    prev = info.get("regularMarketPreviousClose", info.get("previousClose"))
+    change_pct = None
+    if price and prev:
+        change_pct = ((float(price) - float(prev)) / float(prev)) * 100
+    return price, change_pct
+
+
+def _json_value(v):
+    """Map NaN/inf and NumPy scalars onto JSON-safe Python values."""
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float) and not np.isfinite(v):
+        return None
+    return v
+
+
+def _binary_response(frame, mimetype: str):
+    return Response(formats.encode(frame, mimetype), mimetype=mimetype)
+
+
+# keep proxies (nginx) from buffering a streamed body
+_STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _stream_response(records, mimetype: str):
+    """Stream (event, data) pairs as SSE events or NDJSON lines."""
+    return Response((formats.stream_record(mimetype, event, data) for event, data in records),
+                    mimetype=mimetype, headers=_STREAM_HEADERS)
+
+
+def _batch_symbols(data) -> list[str]:
+    """Parse and validate the symbol list of a /batch request body."""
+    symbols = (data or {}).get("symbols")
+    if isinstance(symbols, str):
+        symbols = symbols.split(",")
+    if not isinstance(symbols, list) or not symbols:
+        raise ValueError("Provide a 'symbols' list")
+    symbols = list(dict.fromkeys(str(s).strip().upper() for s in symbols if str(s).strip()))
+    if len(symbols) > Config.BATCH_MAX_SYMBOLS:
+        raise ValueError(f"At most {Config.BATCH_MAX_SYMBOLS} symbols per request")
+    return symbols
+
+
+def _json_flag(data: dict, key: str, default: bool) -> bool:
+    """A boolean field of a JSON request body; only true/false are accepted.
+
+    With a None default the field is optional: absent or null returns None.
+    """
+    value = data.get(key, default)
+    if value is None and default is None:
+        return None
+    if not isinstance(value, bool):
+        raise ValueError(f"'{key}' must be true or false")
+    return value
+
+
 # authentication decorator --------------------------------------------------
 
 def token_required(f):
@@ -151,17 +232,94 @@ def cmd_quote(symbol: str) -> dict:
     return {k: v for k, v in fields}
 
 
+_batch_price_cache = TTLCache("batch_price", Config.QUOTE_CACHE_PRICE_TTL)
+
+BATCH_PRICE_COLUMNS = ["price", "previousClose", "change", "changePct", "volume"]
+
+BATCH_QUOTE_FIELDS = [
+    ("name", "shortName"),
+    ("price", "regularMarketPrice"),
+    ("previousClose", "previousClose"),
+    ("open", "regularMarketOpen"),
+    ("dayLow", "regularMarketDayLow"),
+    ("dayHigh", "regularMarketDayHigh"),
+    ("fiftyTwoWeekLow", "fiftyTwoWeekLow"),
+    ("fiftyTwoWeekHigh", "fiftyTwoWeekHigh"),
+    ("volume", "regularMarketVolume"),
+    ("averageVolume", "averageVolume"),
+    ("marketCap", "marketCap"),
+    ("trailingPE", "trailingPE"),
+    ("forwardPE", "forwardPE"),
+    ("trailingEps", "trailingEps"),
+    ("dividendYield", "dividendYield"),
+    ("beta", "beta"),
+    ("sector", "sector"),
+    ("industry", "industry"),
+    ("currency", "currency"),
+]
+
+
+def cmd_batch_price(symbols: list[str]) -> dict:
+    """Price many symbols from bulk daily downloads, returned column-wise."""
+    rows = {s: _batch_price_cache.get(s) for s in symbols}
+    missing = [s for s, row in rows.items() if row is None]
+
+    if missing:
+        frames = market_data.download_daily(missing)
+        close = frames["Close"].to_numpy(dtype=float)
+        volume = frames["Volume"].reindex(frames["Close"].index).to_numpy(dtype=float)
+        if close.shape[0] == 0:
+            close = volume = np.full((1, len(missing)), np.nan)
+
+        # last and previous valid bar per column, without a per-symbol loop
+        valid = ~np.isnan(close)
+        idx = np.arange(close.shape[0])[:, None]
+        last = np.where(valid, idx, -1).max(axis=0)
+        prev = np.where(valid & (idx < last), idx, -1).max(axis=0)
+        cols = np.arange(close.shape[1])
+        last_px = np.where(last >= 0, close[last.clip(0), cols], np.nan)
+        prev_px = np.where(prev >= 0, close[prev.clip(0), cols], np.nan)
+        last_vol = np.where(last >= 0, volume[last.clip(0), cols], np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = last_px - prev_px
+            change_pct = change / prev_px * 100
+
+        for i, s in enumerate(missing):
+            if np.isnan(last_px[i]):
+                continue
+            row = {
+                "price": round(float(last_px[i]), 4),
+                "previousClose": _json_value(round(float(prev_px[i]), 4)),
+                "change": _json_value(round(float(change[i]), 4)),
+                "changePct": _json_value(round(float(change_pct[i]), 4)),
+                "volume": None if np.isnan(last_vol[i]) else int(last_vol[i]),
+            }
+            rows[s] = row
+            _batch_price_cache.set(s, row)
+
+    out = {"symbol": [s for s in symbols if rows[s] is not None]}
+    for col in BATCH_PRICE_COLUMNS:
+        out[col] = [rows[s][col] for s in out["symbol"]]
+    out["errors"] = {s: "No price data" for s in symbols if rows[s] is None}
+    return out
+
+
+def cmd_batch_quote(symbols: list[str]) -> dict:
+    """Quote fields for many symbols from the shared info cache, returned column-wise."""
+    infos, errors = fan_out(market_data.get_info, symbols)
+    found = [s for s in symbols if infos.get(s)]
+    out = {"symbol": found}
+    for label, key in BATCH_QUOTE_FIELDS:
+        out[label] = [_json_value(infos[s].get(key)) for s in found]
+    out["errors"] = {s: str(errors[s]) if s in errors else "Ticker not found" for s in symbols if s not in found}
+    return out
+
+
 def cmd_compare(symbols: list[str]) -> dict:
     if len(symbols) < 2:
         raise ValueError("Provide at least 2 tickers")
 
-    data = {}
-    for s in symbols:
-        try:
-            t, info = _get_ticker(s)
-            data[s] = info
-        except ValueError:
-            data[s] = {}
+    data, errors = fan_out(lambda s: _get_ticker(s)[1], symbols)
 
     metrics = [
         ("Price", "regularMarketPrice"),
@@ -180,99 +338,283 @@ def cmd_compare(symbols: list[str]) -> dict:
     for s in symbols:
         info = data.get(s, {})
         out[s] = {label: _safe_get(info, key) if key else "N/A" for label, key in metrics}
+        if s in errors:
+            out[s]["error"] = str(errors[s])
 
     return out
 
 
-def cmd_credit(symbol: str) -> dict:
-    symbol = symbol.upper()
-    t, info = _get_ticker(symbol)
+def _credit_metrics(statements: dict, frequency: str = "annual") -> dict:
+    """Credit metrics from the latest balance sheet / income statement period."""
+    row = credit_ratios(latest_items({"_": statements}), frequency).iloc[0]
+    return {k: _json_value(v) for k, v in row.items()}
 
-    bs = t.balance_sheet
-    fin = t.financials
-    cf = t.cashflow
 
-    result = {"symbol": symbol, "name": _safe_get(info, "shortName", symbol)}
+def _credit_history(statements: dict, frequency: str) -> dict:
+    """Credit metrics for every reported period (newest first) plus trend statistics."""
+    table = credit_ratios(period_items(statements), frequency)
+    stats = trend(table)
+    return {
+        "periods": [str(p.date()) for p in table.index],
+        "metrics": {col: [_json_value(v) for v in table[col].to_numpy()] for col in table.columns},
+        "trend": {metric: {k: _json_value(v) for k, v in row.items()} for metric, row in stats.iterrows()},
+        "signals": signals(stats),
+    }
 
-    # Extract latest period data
-    def _latest(df, row_names):
-        if df is None or df.empty:
-            return None
-        for name in row_names:
-            if name in df.index:
-                val = df.iloc[:, 0].get(name)  # latest column
-                if val is not None:
-                    try:
-                        return float(val)
-                    except (ValueError, TypeError):
-                        pass
-        return None
 
-    total_debt = _latest(bs, ["Total Debt", "Long Term Debt And Capital Lease Obligation", "Long Term Debt", "Total Non Current Liabilities Net Minority Interest"])
-    short_debt = _latest(bs, ["Current Debt", "Current Debt And Capital Lease Obligation", "Current Portion Of Long Term Debt"])
-    long_debt = _latest(bs, ["Long Term Debt", "Long Term Debt And Capital Lease Obligation"])
-    total_assets = _latest(bs, ["Total Assets"])
-    total_equity = _latest(bs, ["Total Equity Gross Minority Interest", "Stockholders Equity", "Common Stock Equity"])
-    cash = _latest(bs, ["Cash And Cash Equivalents", "Cash Cash Equivalents And Short Term Investments", "Cash Financial"])
-
-    ebitda = _latest(fin, ["EBITDA", "Normalized EBITDA"])
-    ebit = _latest(fin, ["EBIT", "Operating Income"])
-    interest_expense = _latest(fin, ["Interest Expense", "Interest Expense Non Operating", "Net Interest Income"])
-    revenue = _latest(fin, ["Total Revenue"])
-    net_income = _latest(fin, ["Net Income", "Net Income Common Stockholders"])
-
-    # Compute ratios
-    def _ratio(num, den):
-        if num is not None and den is not None and den != 0:
-            return num / den
-        return None
+# rolling-window moments per (universe, window, return kind), advanced bar by
+# bar as the histories grow instead of being recomputed
+_correlation_state = TTLCache(
+    "correlation", Config.CORRELATION_STATE_TTL,
+    backend=bounded_backend("correlation", Config.CORRELATION_STATE_MAX_ENTRIES, Config.CORRELATION_STATE_MAX_BYTES),
+)
+
+
+def _matrix_json(matrix: np.ndarray, decimals: int = 6) -> list:
+    values = np.round(matrix, decimals)
+    cells = values.astype(object)
+    cells[~np.isfinite(values)] = None
+    return cells.tolist()
+
+
+def cmd_correlation(symbols: list[str], window: int = None, benchmark: str = None, kind: str = "log") -> dict:
+    """Correlation, covariance and beta matrices of daily returns over the last ``window`` aligned bars."""
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    window = window or Config.CORRELATION_WINDOW
+    benchmark = (Config.CORRELATION_BENCHMARK if benchmark is None else benchmark).upper()
+    if len(symbols) < 2 and not (symbols and benchmark):
+        raise ValueError("Provide at least 2 symbols (or 1 symbol and a benchmark)")
+    if len(symbols) > Config.CORRELATION_MAX_SYMBOLS:
+        raise ValueError(f"At most {Config.CORRELATION_MAX_SYMBOLS} symbols per request")
+    if window < 2:
+        raise ValueError("window must be >= 2")
+    if kind not in RETURN_KINDS:
+        raise ValueError(f"Unknown return kind '{kind}'. Use: {', '.join(RETURN_KINDS)}")
+    universe = symbols + ([benchmark] if benchmark and benchmark not in symbols else [])
+
+    period = history_period(window)
+    histories, errors = fan_out(lambda s: _load_history(s, period), universe)
+    if benchmark in errors:
+        # reported under "errors"; the matrices are still useful without beta
+        benchmark = ""
+    universe = [s for s in universe if s in histories]
+    if len(universe) < 2:
+        raise next(iter(errors.values())) if errors else ValueError("Not enough symbols with history")
+
+    returns = aligned_returns({s: histories[s]["Close"] for s in universe}, kind)
+    if len(returns) < 2:
+        raise ValueError("Not enough overlapping history between the symbols")
+    window = min(window, len(returns))
+    key = f"{','.join(universe)}:{window}:{kind}"
+    moments = _correlation_state.get(key)
+    if moments is None:
+        moments, applied = RollingMoments.from_returns(returns, window), -1
+    else:
+        moments, applied = moments.advanced(returns)
+    _correlation_state.set(key, moments)
+
+    cov = moments.covariance()
+    out = {
+        "symbols": universe, "benchmark": benchmark or None, "returns": kind, "window": window,
+        "start": str(moments.dates[0].date()), "end": str(moments.dates[-1].date()),
+        "correlation": _matrix_json(moments.correlation()),
+        "covariance": _matrix_json(cov, 8),
+        # betaMatrix[i][j]: beta of symbols[i] against symbols[j]
+        "betaMatrix": _matrix_json(betas(cov)),
+        # bars folded into the cached window (-1 = computed from scratch)
+        "incremental": applied,
+    }
+    if benchmark:
+        column = betas(cov)[:, universe.index(benchmark)]
+        out["beta"] = {s: _json_value(round(float(b), 6)) for s, b in zip(universe, column)}
+    out["errors"] = {s: str(e) for s, e in errors.items()}
+    return out
+
+
+def _risk_levels(values) -> dict:
+    return {f"{c:g}": _json_value(round(float(v), 6)) for c, v in values}
+
 
-    net_debt = None
-    if total_debt is not None and cash is not None:
-        net_debt = total_debt - cash
-
-    ratios = {
-        "Total Debt": total_debt,
-        "Short-term Debt": short_debt,
-        "Long-term Debt": long_debt,
-        "Cash & Equivalents": cash,
-        "Net Debt": net_debt,
-        "Total Assets": total_assets,
-        "Total Equity": total_equity,
-        "EBITDA": ebitda,
-        "EBIT": ebit,
-        "Interest Expense": interest_expense,
-        "Revenue": revenue,
-        "Net Income": net_income,
-        "Debt/Equity": _ratio(total_debt, total_equity),
-        "Debt/Assets": _ratio(total_debt, total_assets),
-        "Debt/EBITDA": _ratio(total_debt, ebitda),
-        "Net Debt/EBITDA": _ratio(net_debt, ebitda),
-        "Interest Coverage (EBITDA)": _ratio(ebitda, abs(interest_expense) if interest_expense else None),
-        "Interest Coverage (EBIT)": _ratio(ebit, abs(interest_expense) if interest_expense else None),
+def cmd_portfolio_risk(data: dict) -> dict:
+    """VaR/CVaR (historical, parametric, Monte Carlo), volatility attribution and beta of a weighted portfolio.
+
+    The aligned (date x symbol) return matrix is built once from the
+    history store and every measure is a matrix operation over it (see
+    app.risk). VaR and CVaR are positive loss fractions of portfolio value
+    over ``horizon`` trading days.
+    """
+    weights = (data or {}).get("weights")
+    if not isinstance(weights, dict) or not weights:
+        raise ValueError('Provide "weights" as {"SYMBOL": weight, ...}')
+    try:
+        weights = {str(s).strip().upper(): float(w) for s, w in weights.items()}
+    except (TypeError, ValueError):
+        raise ValueError("Weights must be numbers") from None
+    if len(weights) > Config.RISK_MAX_SYMBOLS:
+        raise ValueError(f"At most {Config.RISK_MAX_SYMBOLS} symbols per request")
+    window = int(data.get("window", Config.RISK_WINDOW))
+    horizon = int(data.get("horizon", 1))
+    confidence = data.get("confidence", [0.95, 0.99])
+    try:
+        confidence = [float(c) for c in (confidence if isinstance(confidence, list) else [confidence])]
+    except (TypeError, ValueError):
+        raise ValueError("confidence must be a number or a list of numbers") from None
+    simulations = int(data.get("simulations", Config.RISK_MC_SIMULATIONS))
+    model = data.get("model", "normal")
+    benchmark = str(data.get("benchmark", Config.CORRELATION_BENCHMARK) or "").upper()
+    # None: decided by the number of held symbols below
+    parallel = _json_flag(data, "parallel", None)
+    if window < 20:
+        raise ValueError("window must be >= 20")
+    if not 1 <= horizon <= Config.RISK_MAX_HORIZON:
+        raise ValueError(f"horizon must be between 1 and {Config.RISK_MAX_HORIZON}")
+    if not confidence or not all(0 < c < 1 for c in confidence):
+        raise ValueError("confidence levels must be in (0, 1)")
+    if not 0 <= simulations <= Config.RISK_MC_MAX_SIMULATIONS:
+        raise ValueError(f"simulations must be between 0 and {Config.RISK_MC_MAX_SIMULATIONS}")
+    if model not in risk.MC_MODELS:
+        raise ValueError(f"Unknown Monte Carlo model '{model}'. Use: {', '.join(risk.MC_MODELS)}")
+
+    universe = list(weights) + ([benchmark] if benchmark and benchmark not in weights else [])
+    histories, errors = fan_out(lambda s: _load_history(s, history_period(window)), universe)
+    if not histories and errors and all(isinstance(e, UpstreamThrottled) for e in errors.values()):
+        raise next(iter(errors.values()))
+    held = [s for s in weights if s in histories]
+    if not held:
+        raise ValueError("No history for any portfolio symbol")
+    if benchmark not in histories:
+        benchmark = ""
+    returns = aligned_returns({s: histories[s]["Close"] for s in held + ([benchmark] if benchmark and
+                                                                       benchmark not in held else [])}, "simple")
+    returns = returns.iloc[-window:]
+    if len(returns) <= max(horizon, 10):
+        raise ValueError(f"Only {len(returns)} overlapping daily returns; need more than {max(horizon, 10)}")
+
+    x = returns[held].to_numpy()
+    w = np.array([weights[s] for s in held])
+    horizon_pnl = risk.horizon_returns(x, horizon) @ w
+    daily = x @ w
+    cov = np.cov(x, rowvar=False).reshape(len(held), len(held))
+    attribution = risk.vol_contributions(cov, w)
+
+    var, cvar = {}, {}
+    var["historical"], cvar["historical"] = risk.tail_measures(horizon_pnl, confidence)
+    var["parametric"], cvar["parametric"] = risk.parametric_measures(float(daily.mean()), attribution["vol"],
+                                                                      confidence, horizon)
+    if parallel is None:
+        parallel = len(held) >= Config.RISK_MC_PROCESS_MIN_SYMBOLS
+    processes = Config.RISK_MC_PROCESSES if parallel else 0
+    if simulations:
+        simulated = risk.monte_carlo(x, w, horizon, simulations, model, data.get("seed"),
+                                     Config.RISK_MC_BATCH_ELEMENTS, processes)
+        var["monteCarlo"], cvar["monteCarlo"] = risk.tail_measures(simulated, confidence)
+
+    annualize = np.sqrt(risk.TRADING_DAYS)
+    out = {
+        "symbols": held, "window": len(returns), "start": str(returns.index[0].date()),
+        "end": str(returns.index[-1].date()), "horizon": horizon,
+        "gross": round(float(np.abs(w).sum()), 6), "net": round(float(w.sum()), 6),
+        "volatility": {"daily": _json_value(round(attribution["vol"], 6)),
+                       "annualized": _json_value(round(attribution["vol"] * annualize, 6))},
+        "var": {method: _risk_levels(zip(confidence, values)) for method, values in var.items()},
+        "cvar": {method: _risk_levels(zip(confidence, values)) for method, values in cvar.items()},
+        "positions": {
+            "symbol": held,
+            "weight": w.tolist(),
+            "marginalVol": [_json_value(v) for v in np.round(attribution["marginal"] * annualize, 6)],
+            "componentVol": [_json_value(v) for v in np.round(attribution["component"] * annualize, 6)],
+            "volShare": [_json_value(v) for v in np.round(attribution["share"], 6)],
+        },
     }
-    result["metrics"] = {k: v for k, v in ratios.items()}
+    if "value" in data:
+        value = float(data["value"])
+        out["varAmount"] = {m: {k: None if v is None else round(v * value, 2) for k, v in levels.items()}
+                            for m, levels in out["var"].items()}
+    if benchmark:
+        asset_betas = risk.betas(x, returns[benchmark].to_numpy())
+        out["benchmark"] = benchmark
+        out["beta"] = _json_value(round(float(w @ asset_betas), 6))
+        out["positions"]["beta"] = [_json_value(v) for v in np.round(asset_betas, 6)]
+    if simulations:
+        out["monteCarlo"] = {"model": model, "simulations": simulations, "processes": processes}
+    out["errors"] = {s: str(e) for s, e in errors.items()}
+    return out
 
+
+def cmd_credit(symbol: str, frequency: str = "annual", history: bool = True) -> dict:
+    symbol = symbol.upper()
+    t, info = _get_ticker(symbol, PROFILE)
+
+    store = market_data.statement_store
+    result = {"symbol": symbol, "name": _safe_get(info, "shortName", symbol)}
+    # statements only change at reporting dates, so the metrics are cached with them
+    result["metrics"] = store.derived(symbol, "credit_metrics", lambda st: _credit_metrics(st, frequency), frequency)
+    if history:
+        result["history"] = {
+            f: store.derived(symbol, "credit_history", lambda st, f=f: _credit_history(st, f), f)
+            for f in STATEMENT_FREQUENCIES
+        }
     return result
 
 
+def _screen_options(data: dict) -> tuple:
+    """Validate the filters, sort and limit of a /credit/screen body before any fetch."""
+    filters = data.get("filters")
+    if filters is not None:
+        if not isinstance(filters, dict):
+            raise ValueError("'filters' must be an object mapping metrics to {\"min\": x, \"max\": y}")
+        for metric, bounds in filters.items():
+            if not isinstance(bounds, dict) or not set(bounds) <= {"min", "max"}:
+                raise ValueError(f"Filter for '{metric}' must be an object with 'min' and/or 'max'")
+            for bound, value in bounds.items():
+                if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                    raise ValueError(f"Filter '{bound}' for '{metric}' must be a number")
+    sort = data.get("sort")
+    if sort is not None and not isinstance(sort, str):
+        raise ValueError("'sort' must be a metric name")
+    limit = data.get("limit")
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 0):
+        raise ValueError("'limit' must be a non-negative integer")
+    return filters, sort, limit
+
+
+def cmd_credit_screen(data: dict) -> dict:
+    """Credit metrics for a universe of symbols, filtered and ranked server-side, returned column-wise.
+
+    Statements come from the shared statement store; the line items of all
+    symbols are aligned into one matrix and every ratio is computed
+    column-wise (see app.credit).
+    """
+    symbols = _batch_symbols(data)
+    frequency = data.get("frequency", "annual")
+    if frequency not in STATEMENT_FREQUENCIES:
+        raise ValueError(f"Unknown frequency '{frequency}'. Use: {', '.join(STATEMENT_FREQUENCIES)}")
+    ascending = _json_flag(data, "ascending", True)
+    filters, sort, limit = _screen_options(data)
+    statements, errors = fan_out(lambda s: market_data.get_statements(s, frequency), symbols)
+    # annualized like /credit/<symbol>, so quarterly ratios match it
+    table = credit_ratios(latest_items(statements), frequency)
+    ranked = screen_table(table, filters, sort, ascending, limit)
+
+    out = {"symbol": ranked.index.tolist()}
+    for col in ranked.columns:
+        out[col] = [_json_value(v) for v in ranked[col].to_numpy()]
+    out["screened"] = len(table)
+    out["matched"] = len(ranked)
+    out["errors"] = {s: str(e) for s, e in errors.items()}
+    return out
+
+
 def cmd_macro(tickers: list[str]) -> dict:
     if not tickers:
         raise ValueError("Provide tickers")
 
+    results, errors = fan_out(_price_change, tickers)
     data = {}
-    for symbol in tickers:
-        try:
-            t = yf.Ticker(symbol)
-            info = t.info
-            price = info.get("regularMarketPrice", info.get("previousClose"))
-            prev = info.get("regularMarketPreviousClose", info.get("previousClose"))
-            change_pct = None
-            if price and prev:
-                change_pct = ((float(price) - float(prev)) / float(prev)) * 100
-            data[symbol] = {"price": price, "changePct": change_pct}
-        except Exception as e:
-            data[symbol] = {"price": None, "changePct": None, "error": str(e)}
+    for symbol, (price, change_pct) in results.items():
+        data[symbol] = {"price": price, "changePct": change_pct}
+    for symbol, e in errors.items():
+        data[symbol] = {"price": None, "changePct": None, "error": str(e)}
 
     out = {}
     for sym in tickers:
@@ -291,26 +633,21 @@ def cmd_fx(base: str = "USD") -> dict:
         f"{base}/PEN": f"{base}PEN=X",
     }
 
+    results, errors = fan_out(_price_change, pairs.values())
     data = {}
     for name, sym in pairs.items():
-        try:
-            t = yf.Ticker(sym)
-            info = t.info
-            price = info.get("regularMarketPrice", info.get("previousClose"))
-            prev = info.get("regularMarketPreviousClose", info.get("previousClose"))
-            change_pct = None
-            if price and prev:
-                change_pct = ((float(price) - float(prev)) / float(prev)) * 100
+        if sym in results:
+            price, change_pct = results[sym]
             data[name] = {"symbol": sym, "rate": price, "changePct": change_pct}
-        except Exception as e:
-            data[name] = {"symbol": sym, "rate": None, "changePct": None, "error": str(e)}
+        else:
+            data[name] = {"symbol": sym, "rate": None, "changePct": None, "error": str(errors[sym])}
 
     return data
 
 
 def cmd_flows(symbol: str) -> dict:
     symbol = symbol.upper()
-    t, info = _get_ticker(symbol)
+    t, info = _get_ticker(symbol, FUNDAMENTALS)
 
     fund_data = {
         "Name": _safe_get(info, "shortName"),
@@ -344,65 +681,232 @@ def cmd_flows(symbol: str) -> dict:
     return {"fund": fund_data, "holdings": holdings}
 
 
-def cmd_history(symbol: str, period: str = "1mo") -> dict:
-    symbol = symbol.upper()
+HISTORY_COLUMNS = [("open", "Open"), ("high", "High"), ("low", "Low"), ("close", "Close")]
 
+HISTORY_LAYOUTS = ["rows", "columns"]
+
+
+def _history_columns(hist) -> dict:
+    """Serialize an OHLCV DataFrame column-wise with NumPy rounding and bulk date formatting."""
+    n = len(hist)
+    index = hist.index
+    if isinstance(index, pd.DatetimeIndex):
+        # local wall-clock dates, formatted in one NumPy call
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        dates = np.datetime_as_string(index.values.astype("datetime64[D]"), unit="D").tolist()
+    else:
+        dates = [str(d) for d in index]
+
+    cols = {"date": dates}
+    for key, name in HISTORY_COLUMNS:
+        values = hist[name].to_numpy(dtype=float) if name in hist else np.zeros(n)
+        cols[key] = np.round(values, 2).tolist()
+    volume = hist["Volume"].to_numpy(dtype=float) if "Volume" in hist else np.zeros(n)
+    cols["volume"] = np.nan_to_num(volume).astype(np.int64).tolist()
+    return cols
+
+
+def _load_history(symbol: str, period: str, interval: str = "1d"):
     valid_periods = ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"]
     if period not in valid_periods:
         raise ValueError(f"Invalid period '{period}'. Use: {', '.join(valid_periods)}")
+    if interval not in indicator_kernels.INTERVALS:
+        raise ValueError(f"Invalid interval '{interval}'. Use: {', '.join(indicator_kernels.INTERVALS)}")
 
-    t = yf.Ticker(symbol)
-    hist = t.history(period=period)
+    hist = market_data.get_history(symbol, period, interval)
 
-    if hist.empty:
+    if hist is None or hist.empty:
         raise ValueError(f"No history data for {symbol}")
+    return hist
+
+
+def cmd_history(symbol: str, period: str = "1mo", layout: str = "rows") -> dict:
+    symbol = symbol.upper()
+    if layout not in HISTORY_LAYOUTS:
+        raise ValueError(f"Invalid layout '{layout}'. Use: {', '.join(HISTORY_LAYOUTS)}")
 
-    records = []
-    for date, row in hist.iterrows():
-        records.append({
-            "date": str(date.date()) if hasattr(date, 'date') else str(date),
-            "open": round(row.get("Open", 0), 2),
-            "high": round(row.get("High", 0), 2),
-            "low": round(row.get("Low", 0), 2),
-            "close": round(row.get("Close", 0), 2),
-            "volume": int(row.get("Volume", 0)),
-        })
+    hist = _load_history(symbol, period)
+
+    cols = _history_columns(hist)
+    if layout == "columns":
+        return {"symbol": symbol, "period": period, "layout": layout, "data": cols}
+
+    keys = list(cols)
+    records = [dict(zip(keys, values)) for values in zip(*cols.values())]
     return {"symbol": symbol, "period": period, "data": records}
 
 
-def cmd_fundamentals(symbol: str) -> dict:
+def cmd_history_batches(symbol: str, period: str = "1mo", layout: str = "rows", batch_size: int = None):
+    """Streaming history: returns (header, generator of data batches of at most batch_size bars).
+
+    The history is loaded (and validated) up front; each batch is serialized
+    only when it is consumed, so at most one batch of JSON-ready rows is
+    held at a time.
+    """
     symbol = symbol.upper()
-    t, info = _get_ticker(symbol)
+    if layout not in HISTORY_LAYOUTS:
+        raise ValueError(f"Invalid layout '{layout}'. Use: {', '.join(HISTORY_LAYOUTS)}")
+    batch_size = batch_size or Config.HISTORY_STREAM_BATCH
+    hist = _load_history(symbol, period)
+    header = {"symbol": symbol, "period": period, "layout": layout, "rows": len(hist)}
+
+    def batches():
+        for start in range(0, len(hist), batch_size):
+            cols = _history_columns(hist.iloc[start:start + batch_size])
+            if layout == "columns":
+                yield cols
+            else:
+                keys = list(cols)
+                yield [dict(zip(keys, values)) for values in zip(*cols.values())]
+
+    return header, batches()
+
+
+def _history_records(header: dict, batches):
+    yield "start", header
+    for data in batches:
+        yield "batch", {"data": data}
+    yield "done", {"rows": header["rows"]}
+
+
+def cmd_history_frame(symbol: str, period: str = "1mo") -> pd.DataFrame:
+    """History as a flat columnar frame (date, open, high, low, close, volume) for binary encodings."""
+    hist = _load_history(symbol.upper(), period)
+    index = hist.index
+    if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+        index = index.tz_localize(None)
+    frame = pd.DataFrame({"date": np.asarray(index)})
+    for key, name in HISTORY_COLUMNS:
+        frame[key] = hist[name].to_numpy(dtype=float) if name in hist else np.zeros(len(hist))
+    volume = hist["Volume"].to_numpy(dtype=float) if "Volume" in hist else np.zeros(len(hist))
+    frame["volume"] = np.nan_to_num(volume).astype(np.int64)
+    return frame
+
+
+# computed indicator frames, keyed by the last bar they include: a new or
+# updated bar is a new key, so entries never need invalidating
+_indicator_cache = TTLCache(
+    "indicators", Config.INDICATORS_CACHE_TTL,
+    backend=bounded_backend("indicators", Config.INDICATORS_CACHE_MAX_ENTRIES, Config.INDICATORS_CACHE_MAX_BYTES),
+)
+
+
+def cmd_indicators(symbol: str, spec=None, period: str = "2y", interval: str = "1d", tail: int = None) -> dict:
+    """Technical indicators over the cached history; returns only the last ``tail`` bars."""
+    symbol = symbol.upper()
+    parsed = indicator_kernels.parse(spec or Config.INDICATORS_DEFAULT)
+    tail = Config.INDICATORS_TAIL if tail is None else tail
+    if tail < 1:
+        raise ValueError("tail must be >= 1")
+
+    hist = _load_history(symbol, period, interval)
+    last = hist.iloc[-1]
+    canonical = ",".join(":".join([name] + [f"{p:g}" for p in params]) for name, params in parsed)
+    key = (f"{symbol}:{interval}:{period}:{canonical}:{hist.index[-1].isoformat()}:"
+           f"{last.get('Close')}:{last.get('Volume')}:{len(hist)}")
+    frame = _indicator_cache.get_or_fetch(key, lambda: indicator_kernels.compute(hist, parsed, interval))
+
+    recent = frame.iloc[-tail:]
+    out = {"symbol": symbol, "period": period, "interval": interval, "bars": len(frame),
+           "indicators": list(frame.columns), "data": _history_columns(hist.iloc[-tail:])}
+    if interval not in ("1d", "1wk", "1mo"):
+        # intraday bars: keep the time of day
+        out["data"]["date"] = [ts.isoformat() for ts in recent.index]
+    for col in recent.columns:
+        out["data"][col] = [_json_value(v) for v in np.round(recent[col].to_numpy(dtype=float), 4)]
+    out["latest"] = {col: out["data"][col][-1] for col in recent.columns}
+    if "drawdown" in frame:
+        out["maxDrawdown"] = _json_value(round(float(frame["drawdown"].min()), 4))
+    return out
+
+
+FUNDAMENTAL_STATEMENTS = [("Income Statement", "financials"), ("Balance Sheet", "balance_sheet"), ("Cash Flow", "cashflow")]
+
+
+def _statement_periods(df) -> list:
+    return [str(col.date()) if hasattr(col, 'date') else str(col)[:10] for col in df.columns]
 
-    statements = {}
-    for name, df in [("Income Statement", t.financials), ("Balance Sheet", t.balance_sheet), ("Cash Flow", t.cashflow)]:
+
+def _fundamentals_frame(statements: dict) -> pd.DataFrame:
+    parts = []
+    for name, attr in FUNDAMENTAL_STATEMENTS:
+        df = statements[attr]
+        if df is None or df.empty:
+            continue
+        df = df.iloc[:, :4]  # last 4 periods
+        values = df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+        periods = _statement_periods(df)
+        n_items, n_periods = values.shape
+        parts.append(pd.DataFrame({
+            "statement": np.full(values.size, name, dtype=object),
+            "period": np.tile(np.array(periods, dtype=object), n_items),
+            "item": np.repeat(df.index.astype(str).to_numpy(dtype=object), n_periods),
+            "value": values.ravel(),
+        }))
+    if not parts:
+        return pd.DataFrame({"statement": [], "period": [], "item": [], "value": np.array([], dtype=float)})
+    return pd.concat(parts, ignore_index=True)
+
+
+def _fundamentals_records(statements: dict) -> dict:
+    out = {}
+    for name, attr in FUNDAMENTAL_STATEMENTS:
+        df = statements[attr]
         if df is not None and not df.empty:
             records = {}
-            for col in df.columns[:4]:  # last 4 periods
-                period = str(col.date()) if hasattr(col, 'date') else str(col)[:10]
+            for col, period in zip(df.columns[:4], _statement_periods(df.iloc[:, :4])):  # last 4 periods
                 records[period] = {str(idx): val for idx, val in df[col].items() if val is not None}
-            statements[name] = records
+            out[name] = records
         else:
-            statements[name] = {}
+            out[name] = {}
+    return out
 
+
+def cmd_fundamentals_frame(symbol: str, frequency: str = "annual") -> pd.DataFrame:
+    """Statements as one long frame (statement, period, item, value) for binary encodings."""
+    symbol = symbol.upper()
+    _get_ticker(symbol, PROFILE)
+    return market_data.statement_store.derived(symbol, "fundamentals_frame", _fundamentals_frame, frequency)
+
+
+def cmd_fundamentals(symbol: str, frequency: str = "annual") -> dict:
+    symbol = symbol.upper()
+    t, info = _get_ticker(symbol, PROFILE)
+    statements = market_data.statement_store.derived(symbol, "fundamentals", _fundamentals_records, frequency)
     return {"symbol": symbol, "statements": statements}
 
 
 def cmd_news(symbol: str) -> dict:
     symbol = symbol.upper()
-    t = yf.Ticker(symbol)
-
     try:
-        news = t.news or []
+        news = market_data.get_attr(symbol, "news") or []
     except Exception:
         news = []
 
     return news[:15] if news else []
 
 
+_news_summary_cache = TTLCache(
+    "news_summary", Config.NEWS_SUMMARY_CACHE_TTL,
+    backend=bounded_backend("news_summary", Config.NEWS_SUMMARY_CACHE_MAX_ENTRIES,
+                            Config.NEWS_SUMMARY_CACHE_MAX_BYTES),
+    stale_ttl=Config.NEWS_SUMMARY_STALE_TTL,
+)
+
+
 def cmd_news_summary(symbol: str, suffix: str = "Stock") -> dict:
-    """Fetch news summary from Brave Search API."""
+    """Fetch news summary from Brave Search API.
+
+    Results are cached per (symbol, suffix); once past NEWS_SUMMARY_CACHE_TTL
+    the cached summary is still returned while it is refreshed in the
+    background.
+    """
     symbol = symbol.upper()
+    return _news_summary_cache.get_or_fetch(f"{symbol}:{suffix}", lambda: _fetch_news_summary(symbol, suffix))
+
+
+def _fetch_news_summary(symbol: str, suffix: str) -> dict:
     
     # Get environment variables
     api_token = os.getenv('BRAVE_API_TOKEN')
@@ -425,7 +929,7 @@ def cmd_news_summary(symbol: str, suffix: str = "Stock") -> dict:
     }
     
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = http_pool.brave_session().get(url, headers=headers, params=params, timeout=Config.HTTP_TIMEOUT)
         response.raise_for_status()
         data = response.json()
         return {"symbol": symbol, "query": query, "summary": data}
@@ -435,8 +939,10 @@ def cmd_news_summary(symbol: str, suffix: str = "Stock") -> dict:
 
 def cmd_search(query: str) -> dict:
     try:
-        results = yf.Search(query)
+        results = market_data.search(query)
         quotes = results.quotes if hasattr(results, 'quotes') else []
+    except UpstreamThrottled:
+        raise
     except Exception as e:
         raise ValueError(f"Search error: {e}")
 
@@ -445,29 +951,68 @@ def cmd_search(query: str) -> dict:
 
 def cmd_options(symbol: str) -> dict:
     symbol = symbol.upper()
-    t = yf.Ticker(symbol)
-
-    try:
-        dates = t.options
-    except Exception:
-        dates = []
+    dates = market_data.get_option_expirations(symbol)
 
     if not dates:
         return {"symbol": symbol, "expiry": None, "expirations": [], "calls": [], "puts": []}
 
     # Use nearest expiry
     exp = dates[0]
-    chain = t.option_chain(exp)
+    chain = market_data.get_option_chain(symbol, exp)
 
     out = {"symbol": symbol, "expiry": exp, "expirations": list(dates)}
-    out["calls"] = chain.calls.head(15).to_dict(orient="records") if chain.calls is not None else []
-    out["puts"] = chain.puts.head(15).to_dict(orient="records") if chain.puts is not None else []
+    out["calls"] = chain["calls"].head(15).to_dict(orient="records") if chain["calls"] is not None else []
+    out["puts"] = chain["puts"].head(15).to_dict(orient="records") if chain["puts"] is not None else []
+    return out
+
+
+def cmd_options_surface(symbol: str, fields=None, strike_range: float = None, max_expiries: int = None) -> dict:
+    """Implied vol and greeks for every listed contract as strike x expiry grids.
+
+    All expiries are fetched concurrently (each chain is cached on its own)
+    and every contract is priced in one vectorized Black-Scholes pass.
+    """
+    symbol = symbol.upper()
+    fields = [f.strip() for f in fields.split(",") if f.strip()] if isinstance(fields, str) else fields
+    fields = fields or option_analytics.GREEKS
+    unknown = [f for f in fields if f not in option_analytics.FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}. Use: {', '.join(option_analytics.FIELDS)}")
+    strike_range = Config.OPTIONS_SURFACE_STRIKE_RANGE if strike_range is None else strike_range
+    if strike_range < 0:
+        raise ValueError("strike_range must be >= 0")
+
+    _, info = _get_ticker(symbol)
+    spot = info.get("regularMarketPrice", info.get("previousClose"))
+    dates = market_data.get_option_expirations(symbol)
+    if max_expiries is not None:
+        dates = dates[:max_expiries]
+    out = {"symbol": symbol, "spot": spot, "rate": Config.OPTIONS_RISK_FREE_RATE, "fields": fields}
+    if not dates or not spot:
+        out.update({"expiries": [], "strikes": [], "calls": {}, "puts": {}, "errors": {}})
+        return out
+
+    chains, errors = fan_out(lambda exp: market_data.get_option_chain(symbol, exp), dates)
+    if not chains and errors and all(isinstance(e, UpstreamThrottled) for e in errors.values()):
+        raise next(iter(errors.values()))
+
+    table = option_analytics.chain_table(chains)
+    if strike_range:
+        table = table[(table["strike"] - spot).abs() <= strike_range * spot]
+    # trailingAnnualDividendYield is a fraction (dividendYield is in percent)
+    div = float(_safe_get(info, "trailingAnnualDividendYield", 0) or 0)
+    now = pd.Timestamp.now(tz="UTC")
+    table = option_analytics.analyze(table, float(spot), now, Config.OPTIONS_RISK_FREE_RATE, div)
+    out["dividendYield"] = div
+    out["asOf"] = now.isoformat()
+    out.update(option_analytics.grid(table, fields))
+    out["errors"] = {exp: str(e) for exp, e in errors.items()}
     return out
 
 
 def cmd_dividends(symbol: str) -> dict:
     symbol = symbol.upper()
-    t, info = _get_ticker(symbol)
+    t, info = _get_ticker(symbol, FUNDAMENTALS)
 
     div_info = {
         "Dividend Rate": _safe_get(info, "dividendRate"),
@@ -487,7 +1032,7 @@ def cmd_dividends(symbol: str) -> dict:
         except Exception:
             pass
 
-    divs = t.dividends
+    divs = market_data.get_attr(symbol, "dividends")
     history = []
     if divs is not None and not divs.empty:
         for date, amount in divs.tail(12).items():
@@ -527,7 +1072,7 @@ def cmd_ratings(symbol: str) -> dict:
     # Upgrades/downgrades
     upgrades = []
     try:
-        ug = t.upgrades_downgrades
+        ug = market_data.get_attr(symbol, "upgrades_downgrades")
         if ug is not None and not ug.empty:
             for date, row in ug.tail(10).iterrows():
                 upgrades.append({
@@ -592,11 +1137,13 @@ def price(symbol):
         description: Price information returned as JSON
       400:
         description: Error message
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
         return jsonify(cmd_price(symbol))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/quote/<symbol>')
@@ -615,11 +1162,69 @@ def quote(symbol):
         description: Quote information
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
         return jsonify(cmd_quote(symbol))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
+
+
+@finance_bp.route('/batch/price', methods=['POST'])
+@token_required
+def batch_price():
+    """Price a list of ticker symbols in one call.
+
+    ---
+    parameters:
+      - name: symbols
+        in: body
+        type: array
+        items:
+          type: string
+        required: true
+        description: Ticker symbols (e.g. ["AAPL", "MSFT"])
+    responses:
+      200:
+        description: Column-wise price data (symbol, price, previousClose, change, changePct, volume)
+      400:
+        description: Error or invalid input
+      503:
+        description: Upstream rate limited (see Retry-After)
+    """
+    try:
+        return jsonify(cmd_batch_price(_batch_symbols(request.get_json(silent=True))))
+    except Exception as e:
+        return _error_response(e)
+
+
+@finance_bp.route('/batch/quote', methods=['POST'])
+@token_required
+def batch_quote():
+    """Retrieve quote fields for a list of ticker symbols in one call.
+
+    ---
+    parameters:
+      - name: symbols
+        in: body
+        type: array
+        items:
+          type: string
+        required: true
+        description: Ticker symbols (e.g. ["AAPL", "MSFT"])
+    responses:
+      200:
+        description: Column-wise quote data
+      400:
+        description: Error or invalid input
+      503:
+        description: Upstream rate limited (see Retry-After)
+    """
+    try:
+        return jsonify(cmd_batch_quote(_batch_symbols(request.get_json(silent=True))))
+    except Exception as e:
+        return _error_response(e)
 
 
 @finance_bp.route('/compare')
@@ -639,6 +1244,8 @@ def compare():
         description: Comparison data
       400:
         description: Error or invalid input
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     tickers = request.args.get('tickers', '').split(',')
     tickers = [s.strip().upper() for s in tickers if s.strip()]
@@ -647,7 +1254,52 @@ def compare():
     try:
         return jsonify(cmd_compare(tickers))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
+
+
+@finance_bp.route('/correlation')
+@token_required
+def correlation():
+    """Correlation, covariance and beta matrices of daily returns for several symbols.
+
+    ---
+    parameters:
+      - name: symbols
+        in: query
+        type: string
+        required: true
+        description: Comma-separated list of symbols (e.g. AAPL,MSFT,XOM)
+      - name: window
+        in: query
+        type: integer
+        required: false
+        description: Trailing number of aligned daily returns (default CORRELATION_WINDOW)
+      - name: benchmark
+        in: query
+        type: string
+        required: false
+        description: Symbol the "beta" map is measured against (default CORRELATION_BENCHMARK; empty for none)
+      - name: returns
+        in: query
+        type: string
+        required: false
+        description: log (default) or simple returns
+    responses:
+      200:
+        description: >
+          Matrices ordered like "symbols" (the benchmark is appended if not requested); a benchmark
+          without history is listed under "errors" and "beta" is omitted
+      400:
+        description: Error or invalid input
+      503:
+        description: Upstream rate limited (see Retry-After)
+    """
+    symbols = [s.strip() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    try:
+        return jsonify(cmd_correlation(symbols, request.args.get('window', type=int), request.args.get('benchmark'),
+                                       request.args.get('returns', 'log')))
+    except Exception as e:
+        return _error_response(e)
 
 
 @finance_bp.route('/credit/<symbol>')
@@ -661,16 +1313,95 @@ def credit(symbol):
         in: path
         type: string
         required: true
+      - name: frequency
+        in: query
+        type: string
+        required: false
+        description: Statement frequency of the latest metrics, annual (default) or quarterly
+      - name: history
+        in: query
+        type: boolean
+        required: false
+        description: Include annual and quarterly per-period metrics and trend statistics (default true)
     responses:
       200:
         description: Credit metrics
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
+    """
+    try:
+        history = request.args.get('history', 'true').lower() != 'false'
+        return jsonify(cmd_credit(symbol, request.args.get('frequency', 'annual'), history))
+    except Exception as e:
+        return _error_response(e)
+
+
+@finance_bp.route('/credit/screen', methods=['GET'])
+def credit_screen_get():
+    # without this rule a GET would fall through to /credit/<symbol> for "SCREEN"
+    return jsonify({'error': 'Use POST for /credit/screen'}), 405, {'Allow': 'POST'}
+
+
+@finance_bp.route('/credit/screen', methods=['POST'])
+@token_required
+def credit_screen():
+    """Screen and rank a universe of symbols on credit metrics.
+
+    ---
+    parameters:
+      - name: body
+        in: body
+        required: true
+        description: >
+          {"symbols": [...], "frequency": "annual"|"quarterly",
+          "filters": {"Debt/EBITDA": {"max": 3}, "Interest Coverage (EBIT)": {"min": 4}},
+          "sort": "Net Debt/EBITDA", "ascending": true, "limit": 50}
+    responses:
+      200:
+        description: Column-wise credit metrics for the matching symbols, in rank order
+      400:
+        description: Error or invalid input
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
-        return jsonify(cmd_credit(symbol))
+        return jsonify(cmd_credit_screen(request.get_json(silent=True) or {}))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
+
+
+@finance_bp.route('/portfolio/risk', methods=['POST'])
+@token_required
+def portfolio_risk():
+    """Value at risk, expected shortfall, volatility attribution and beta of a weighted portfolio.
+
+    ---
+    parameters:
+      - name: body
+        in: body
+        required: true
+        description: >
+          {"weights": {"AAPL": 0.4, "MSFT": 0.35, "XOM": 0.25}, "window": 252, "horizon": 1,
+          "confidence": [0.95, 0.99], "benchmark": "SPY", "value": 1000000,
+          "simulations": 10000, "model": "normal"|"bootstrap", "seed": 7, "parallel": true};
+          confidence is one level or a list of levels, each in (0, 1); parallel is true, false or
+          omitted (processes are used for large portfolios)
+    responses:
+      200:
+        description: >
+          VaR/CVaR per method and confidence level (positive loss fractions), portfolio volatility,
+          and column-wise per-position weight, volatility contributions and beta
+      400:
+        description: Error or invalid input
+      503:
+        description: Upstream rate limited (see Retry-After)
+    """
+    try:
+        return jsonify(cmd_portfolio_risk(request.get_json(silent=True) or {}))
+    except Exception as e:
+        return _error_response(e)
 
 
 @finance_bp.route('/macro')
@@ -690,6 +1421,8 @@ def macro():
         description: Price and change data
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     tickers = request.args.get('tickers', '').split(',')
     tickers = [s.strip().upper() for s in tickers if s.strip()]
@@ -698,7 +1431,7 @@ def macro():
     try:
         return jsonify(cmd_macro(tickers))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/fx')
@@ -719,11 +1452,13 @@ def fx(base="USD"):
         description: FX rates data
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
         return jsonify(cmd_fx(base.upper()))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/flows/<symbol>')
@@ -742,11 +1477,13 @@ def flows(symbol):
         description: Fund data
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
         return jsonify(cmd_flows(symbol))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/history/<symbol>')
@@ -765,17 +1502,92 @@ def history(symbol):
         type: string
         required: false
         description: Data period (e.g. 1mo, 1y)
+      - name: layout
+        in: query
+        type: string
+        required: false
+        description: "rows" (default, one object per bar) or "columns" ({date:[], open:[], ...})
+      - name: stream
+        in: query
+        type: string
+        required: false
+        description: "ndjson" to stream start/batch/done records of HISTORY_STREAM_BATCH bars (also via Accept)
+    produces:
+      - application/json
+      - application/x-ndjson
+      - application/vnd.apache.arrow.stream
+      - application/x-parquet
+      - application/x-npz
     responses:
       200:
-        description: Historical data
+        description: Historical data (JSON, or a columnar binary table chosen via the Accept header)
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     period = request.args.get('period', '1mo')
+    layout = request.args.get('layout', 'rows')
+    mimetype = formats.negotiate(request.accept_mimetypes)
+    try:
+        stream = formats.stream_format(request.args.get('stream'), request.accept_mimetypes,
+                                       offered=["ndjson"])
+        if stream:
+            header, batches = cmd_history_batches(symbol, period, layout)
+            return _stream_response(_history_records(header, batches), stream)
+        if mimetype != formats.JSON:
+            return _binary_response(cmd_history_frame(symbol, period), mimetype)
+        return jsonify(cmd_history(symbol, period, layout))
+    except Exception as e:
+        return _error_response(e)
+
+
+@finance_bp.route('/indicators/<symbol>')
+@token_required
+def indicators(symbol):
+    """Compute technical indicators server-side and return their most recent values.
+
+    ---
+    parameters:
+      - name: symbol
+        in: path
+        type: string
+        required: true
+      - name: indicators
+        in: query
+        type: string
+        required: false
+        description: >
+          Comma-separated name[:param...] list, e.g. sma:20,sma:50,ema:12,rsi:14,atr:14,volatility:20,
+          drawdown,macd:12:26:9,bollinger:20:2 (default INDICATORS_DEFAULT)
+      - name: period
+        in: query
+        type: string
+        required: false
+        description: History loaded for the calculation (default 2y; longer windows need more)
+      - name: interval
+        in: query
+        type: string
+        required: false
+        description: Bar interval (1d default, 1wk, 1mo or intraday 1m-1h)
+      - name: tail
+        in: query
+        type: integer
+        required: false
+        description: Number of most recent bars returned (default INDICATORS_TAIL)
+    responses:
+      200:
+        description: Columnar OHLCV plus indicator values for the last bars, and the latest value of each
+      400:
+        description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
+    """
     try:
-        return jsonify(cmd_history(symbol, period))
+        return jsonify(cmd_indicators(symbol, request.args.get('indicators'), request.args.get('period', '2y'),
+                                      request.args.get('interval', '1d'), request.args.get('tail', type=int)))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/fundamentals/<symbol>')
@@ -789,16 +1601,32 @@ def fundamentals(symbol):
         in: path
         required: true
         type: string
+      - name: frequency
+        in: query
+        type: string
+        required: false
+        description: Statement frequency, annual (default) or quarterly
+    produces:
+      - application/json
+      - application/vnd.apache.arrow.stream
+      - application/x-parquet
+      - application/x-npz
     responses:
       200:
-        description: Statements data
+        description: Statements data (JSON, or a long statement/period/item/value table chosen via the Accept header)
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
+    mimetype = formats.negotiate(request.accept_mimetypes)
+    frequency = request.args.get('frequency', 'annual')
     try:
-        return jsonify(cmd_fundamentals(symbol))
+        if mimetype != formats.JSON:
+            return _binary_response(cmd_fundamentals_frame(symbol, frequency), mimetype)
+        return jsonify(cmd_fundamentals(symbol, frequency))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/news/<symbol>')
@@ -817,11 +1645,13 @@ def news(symbol):
         description: News list
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
         return jsonify(cmd_news(symbol))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/news_summary/<symbol>')
@@ -845,12 +1675,14 @@ def news_summary(symbol):
         description: Summary data
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     suffix = request.args.get('suffix', 'Stock')
     try:
         return jsonify(cmd_news_summary(symbol, suffix))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/search/<path:query>')
@@ -869,11 +1701,13 @@ def search(query):
         description: Search results
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
         return jsonify(cmd_search(query))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/options/<symbol>')
@@ -892,11 +1726,55 @@ def options(symbol):
         description: Options data
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
         return jsonify(cmd_options(symbol))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
+
+
+@finance_bp.route('/options/<symbol>/surface')
+@token_required
+def options_surface(symbol):
+    """Implied volatility and greeks for every strike and expiry of a ticker.
+
+    ---
+    parameters:
+      - name: symbol
+        in: path
+        required: true
+        type: string
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Comma-separated grid fields (iv, delta, gamma, vega, theta, price, volume, openInterest); default the greeks
+      - name: strike_range
+        in: query
+        type: number
+        required: false
+        description: Keep strikes within this fraction of spot (default OPTIONS_SURFACE_STRIKE_RANGE; 0 = all)
+      - name: max_expiries
+        in: query
+        type: integer
+        required: false
+        description: Only the nearest N expiries
+    responses:
+      200:
+        description: Strike x expiry grids per side (rows follow strikes, columns follow expiries)
+      400:
+        description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
+    """
+    try:
+        return jsonify(cmd_options_surface(symbol, request.args.get('fields'),
+                                           request.args.get('strike_range', type=float),
+                                           request.args.get('max_expiries', type=int)))
+    except Exception as e:
+        return _error_response(e)
 
 
 @finance_bp.route('/dividends/<symbol>')
@@ -915,11 +1793,13 @@ def dividends(symbol):
         description: Dividend info
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
         return jsonify(cmd_dividends(symbol))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
 
 @finance_bp.route('/ratings/<symbol>')
@@ -938,11 +1818,30 @@ def ratings(symbol):
         description: Ratings data
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
     try:
         return jsonify(cmd_ratings(symbol))
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
+
+
+def _analysis_records(symbol: str, fmt: str, names: list, parts):
+    position = {name: i for i, name in enumerate(names)}
+    yield "start", {"symbol": symbol, "format": fmt, "sections": names}
+    errors = []
+    for name, content, error in parts:
+        if error is None:
+            yield "section", {"name": name, "position": position[name], "content": content}
+        else:
+            errors.append(error)
+            yield "error", {"name": name, "position": position[name], "error": str(error)}
+    done = {"sections": len(names) - len(errors), "errors": len(errors)}
+    if errors and len(errors) == len(names) and all(isinstance(e, UpstreamThrottled) for e in errors):
+        # the status line is long gone; tell the client when to retry here instead
+        done["retry_after"] = max(e.retry_after for e in errors)
+    yield "done", done
 
 
 @finance_bp.route('/analysis/<symbol>')
@@ -956,15 +1855,59 @@ def analysis(symbol):
         in: path
         required: true
         type: string
+      - name: sections
+        in: query
+        type: string
+        required: false
+        description: Comma-separated sections or groups to include (e.g. analysis, major_holders); default all
+      - name: format
+        in: query
+        type: string
+        required: false
+        description: text (default, padded tables), csv, tsv, markdown, or json (structured sections)
+      - name: precision
+        in: query
+        type: integer
+        required: false
+        description: Round numeric values to this many decimals (compact formats default to ANALYSIS_PRECISION)
+      - name: max_rows
+        in: query
+        type: integer
+        required: false
+        description: Keep at most this many rows per section
+      - name: stream
+        in: query
+        type: string
+        required: false
+        description: >
+          "sse" or "ndjson" (also via Accept) to send each section as soon as it is fetched:
+          a start record, then one section/error record per section in completion order, then done
+    produces:
+      - application/json
+      - text/event-stream
+      - application/x-ndjson
     responses:
       200:
-        description: Analysis text
+        description: Analysis text (or structured sections for format=json)
       400:
         description: Error
+      503:
+        description: Upstream rate limited (see Retry-After)
     """
+    sections = request.args.get('sections')
+    fmt = request.args.get('format', 'text').lower()
     try:
-        text = get_full_analysis_and_holdings_text(symbol.upper())
+        precision = request.args.get('precision', type=int)
+        max_rows = request.args.get('max_rows', type=int)
+        stream = formats.stream_format(request.args.get('stream'), request.accept_mimetypes)
+        if stream:
+            names, parts = stream_full_analysis_and_holdings(symbol.upper(), sections, fmt, precision, max_rows)
+            return _stream_response(_analysis_records(symbol.upper(), fmt, names, parts), stream)
+        if fmt == "json":
+            result = get_full_analysis_and_holdings(symbol.upper(), sections, precision, max_rows)
+            return jsonify({"symbol": symbol.upper(), "format": fmt, **result})
+        text = get_full_analysis_and_holdings_text(symbol.upper(), sections, fmt, precision, max_rows)
         return jsonify({"symbol": symbol.upper(), "analysis": text})
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return _error_response(e)
 
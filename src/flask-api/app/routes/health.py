@@ -1,5 +1,9 @@
 from flask import Blueprint
 from flask_smorest import Blueprint as SmorestBlueprint
+from app import market_data, prefetch
+from app.cache import cache_stats
+from app.rate_limit import upstream
+from app.singleflight import flight
 
 health_bp = SmorestBlueprint('health', __name__, url_prefix='/health', description='Health check endpoints')
 
@@ -8,3 +12,17 @@ health_bp = SmorestBlueprint('health', __name__, url_prefix='/health', descripti
 def health():
     """Health check endpoint."""
     return {'status': 'healthy'}, 200
+
+
+@health_bp.route('/cache', methods=['GET'])
+@health_bp.response(200, description='Cache statistics')
+def cache():
+    """Hit/miss counters and usage for the yfinance result caches."""
+    stats = cache_stats()
+    stats["single_flight"] = flight.stats()
+    stats["rate_limit"] = upstream.stats()
+    if prefetch.scheduler is not None:
+        stats["prefetch"] = prefetch.scheduler.stats()
+    if market_data.history_store is not None:
+        stats["history_store"] = market_data.history_store.stats()
+    return stats, 200
@@ -0,0 +1,152 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_accessed ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS locks (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SqliteBackend:
+    """Cache backend shared by every gunicorn worker through one SQLite file.
+
+    The database runs in WAL mode so readers never block the single writer,
+    every write is its own transaction, and a ``locks`` table provides a
+    cross-process single-flight lock so only one worker fetches a cold key.
+    """
+
+    def __init__(self, path: str, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024,
+                 lock_timeout: float = 30.0, poll_interval: float = 0.05):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.evictions = 0
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread, reopened after gunicorn forks a worker
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.lock_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        """Return (value, stored_at) for a live entry or None."""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, stored_at FROM entries WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            value = pickle.loads(row[0])
+        except Exception:
+            self.delete(key)
+            return None
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return value, row[1]
+
+    def set(self, key, value, stored_at: float, expires_at: float):
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        if len(blob) > self.max_bytes:
+            return
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, stored_at, expires_at, accessed_at, size) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, blob, stored_at, expires_at, time.time(), len(blob)),
+        )
+        self._writes += 1
+        if self._writes % 32 == 0:
+            self._evict()
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM entries")
+
+    def usage(self) -> dict:
+        count, total = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": total, "evictions": self.evictions, "path": self.path}
+
+    def _evict(self):
+        """Drop expired rows, then least recently used rows until within budget."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if count > self.max_entries or total > self.max_bytes:
+                rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+                doomed = []
+                for key, size in rows:
+                    if count <= self.max_entries and total <= self.max_bytes:
+                        break
+                    doomed.append((key,))
+                    count -= 1
+                    total -= size
+                conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+                self.evictions += len(doomed)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _try_acquire(self, key: str, owner: str) -> bool:
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO locks (key, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE locks.expires_at <= ?",
+            (key, owner, now + self.lock_timeout, now),
+        )
+        return cur.rowcount == 1
+
+    @contextmanager
+    def lock(self, key: str):
+        """Hold the cross-worker fetch lock for key.
+
+        Waits while another worker holds it; a holder that dies is superseded
+        once its lease (``lock_timeout``) runs out.
+        """
+        owner = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex}"
+        while not self._try_acquire(key, owner):
+            time.sleep(self.poll_interval)
+        try:
+            yield
+        finally:
+            self._conn().execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
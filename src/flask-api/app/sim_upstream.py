@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# Stand-in for yf.Ticker used when UPSTREAM_SIMULATED_LATENCY > 0, so load
+# benchmarks (scripts/load_benchmark.py) can be reproduced without Yahoo: every
+# upstream request sleeps for the configured latency and returns synthetic,
+# per-symbol deterministic data. Only info and history are simulated, which
+# covers /price, /quote, /history and the routes built on them.
+
+
+class SimulatedTicker:
+    """yf.Ticker look-alike whose requests each take ``latency`` seconds."""
+
+    def __init__(self, symbol: str, latency: float, session=None):
+        self.ticker = symbol.upper()
+        self.latency = latency
+        self._rng = np.random.default_rng(sum(map(ord, self.ticker)))
+
+    def _request(self):
+        time.sleep(self.latency)
+
+    @property
+    def info(self) -> dict:
+        self._request()
+        price = float(np.round(self._rng.uniform(10, 500), 2))
+        prev = float(np.round(price * (1 + self._rng.normal(0, 0.01)), 2))
+        return {
+            "symbol": self.ticker, "shortName": f"{self.ticker} (simulated)", "currency": "USD",
+            "regularMarketPrice": price, "regularMarketPreviousClose": prev, "previousClose": prev,
+            "regularMarketOpen": prev, "regularMarketDayLow": min(price, prev), "regularMarketDayHigh": max(price, prev),
+            "regularMarketVolume": int(self._rng.integers(100_000, 10_000_000)),
+        }
+
+    def history(self, period: str = "1mo", interval: str = "1d", start=None, **kwargs) -> pd.DataFrame:
+        self._request()
+        index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=260).tz_localize("America/New_York")
+        close = 100 * np.exp(np.cumsum(self._rng.normal(0, 0.01, len(index))))
+        frame = pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                              "Volume": self._rng.integers(100_000, 1_000_000, len(index))}, index=index)
+        if start is not None:
+            return frame[frame.index >= pd.Timestamp(start, tz=index.tz)]
+        return frame
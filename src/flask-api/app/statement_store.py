@@ -0,0 +1,146 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.cache import TTLCache
+from app.config import Config
+from app.fanout import fan_out
+
+STATEMENTS = ("financials", "balance_sheet", "cashflow")
+FREQUENCIES = ("annual", "quarterly")
+
+_DAY = 24 * 60 * 60
+# assumed spacing of statement periods when a frame has a single column
+_DEFAULT_CADENCE = {"annual": 365 * _DAY, "quarterly": 91 * _DAY}
+
+
+def _periods(frame) -> list:
+    """Statement period end dates (epoch seconds, ascending)."""
+    if frame is None or len(frame.columns) == 0:
+        return []
+    dates = pd.to_datetime(pd.Index(frame.columns), errors="coerce").dropna()
+    return sorted(ts.timestamp() for ts in dates)
+
+
+def statement_expiry(frame, frequency: str, next_earnings: float, now: float) -> float:
+    """When a fetched statement can next contain new data (epoch seconds).
+
+    Statements only change when a period is reported, so an entry lives
+    until the next earnings release (plus STATEMENT_EARNINGS_GRACE for Yahoo
+    to pick the filing up). If the period after the newest column has
+    already ended and is not due at the next release, it has been reported
+    but is missing upstream: poll every STATEMENT_OVERDUE_TTL until it
+    shows up or STATEMENT_FILING_DEADLINE has passed.
+    """
+    periods = _periods(frame)
+    if not periods:
+        return now + Config.STATEMENT_CACHE_TTL
+    cadence = float(np.median(np.diff(periods))) if len(periods) > 1 else _DEFAULT_CADENCE[frequency]
+    pending_end = periods[-1] + cadence
+    deadline = pending_end + Config.STATEMENT_FILING_DEADLINE
+    upcoming = next_earnings if next_earnings is not None and next_earnings > now else None
+
+    if now <= pending_end or (upcoming is not None and upcoming <= deadline):
+        # nothing new can appear before the next release
+        if upcoming is not None:
+            return min(upcoming + Config.STATEMENT_EARNINGS_GRACE, now + Config.STATEMENT_MAX_AGE)
+        return now + Config.STATEMENT_CACHE_TTL
+    if now <= deadline:
+        return now + Config.STATEMENT_OVERDUE_TTL
+    return now + Config.STATEMENT_CACHE_TTL
+
+
+class StatementStore:
+    """Financial statements keyed by (symbol, statement, frequency).
+
+    Each entry is stored with an earnings-calendar-aware expiry (see
+    statement_expiry), so between reporting dates every statement read,
+    and every result derived from statements, is served from the cache.
+    ``fetch(symbol, attr)`` loads one yfinance statement attribute and
+    ``next_earnings(symbol)`` returns the next earnings date as epoch
+    seconds (or None).
+    """
+
+    def __init__(self, cache: TTLCache, fetch, next_earnings):
+        self.cache = cache
+        self.fetch = fetch
+        self.next_earnings = next_earnings
+
+    @staticmethod
+    def _check(name: str, frequency: str):
+        if name not in STATEMENTS:
+            raise ValueError(f"Unknown statement '{name}'")
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unknown frequency '{frequency}'. Use: {', '.join(FREQUENCIES)}")
+
+    @staticmethod
+    def _key(symbol: str, name: str, frequency: str) -> str:
+        return f"{symbol.upper()}:{name}:{frequency}"
+
+    def _loader(self, symbol: str, name: str, frequency: str):
+        attr = name if frequency == "annual" else f"quarterly_{name}"
+
+        def load():
+            frame = self.fetch(symbol, attr)
+            try:
+                earnings = self.next_earnings(symbol)
+            except Exception:
+                # no calendar (e.g. throttled quote): fall back to the plain TTL
+                earnings = None
+            return frame, statement_expiry(frame, frequency, earnings, time.time())
+
+        return load
+
+    @staticmethod
+    def _ttl(entry) -> float:
+        return max(1.0, entry[1] - time.time())
+
+    def entry(self, symbol: str, name: str, frequency: str = "annual") -> tuple:
+        """Return (frame, expires_at) for one statement, fetching it when missing or expired."""
+        self._check(name, frequency)
+        return self.cache.get_or_fetch(self._key(symbol, name, frequency),
+                                       self._loader(symbol, name, frequency), ttl=self._ttl)
+
+    def get(self, symbol: str, name: str, frequency: str = "annual"):
+        """Return one statement DataFrame (may be None or empty)."""
+        return self.entry(symbol, name, frequency)[0]
+
+    def entries(self, symbol: str, frequency: str = "annual", names=STATEMENTS) -> dict:
+        """{name: (frame, expires_at)}; missing statements are fetched concurrently."""
+        results, errors = fan_out(lambda name: self.entry(symbol, name, frequency), names)
+        if errors:
+            raise next(iter(errors.values()))
+        return results
+
+    def get_all(self, symbol: str, frequency: str = "annual", names=STATEMENTS) -> dict:
+        """{name: DataFrame} for several statements of one symbol."""
+        return {name: entry[0] for name, entry in self.entries(symbol, frequency, names).items()}
+
+    def derived(self, symbol: str, name: str, compute, frequency: str = "annual", names=STATEMENTS):
+        """Return compute({statement: DataFrame}), cached until the statements it reads expire.
+
+        The key includes the statements' expiries, so a result computed from
+        superseded statements is never served after they are refreshed.
+        """
+        entries = self.entries(symbol, frequency, names)
+        expires_at = min(entry[1] for entry in entries.values())
+        version = int(sum(entry[1] for entry in entries.values()))
+        key = f"{symbol.upper()}:{frequency}:derived:{name}:{version}"
+        return self.cache.get_or_fetch(key, lambda: compute({n: e[0] for n, e in entries.items()}),
+                                       ttl=max(1.0, expires_at - time.time()))
+
+    def refresh(self, symbol: str, name: str, frequency: str = "annual"):
+        """Refetch one statement now, regardless of its expiry."""
+        self._check(name, frequency)
+        return self.cache.refresh(self._key(symbol, name, frequency),
+                                  self._loader(symbol, name, frequency), ttl=self._ttl)[0]
+
+    def warm(self, symbol: str, within: float, frequency: str = "annual") -> int:
+        """Refresh the statements of symbol that expire within ``within`` seconds; returns how many."""
+        refreshed = 0
+        for name, entry in self.entries(symbol, frequency).items():
+            if entry[1] - time.time() <= within:
+                self.refresh(symbol, name, frequency)
+                refreshed += 1
+        return refreshed
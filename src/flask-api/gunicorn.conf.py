@@ -1,7 +1,38 @@
 import multiprocessing
+import os
 
 bind = "0.0.0.0:5001"
-workers = multiprocessing.cpu_count() * 2 + 1
 timeout = 120
 accesslog = "-"
 errorlog = "-"
+
+# Nearly all request time is spent waiting on Yahoo/Brave, so a threaded or
+# cooperative worker class lets one process hold many upstream waits at once.
+#   sync    - one request per process (default, previous behaviour)
+#   gthread - GUNICORN_THREADS requests per process on a thread pool
+#   gevent  - GUNICORN_WORKER_CONNECTIONS greenlets per process (needs
+#             `pip install gevent`; yfinance's curl_cffi transport is not
+#             gevent-aware, so prefer gthread for Yahoo-heavy traffic)
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+
+if worker_class == "sync":
+    workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+else:
+    # concurrency comes from threads/greenlets, so fewer (and cheaper) processes
+    workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+
+threads = int(os.environ.get("GUNICORN_THREADS", 64 if worker_class == "gthread" else 1))
+
+# every worker owns a Monte Carlo process pool (app.risk); split the cores
+# between the workers instead of giving each one cpu_count processes
+os.environ.setdefault("RISK_MC_PROCESSES", str(max(1, multiprocessing.cpu_count() // workers)))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 1000))
+
+# app.rate_limit caps the Yahoo calls one worker has in flight. Start the cap
+# at the worker's request concurrency so it does not queue the upstream waits
+# a threaded/cooperative worker is meant to overlap; the shared token bucket
+# still bounds the request rate across all workers.
+if worker_class != "sync":
+    in_flight = threads if worker_class == "gthread" else worker_connections
+    os.environ.setdefault("RATE_LIMIT_CONCURRENCY", str(in_flight))
+    os.environ.setdefault("RATE_LIMIT_MAX_CONCURRENCY", str(max(in_flight, 256)))
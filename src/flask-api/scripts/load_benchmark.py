@@ -0,0 +1,121 @@
+"""Closed-loop load benchmark for the Flask finance API.
+
+Fires --requests GETs at the given paths from --concurrency client threads
+and reports throughput and latency percentiles. Run it once per gunicorn
+worker class to compare serving modes, e.g.:
+
+    GUNICORN_WORKER_CLASS=sync    gunicorn --config gunicorn.conf.py yahoo_app:app
+    GUNICORN_WORKER_CLASS=gthread gunicorn --config gunicorn.conf.py yahoo_app:app
+
+    python scripts/load_benchmark.py --user "$Yahoo_Fin_user" --password "$Yahoo_fin_secret" \\
+        --concurrency 200 --requests 2000 --path /price/AAPL --path /quote/MSFT
+
+With sync workers concurrency is capped at the process count, so requests
+queue behind upstream waits; threaded workers keep throughput rising with
+concurrency until the upstream (or its rate limit) saturates. Each worker
+also caps its in-flight Yahoo calls (RATE_LIMIT_CONCURRENCY, which
+gunicorn.conf.py sets to GUNICORN_THREADS for gthread, up to
+RATE_LIMIT_MAX_CONCURRENCY); the report includes one worker's current cap
+from /health/cache so a run can be checked against it.
+
+To measure the serving modes without Yahoo (and reproducibly), start the
+app against a simulated upstream whose every request takes a fixed time,
+and put "{i}" in the path so each request is a cache miss on a new symbol:
+
+    UPSTREAM_SIMULATED_LATENCY=0.5 RATE_LIMIT_ENABLED=false GUNICORN_WORKERS=2 \
+        GUNICORN_WORKER_CLASS=gthread gunicorn --config gunicorn.conf.py yahoo_app:app
+
+    python scripts/load_benchmark.py --token "$TOKEN" --concurrency 100 --requests 400 \
+        --path '/price/SIM{i}'
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def _login(base_url: str, user: str, password: str) -> str:
+    resp = requests.post(f"{base_url}/login", json={"username": user, "password": password}, timeout=10)
+    resp.raise_for_status()
+    return resp.json()["token"]
+
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def run(base_url: str, token: str, paths: list, total: int, concurrency: int) -> dict:
+    local = threading.local()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def one(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        path = paths[i % len(paths)].replace("{i}", str(i))
+        start = time.perf_counter()
+        try:
+            ok = session.get(f"{base_url}{path}", headers=headers, timeout=130).status_code < 500
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [lat for lat, ok in results if ok]
+    return {
+        "requests": total,
+        "errors": sum(1 for _, ok in results if not ok),
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed if elapsed else float("nan"),
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+    }
+
+
+def _upstream_cap(base_url: str):
+    """In-flight Yahoo call cap of the worker answering /health/cache (None if unavailable)."""
+    try:
+        resp = requests.get(f"{base_url}/health/cache", timeout=10)
+        resp.raise_for_status()
+        return resp.json()["rate_limit"]["concurrency_limit"]
+    except (requests.RequestException, KeyError, ValueError):
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:5001")
+    parser.add_argument("--token", help="JWT to send; otherwise obtained via /login")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="endpoint path (repeatable); {i} is replaced by the request number")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    token = args.token or _login(args.base_url, args.user, args.password)
+    paths = args.paths or ["/price/AAPL"]
+    stats = run(args.base_url, token, paths, args.requests, args.concurrency)
+    stats["upstream_cap"] = _upstream_cap(args.base_url)
+    for key, value in stats.items():
+        print(f"{key:>15}: {value:.1f}" if isinstance(value, float) else f"{key:>15}: {value}")
+    return 0 if stats["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
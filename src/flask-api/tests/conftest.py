@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+
+import jwt
+import numpy as np
+import pandas as pd
+import pytest
+
+# the app reads its settings at import time: point every on-disk store at a
+# scratch directory and keep background jobs off before anything imports it
+_STATE = tempfile.mkdtemp(prefix="flask-api-tests-")
+os.environ.update({
+    "SECRET_KEY": "test-secret-key-at-least-32-bytes-long",
+    "CACHE_BACKEND": "memory",
+    "SHARED_CACHE_PATH": os.path.join(_STATE, "yfinance.sqlite"),
+    "HISTORY_STORE_PATH": os.path.join(_STATE, "history"),
+    "RATE_LIMIT_PATH": os.path.join(_STATE, "yahoo-rate-limit"),
+    "PREFETCH_ENABLED": "false",
+    "PREFETCH_LOCK_PATH": os.path.join(_STATE, "prefetch.lock"),
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app():
+    import yahoo_app
+    return yahoo_app.app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(app):
+    return {"Authorization": "Bearer " + jwt.encode({"user": "test"}, app.secret_key, algorithm="HS256")}
+
+
+@pytest.fixture(autouse=True)
+def _empty_caches():
+    from app import cache
+    for c in list(cache._caches.values()):
+        c.backend.clear()
+    cache.get_backend().clear()
+    yield
+
+
+class FakeTicker:
+    """yf.Ticker stand-in serving a seeded random-walk history per symbol.
+
+    Daily (and longer) intervals cover the last ``days`` business days;
+    intraday intervals the last ``sessions`` regular sessions (09:30-16:00
+    New York), and "1d"/"5d" periods return that many sessions, as Yahoo
+    does. Symbols in ``missing`` have no history. Other attributes (info,
+    statements, ...) are set per test through the fake_ticker fixture.
+    """
+
+    days = 300
+    sessions = 7
+    missing = frozenset()
+    _MINUTES = {"1m": 1, "5m": 5, "15m": 15, "30m": 30, "1h": 60}
+    _TZ = "America/New_York"
+
+    def __init__(self, symbol, session=None):
+        self.ticker = symbol
+
+    def _index(self, interval: str) -> pd.DatetimeIndex:
+        days = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=self.days)
+        if interval not in self._MINUTES:
+            return days.tz_localize(self._TZ)
+        opens = days[-self.sessions:] + pd.Timedelta(hours=9, minutes=30)
+        offsets = pd.to_timedelta(np.arange(0, 390, self._MINUTES[interval]), unit="min")
+        return pd.DatetimeIndex((opens.values[:, None] + offsets.values[None, :]).ravel()).tz_localize(self._TZ)
+
+    def history(self, period="1mo", interval="1d", start=None, **kwargs):
+        if self.ticker in self.missing:
+            return pd.DataFrame()
+        index = self._index(interval)
+        rng = np.random.default_rng(sum(map(ord, self.ticker)))
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+        frame = pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+                              "Volume": rng.integers(100_000, 1_000_000, len(index))}, index=index)
+        if start is not None:
+            return frame[frame.index >= pd.Timestamp(start, tz=self._TZ)]
+        if period in ("1d", "5d"):
+            dates = frame.index.normalize()
+            return frame[dates >= dates.unique()[-int(period[0])]]
+        return frame
+
+
+@pytest.fixture
+def fake_ticker(monkeypatch):
+    """Install a fake as yf.Ticker: ``fake_ticker(cls=FakeTicker, **attributes)`` returns the installed class."""
+    from app import market_data
+
+    def install(cls=FakeTicker, **attributes):
+        ticker = type(cls.__name__, (cls,), attributes) if attributes else cls
+        monkeypatch.setattr(market_data.yf, "Ticker", ticker)
+        return ticker
+
+    return install
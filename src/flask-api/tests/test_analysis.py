@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from app.config import Config
+from app.rate_limit import upstream
+from conftest import FakeTicker
+
+
+class AnalysisTicker(FakeTicker):
+    """yf.Ticker stand-in with yfinance's lazy, unlocked per-module fetches.
+
+    Every property that yfinance derives from one quoteSummary request reads
+    the same memo here, filled by ``_fetch`` without a lock, so concurrent
+    first reads repeat the request exactly as they do upstream.
+    """
+
+    fetches = Counter()
+    _lock = threading.Lock()
+
+    def __init__(self, symbol, session=None):
+        super().__init__(symbol, session)
+        self._memo = {}
+
+    def _fetch(self, module):
+        if module not in self._memo:
+            with AnalysisTicker._lock:
+                AnalysisTicker.fetches[module] += 1
+            time.sleep(0.05)
+            self._memo[module] = pd.DataFrame({"module": [module], "value": [1.0]})
+        return self._memo[module]
+
+    @property
+    def info(self):
+        self._fetch("info")
+        return {"targetMeanPrice": 10.0}
+
+    recommendations = property(lambda self: self._fetch("recommendationTrend"))
+    recommendations_summary = property(lambda self: self._fetch("recommendationTrend"))
+    earnings_estimate = property(lambda self: self._fetch("earningsTrend"))
+    revenue_estimate = property(lambda self: self._fetch("earningsTrend"))
+    eps_trend = property(lambda self: self._fetch("earningsTrend"))
+    eps_revisions = property(lambda self: self._fetch("earningsTrend"))
+    growth_estimates = property(lambda self: (self._fetch("earningsTrend"), self._fetch("industryTrend"))[1])
+    institutional_holders = property(lambda self: self._fetch("holders"))
+    major_holders = property(lambda self: self._fetch("holders"))
+    mutualfund_holders = property(lambda self: self._fetch("holders"))
+    insider_roster_holders = property(lambda self: self._fetch("holders"))
+    insider_transactions = property(lambda self: self._fetch("holders"))
+    insider_purchases = property(lambda self: self._fetch("holders"))
+
+
+# one request per upstream source behind the /analysis sections
+EXPECTED = {"info": 1, "recommendationTrend": 1, "earningsTrend": 1, "industryTrend": 1, "holders": 1}
+
+
+@pytest.fixture
+def analysis_ticker(fake_ticker):
+    AnalysisTicker.fetches.clear()
+    return fake_ticker(AnalysisTicker)
+
+
+def test_cold_analysis_fetches_each_source_once(client, auth, analysis_ticker):
+    charged = upstream.calls
+    resp = client.get("/analysis/AAA?format=json", headers=auth)
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["errors"] == {}
+    assert body["sections"]["analysis.analyst_price_target"]["avg"] == 10.0
+    assert dict(analysis_ticker.fetches) == EXPECTED
+    # limiter tokens are charged per upstream request, not per section
+    assert upstream.calls - charged == sum(EXPECTED.values())
+
+    resp = client.get("/analysis/AAA?format=json", headers=auth)
+    assert resp.status_code == 200
+    assert dict(analysis_ticker.fetches) == EXPECTED
+
+
+def test_concurrent_cold_analysis_requests_share_fetches(app, auth, analysis_ticker):
+    statuses = []
+
+    def request(sections):
+        statuses.append(app.test_client().get(f"/analysis/BBB?sections={sections}", headers=auth).status_code)
+
+    threads = [threading.Thread(target=request, args=(s,)) for s in ("holdings", "major_holders", "eps_trend", "")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert statuses == [200] * 4
+    assert dict(analysis_ticker.fetches) == EXPECTED
+
+
+class FlakyHoldersTicker(AnalysisTicker):
+    """insider_transactions fails on its first read only."""
+
+    failed = False
+
+    @property
+    def insider_transactions(self):
+        if not FlakyHoldersTicker.failed:
+            FlakyHoldersTicker.failed = True
+            raise RuntimeError("insider transactions unavailable")
+        return self._fetch("holders")
+
+
+def test_source_with_failed_section_is_cached_briefly(client, auth, fake_ticker, monkeypatch):
+    AnalysisTicker.fetches.clear()
+    ticker = fake_ticker(FlakyHoldersTicker)
+    monkeypatch.setattr(Config, "ANALYSIS_ERROR_TTL", 0.2)
+    body = client.get("/analysis/AAA?format=json", headers=auth).get_json()
+    assert list(body["errors"]) == ["holdings.insider_transactions"]
+
+    # the failed source expires after ANALYSIS_ERROR_TTL, the others keep their hour
+    time.sleep(0.3)
+    body = client.get("/analysis/AAA?format=json", headers=auth).get_json()
+    assert body["errors"] == {}
+    assert dict(ticker.fetches) == {**EXPECTED, "holders": 2}
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from app.cache import MemoryBackend, TTLCache
+
+
+@pytest.fixture
+def swr():
+    """A cache fresh for 0.1 s whose entries are then served stale for up to a minute."""
+    return TTLCache("swr", 0.1, backend=MemoryBackend(), stale_ttl=60)
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "background revalidation did not finish"
+        time.sleep(0.01)
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(swr):
+    swr.get_or_fetch("k", lambda: "v1")
+    time.sleep(0.15)
+    release = threading.Event()
+    fetches = []
+
+    def slow_fetch():
+        fetches.append(1)
+        release.wait(2)
+        return "v2"
+
+    # both stale reads return at once; only the first starts a refresh
+    assert swr.get_or_fetch("k", slow_fetch) == "v1"
+    assert swr.get_or_fetch("k", slow_fetch) == "v1"
+    assert swr.stale_hits == 2
+    release.set()
+    _wait_for(lambda: swr.revalidations == 1)
+    assert len(fetches) == 1
+    assert swr.get_or_fetch("k", slow_fetch) == "v2"
+    assert swr.hits == 1
+
+
+def test_failed_refresh_keeps_the_stale_value(swr):
+    swr.get_or_fetch("k", lambda: "v1")
+    time.sleep(0.15)
+
+    def failing_fetch():
+        raise RuntimeError("upstream down")
+
+    assert swr.get_or_fetch("k", failing_fetch) == "v1"
+    _wait_for(lambda: swr.revalidation_errors == 1)
+    assert swr.revalidations == 0
+    # still stale, so the next read serves it again and retries
+    assert swr.get_or_fetch("k", lambda: "v2") == "v1"
+    _wait_for(lambda: swr.revalidations == 1)
+    assert swr.get_or_fetch("k", failing_fetch) == "v2"
+
+
+def test_stale_entries_are_dropped_after_stale_ttl():
+    short = TTLCache("swr-short", 0.05, backend=MemoryBackend(), stale_ttl=0.05)
+    short.get_or_fetch("k", lambda: "v1")
+    time.sleep(0.15)
+    # past TTL + stale_ttl the backend has expired it: a plain miss, fetched inline
+    assert short.get_or_fetch("k", lambda: "v2") == "v2"
+    assert short.stale_hits == 0 and short.misses == 2
+
+
+def test_plain_get_does_not_serve_stale(swr):
+    swr.set("k", "v1")
+    assert swr.get("k") == "v1"
+    time.sleep(0.15)
+    assert swr.get("k") is None
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.correlation import RollingMoments
+
+
+def _returns(rows: int, columns: int = 4, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2024-01-02", periods=rows)
+    return pd.DataFrame(rng.normal(0, 0.01, (rows, columns)), index=index, columns=list("ABCD")[:columns])
+
+
+def test_incremental_moments_match_full_covariance():
+    returns = _returns(400)
+    window = 60
+    moments = RollingMoments.from_returns(returns.iloc[:200], window)
+    # one and several new bars per step, crossing the periodic rebuild
+    for end in [201, 202, 210, 240, 275, 300, 330, 360, 390, 400]:
+        moments, applied = moments.advanced(returns.iloc[:end])
+        assert applied > 0
+        expected = returns.iloc[end - window:end].to_numpy()
+        np.testing.assert_allclose(moments.covariance(), np.cov(expected, rowvar=False), rtol=1e-9, atol=1e-15)
+        np.testing.assert_allclose(moments.correlation(), np.corrcoef(expected, rowvar=False), rtol=1e-9)
+
+
+def test_revised_last_bar_is_replaced():
+    returns = _returns(100)
+    moments = RollingMoments.from_returns(returns.iloc[:80], 30)
+    revised = returns.iloc[:81].copy()
+    revised.iloc[79] += 0.002
+    moments, applied = moments.advanced(revised)
+    assert applied == 2
+    np.testing.assert_allclose(moments.covariance(), np.cov(revised.iloc[-30:].to_numpy(), rowvar=False))
+
+
+def test_rewritten_history_rebuilds():
+    returns = _returns(100)
+    moments = RollingMoments.from_returns(returns.iloc[:80], 30)
+    moments, applied = moments.advanced(returns.iloc[:81] * 1.5)
+    assert applied == -1
+    np.testing.assert_allclose(moments.covariance(), np.cov(returns.iloc[51:81].to_numpy() * 1.5, rowvar=False))
+
+
+def test_failed_benchmark_is_reported_not_fatal(client, auth, fake_ticker):
+    fake_ticker(missing={"BAD"})
+    resp = client.get("/correlation?symbols=AAA,BBB&benchmark=BAD&window=60", headers=auth)
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["symbols"] == ["AAA", "BBB"]
+    assert body["benchmark"] is None and "beta" not in body
+    assert "BAD" in body["errors"]
+    assert len(body["correlation"]) == 2
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+QUARTERS = pd.to_datetime(["2025-06-30", "2025-03-31", "2024-12-31", "2024-09-30"])
+
+
+def _statement(rows: dict) -> pd.DataFrame:
+    return pd.DataFrame({period: rows for period in QUARTERS})
+
+
+# fixed quarterly statements: debt 600, quarterly EBITDA 100
+STATEMENTS = dict(
+    info={"symbol": "X", "shortName": "X Corp", "regularMarketPrice": 10.0},
+    quarterly_balance_sheet=_statement({"Total Debt": 600.0, "Cash And Cash Equivalents": 100.0,
+                                        "Total Assets": 2000.0, "Stockholders Equity": 800.0}),
+    quarterly_financials=_statement({"EBITDA": 100.0, "EBIT": 80.0, "Interest Expense": 10.0,
+                                     "Total Revenue": 500.0, "Net Income": 40.0}),
+    quarterly_cashflow=_statement({"Free Cash Flow": 30.0}),
+)
+STATEMENTS.update(balance_sheet=STATEMENTS["quarterly_balance_sheet"],
+                  financials=STATEMENTS["quarterly_financials"], cashflow=STATEMENTS["quarterly_cashflow"])
+
+
+@pytest.fixture(autouse=True)
+def _statements(fake_ticker):
+    fake_ticker(**STATEMENTS)
+
+
+def test_quarterly_screen_matches_single_symbol_metrics(client, auth):
+    single = client.get("/credit/AAA?frequency=quarterly&history=false", headers=auth)
+    screen = client.post("/credit/screen", json={"symbols": ["AAA"], "frequency": "quarterly"}, headers=auth)
+    assert single.status_code == 200 and screen.status_code == 200
+    metrics = single.get_json()["metrics"]
+    row = screen.get_json()
+    # quarterly EBITDA is annualized on both paths: 600 / (4 * 100)
+    assert metrics["Debt/EBITDA"] == pytest.approx(1.5)
+    for metric in ("Debt/EBITDA", "Net Debt/EBITDA", "Interest Coverage (EBIT)", "Debt/Equity"):
+        assert row[metric] == [pytest.approx(metrics[metric])]
+
+
+@pytest.mark.parametrize("body", [
+    {"symbols": ["AAA", "BBB"], "frequency": "monthly"},
+    {"symbols": ["AAA"], "ascending": "false"},
+    {"symbols": ["AAA"], "ascending": 0},
+])
+def test_screen_rejects_invalid_options(client, auth, body):
+    resp = client.post("/credit/screen", json=body, headers=auth)
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+@pytest.mark.parametrize("options, message", [
+    ({"limit": -1}, "'limit' must be a non-negative integer"),
+    ({"limit": 1.5}, "'limit' must be a non-negative integer"),
+    ({"limit": "2"}, "'limit' must be a non-negative integer"),
+    ({"limit": True}, "'limit' must be a non-negative integer"),
+    ({"filters": [1]}, "'filters' must be an object"),
+    ({"filters": {"Debt/EBITDA": 3}}, "Filter for 'Debt/EBITDA' must be an object with 'min' and/or 'max'"),
+    ({"filters": {"Debt/EBITDA": {"below": 3}}}, "Filter for 'Debt/EBITDA' must be an object"),
+    ({"filters": {"Debt/EBITDA": {"max": "3"}}}, "Filter 'max' for 'Debt/EBITDA' must be a number"),
+    ({"sort": ["Debt/EBITDA"]}, "'sort' must be a metric name"),
+])
+def test_screen_rejects_malformed_filters_and_limit(client, auth, options, message):
+    resp = client.post("/credit/screen", json={"symbols": ["AAA", "BBB"], **options}, headers=auth)
+    assert resp.status_code == 400
+    assert resp.get_json()["error"].startswith(message)
+
+
+def test_screen_limit_zero_keeps_counts(client, auth):
+    resp = client.post("/credit/screen", json={"symbols": ["AAA", "BBB"], "limit": 0}, headers=auth)
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["symbol"] == [] and body["screened"] == 2 and body["matched"] == 0
+
+
+def test_get_screen_is_not_a_symbol(client, auth):
+    resp = client.get("/credit/screen", headers=auth)
+    assert resp.status_code == 405
+    assert resp.headers["Allow"] == "POST"
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.history_store import HistoryStore
+from conftest import FakeTicker
+
+
+class Upstream:
+    """Daily bars ending today; ``visible`` hides the newest bars until they "trade"."""
+
+    def __init__(self, bars: int = 400):
+        index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=bars).tz_localize("America/New_York")
+        close = 100 + np.arange(bars, dtype=float)
+        self.frame = pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                                   "Volume": np.arange(bars) * 10}, index=index)
+        self.visible = bars - 1
+        self.calls = []
+
+    def __call__(self, symbol, interval="1d", period=None, start=None):
+        self.calls.append({"period": period, "start": start})
+        frame = self.frame.iloc[:self.visible]
+        if start is not None:
+            return frame[frame.index >= pd.Timestamp(start, tz=frame.index.tz)]
+        cutoff = pd.Timestamp.now().normalize() - pd.DateOffset(years=1)
+        return frame[frame.index.tz_localize(None) >= cutoff]
+
+
+@pytest.fixture
+def upstream():
+    return Upstream()
+
+
+def test_full_fetch_then_tail_fetch(tmp_path, upstream):
+    store = HistoryStore(str(tmp_path), upstream, refresh_interval=0)
+    first = store.get("AAA", "1y")
+    assert upstream.calls == [{"period": "1y", "start": None}]
+    assert first.index[-1] == upstream.frame.index[upstream.visible - 1]
+
+    upstream.visible += 1
+    second = store.get("AAA", "1y")
+    assert len(upstream.calls) == 2 and upstream.calls[1]["period"] is None
+    # the tail starts a few days before the last stored bar to catch re-adjustments
+    assert pd.Timestamp(upstream.calls[1]["start"]) < first.index[-1].tz_localize(None)
+    assert (store.full_fetches, store.tail_fetches) == (1, 1)
+    assert second.index[-1] == upstream.frame.index[-1]
+    expected = upstream.frame.loc[second.index]
+    np.testing.assert_allclose(second["Close"].to_numpy(), expected["Close"].to_numpy())
+    np.testing.assert_array_equal(second["Volume"].to_numpy(), expected["Volume"].to_numpy())
+
+
+def test_recent_refresh_is_served_locally(tmp_path, upstream):
+    store = HistoryStore(str(tmp_path), upstream, refresh_interval=3600)
+    store.get("AAA", "1y")
+    store.get("AAA", "6mo")
+    assert len(upstream.calls) == 1
+    assert store.local_reads == 1
+
+
+def test_readjusted_history_is_reloaded(tmp_path, upstream):
+    store = HistoryStore(str(tmp_path), upstream, refresh_interval=0)
+    store.get("AAA", "1y")
+    upstream.frame[["Open", "High", "Low", "Close"]] *= 0.5
+    frame = store.get("AAA", "1y")
+    assert store.full_fetches == 2
+    np.testing.assert_allclose(frame["Close"].to_numpy(), upstream.frame.loc[frame.index, "Close"].to_numpy())
+
+
+def test_session_periods_cover_whole_intraday_sessions(tmp_path):
+    intraday = FakeTicker("AAA")
+    store = HistoryStore(str(tmp_path), lambda symbol, **kwargs: intraday.history(**kwargs), refresh_interval=0)
+    five = store.get("AAA", "5d", "1m")
+    assert len(five) == 5 * 390
+    assert five.index.normalize().nunique() == 5
+    one = store.get("AAA", "1d", "1m")
+    assert len(one) == 390 and one.index[-1] == five.index[-1]
+    # daily bars: one per session
+    assert len(store.get("AAA", "5d", "1d")) == 5
@@ -0,0 +1,8 @@
+def test_intraday_session_period_keeps_every_bar(client, auth, fake_ticker):
+    fake_ticker()
+    resp = client.get("/indicators/AAA?interval=1m&period=5d&indicators=sma:20,rsi:14", headers=auth)
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["bars"] == 5 * 390
+    assert body["latest"]["sma_20"] is not None and body["latest"]["rsi_14"] is not None
+    assert "T" in body["data"]["date"][-1]
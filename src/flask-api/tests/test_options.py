@@ -0,0 +1,28 @@
+import numpy as np
+
+from app.options import bs_price, greeks, implied_vol
+
+
+def test_implied_vol_recovers_pricing_vol():
+    strike, t, sigma, is_call = (a.ravel() for a in np.meshgrid(
+        np.linspace(60, 140, 17), [7 / 365, 0.25, 1.0, 2.0], [0.08, 0.2, 0.45, 1.2], [True, False]))
+    spot, rate, div = 100.0, 0.04, 0.01
+    price = bs_price(spot, strike, t, rate, div, sigma, is_call)
+    iv = implied_vol(price, spot, strike, t, rate, div, is_call)
+    solved = np.isfinite(iv)
+    # NaN only where vega is too small for the price to identify a vol
+    assert solved.mean() > 0.8
+    np.testing.assert_allclose(bs_price(spot, strike, t, rate, div, iv, is_call)[solved], price[solved], atol=1e-5)
+    # the vol itself is pinned down to about price tolerance / vega
+    vega = greeks(spot, strike, t, rate, div, sigma, is_call)["vega"] * 100
+    sensitive = solved & (vega > 0.05)
+    assert sensitive.sum() > 0.5 * solved.sum()
+    np.testing.assert_allclose(iv[sensitive], sigma[sensitive], atol=1e-4)
+
+
+def test_prices_outside_no_arbitrage_bounds_are_nan():
+    spot, strike, t = 100.0, np.array([90.0, 110.0, 100.0, 100.0]), np.array([0.5, 0.5, 0.5, 0.0])
+    is_call = np.array([True, False, True, True])
+    # below intrinsic, below intrinsic, above the spot, expired
+    price = np.array([5.0, 5.0, 120.0, 3.0])
+    assert np.isnan(implied_vol(price, spot, strike, t, 0.0, 0.0, is_call)).all()
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from app import market_data, prefetch
+from app.config import Config
+
+
+@pytest.fixture
+def no_scheduler(monkeypatch):
+    monkeypatch.setattr(prefetch, "scheduler", None)
+    monkeypatch.setattr(prefetch.PrefetchScheduler, "start", lambda self: self)
+
+
+def test_statements_job_warms_both_frequencies(monkeypatch):
+    warmed = []
+    monkeypatch.setattr(market_data.statement_store, "warm",
+                        lambda symbol, within, frequency="annual": warmed.append((symbol, frequency)) or 0)
+    prefetch._refresh_statements("AAA")
+    assert warmed == [("AAA", "annual"), ("AAA", "quarterly")]
+
+
+def test_memory_backend_runs_a_scheduler_per_worker(monkeypatch, no_scheduler, capsys):
+    monkeypatch.setattr(Config, "PREFETCH_ENABLED", True)
+    monkeypatch.setattr(Config, "PREFETCH_WATCHLIST", ["AAA"])
+    monkeypatch.setattr(Config, "CACHE_BACKEND", "memory")
+    scheduler = prefetch.start()
+    # no election: a leader would only warm its own in-memory caches
+    assert scheduler.lock_path is None
+    assert scheduler._elect()
+    assert "CACHE_BACKEND" in capsys.readouterr().err
+
+
+def test_shared_backend_elects_one_worker(monkeypatch, no_scheduler):
+    monkeypatch.setattr(Config, "PREFETCH_ENABLED", True)
+    monkeypatch.setattr(Config, "PREFETCH_WATCHLIST", ["AAA"])
+    monkeypatch.setattr(Config, "CACHE_BACKEND", "sqlite")
+    assert prefetch.start().lock_path == Config.PREFETCH_LOCK_PATH
+
+
+def test_due_jobs_run_most_served_symbols_first():
+    ran = []
+    jobs = {"info": (100.0, ran.append)}
+    accesses = {"AAA": 1, "BBB": 5, "CCC": 0}
+    scheduler = prefetch.PrefetchScheduler(["AAA", "BBB", "CCC"], jobs, accesses=accesses)
+    scheduler.seed(now=time.time())
+    assert scheduler.run_pending() == 3
+    assert ran == ["BBB", "AAA", "CCC"]
@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _history(fake_ticker):
+    fake_ticker()
+
+
+def _risk(client, auth, **body):
+    body = {"weights": {"AAA": 0.6, "BBB": 0.4}, "window": 100, "simulations": 0, "benchmark": "", **body}
+    return client.post("/portfolio/risk", json=body, headers=auth)
+
+
+def test_scalar_confidence_is_one_level(client, auth):
+    single = _risk(client, auth, confidence=0.95)
+    listed = _risk(client, auth, confidence=[0.95, 0.99])
+    assert single.status_code == 200 and listed.status_code == 200
+    assert list(single.get_json()["var"]["historical"]) == ["0.95"]
+    assert single.get_json()["var"]["historical"]["0.95"] == listed.get_json()["var"]["historical"]["0.95"]
+
+
+@pytest.mark.parametrize("confidence", [0, 1, 1.5, -0.1, [0.9, 1.0], [], "high", [None]])
+def test_confidence_outside_unit_interval_is_rejected(client, auth, confidence):
+    resp = _risk(client, auth, confidence=confidence)
+    assert resp.status_code == 400
+    assert "confidence" in resp.get_json()["error"]
+
+
+@pytest.mark.parametrize("parallel", ["false", 0, 1, [True]])
+def test_parallel_must_be_a_boolean(client, auth, parallel):
+    resp = _risk(client, auth, parallel=parallel)
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "'parallel' must be true or false"
+
+
+@pytest.mark.parametrize("parallel", [None, False])
+def test_parallel_null_or_false_runs_in_process(client, auth, parallel):
+    resp = _risk(client, auth, parallel=parallel, simulations=1000, seed=7)
+    assert resp.status_code == 200
+    assert "0.95" in resp.get_json()["var"]["monteCarlo"]
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from app import cache
+from app.cache import TTLCache
+from app.shared_cache import SqliteBackend
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite")
+
+
+def test_lock_is_exclusive_across_backends(path):
+    # two backends on one file stand in for two gunicorn workers
+    first, second = SqliteBackend(path), SqliteBackend(path, poll_interval=0.01)
+    order = []
+
+    def wait_for_lock():
+        with second.lock("k"):
+            order.append("second")
+
+    with first.lock("k"):
+        waiter = threading.Thread(target=wait_for_lock)
+        waiter.start()
+        time.sleep(0.1)
+        order.append("first released")
+    waiter.join(2)
+    assert order == ["first released", "second"]
+
+
+def test_dead_holder_is_superseded_after_its_lease(path):
+    dead = SqliteBackend(path, lock_timeout=0.2)
+    live = SqliteBackend(path, lock_timeout=0.2, poll_interval=0.01)
+    assert dead._try_acquire("k", "dead-owner")
+    started = time.monotonic()
+    with live.lock("k"):
+        waited = time.monotonic() - started
+        # the late holder's cleanup must not release the new owner's lease
+        dead._conn().execute("DELETE FROM locks WHERE key = ? AND owner = ?", ("k", "dead-owner"))
+        assert not dead._try_acquire("k", "other")
+    assert 0.15 <= waited < 2
+
+
+def test_cold_key_is_fetched_by_one_worker(path, monkeypatch):
+    # no in-process single-flight: the callers only share the SQLite file, as workers do
+    monkeypatch.setattr(cache.flight, "do", lambda key, fn: fn())
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    caches = [TTLCache("lease", 60, backend=SqliteBackend(path, poll_interval=0.01)) for _ in range(2)]
+    threads = [threading.Thread(target=lambda c=c: results.append(c.get_or_fetch("k", fetch))) for c in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert results == ["value", "value"]
+    assert len(fetches) == 1
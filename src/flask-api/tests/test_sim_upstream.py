@@ -0,0 +1,17 @@
+import time
+
+from app.config import Config
+
+
+def test_simulated_upstream_serves_price_with_latency(client, auth, monkeypatch):
+    monkeypatch.setattr(Config, "UPSTREAM_SIMULATED_LATENCY", 0.2)
+    started = time.perf_counter()
+    resp = client.get("/price/SIM1", headers=auth)
+    assert time.perf_counter() - started >= 0.2
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["name"] == "SIM1 (simulated)" and isinstance(body["price"], float)
+
+    started = time.perf_counter()
+    assert client.get("/price/SIM1", headers=auth).get_json() == body
+    assert time.perf_counter() - started < 0.2
@@ -0,0 +1,112 @@
+import time
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from app.cache import MemoryBackend, TTLCache
+from app.config import Config
+from app.statement_store import STATEMENTS, StatementStore, statement_expiry
+
+DAY = 24 * 60 * 60
+NOW = pd.Timestamp("2026-05-15").timestamp()
+
+
+def _quarters(*ends) -> pd.DataFrame:
+    return pd.DataFrame({pd.Timestamp(end): [1.0] for end in ends}, index=["Total Revenue"])
+
+
+# newest quarter ended 2026-03-31, so the next one ends about 2026-06-30
+REPORTED = _quarters("2026-03-31", "2025-12-31", "2025-09-30", "2025-06-30")
+
+
+def test_entry_lives_until_next_earnings_plus_grace():
+    earnings = NOW + 10 * DAY
+    assert statement_expiry(REPORTED, "quarterly", earnings, NOW) == earnings + Config.STATEMENT_EARNINGS_GRACE
+
+
+def test_distant_earnings_are_capped_at_max_age():
+    assert statement_expiry(REPORTED, "quarterly", NOW + 400 * DAY, NOW) == NOW + Config.STATEMENT_MAX_AGE
+
+
+@pytest.mark.parametrize("earnings", [None, NOW - DAY])
+def test_without_upcoming_earnings_falls_back_to_cache_ttl(earnings):
+    # no calendar, or a release date already in the past
+    assert statement_expiry(REPORTED, "quarterly", earnings, NOW) == NOW + Config.STATEMENT_CACHE_TTL
+
+
+@pytest.mark.parametrize("frame", [None, pd.DataFrame()])
+def test_frame_without_periods_falls_back_to_cache_ttl(frame):
+    assert statement_expiry(frame, "annual", NOW + 10 * DAY, NOW) == NOW + Config.STATEMENT_CACHE_TTL
+
+
+def test_overdue_period_is_polled_until_the_filing_deadline():
+    # the 2026-03-31 quarter ended six weeks ago and is still missing upstream
+    stale = _quarters("2025-12-31", "2025-09-30", "2025-06-30")
+    assert statement_expiry(stale, "quarterly", None, NOW) == NOW + Config.STATEMENT_OVERDUE_TTL
+    # ...unless its release is scheduled: then wait for it
+    earnings = NOW + 5 * DAY
+    assert statement_expiry(stale, "quarterly", earnings, NOW) == earnings + Config.STATEMENT_EARNINGS_GRACE
+    # past the filing deadline stop polling
+    later = NOW + Config.STATEMENT_FILING_DEADLINE
+    assert statement_expiry(stale, "quarterly", None, later) == later + Config.STATEMENT_CACHE_TTL
+
+
+def test_single_column_uses_the_default_cadence():
+    # one annual column ending 2025-12-31: the next fiscal year has not ended
+    annual = pd.DataFrame({pd.Timestamp("2025-12-31"): [1.0]})
+    earnings = NOW + 20 * DAY
+    assert statement_expiry(annual, "annual", earnings, NOW) == earnings + Config.STATEMENT_EARNINGS_GRACE
+
+
+class _Upstream:
+    """fetch/next_earnings pair for a StatementStore, with per-symbol earnings offsets (days from now)."""
+
+    def __init__(self, earnings_in: dict):
+        self.earnings_in = earnings_in
+        self.fetches = Counter()
+
+    def fetch(self, symbol, attr):
+        self.fetches[symbol, attr] += 1
+        now = pd.Timestamp.now().normalize()
+        return _quarters(*(now - pd.Timedelta(days=30 + 91 * k) for k in range(4)))
+
+    def next_earnings(self, symbol):
+        days = self.earnings_in[symbol]
+        if days is None:
+            raise RuntimeError("calendar unavailable")
+        return time.time() + days * DAY
+
+
+@pytest.fixture
+def upstream():
+    return _Upstream({"SOON": 2, "LATER": 40, "NOCAL": None})
+
+
+@pytest.fixture
+def store(upstream):
+    return StatementStore(TTLCache("statements-test", Config.STATEMENT_CACHE_TTL, backend=MemoryBackend()),
+                          upstream.fetch, upstream.next_earnings)
+
+
+def test_store_entries_expire_at_earnings(store):
+    before = time.time()
+    for _, expires_at in store.entries("SOON", "quarterly").values():
+        assert expires_at == pytest.approx(before + 2 * DAY + Config.STATEMENT_EARNINGS_GRACE, abs=5)
+    # an unavailable calendar falls back to the plain TTL instead of failing the read
+    for _, expires_at in store.entries("NOCAL", "quarterly").values():
+        assert expires_at == pytest.approx(before + Config.STATEMENT_CACHE_TTL, abs=5)
+
+
+def test_warm_refreshes_only_entries_expiring_within_the_window(store, upstream):
+    for symbol in ("SOON", "LATER"):
+        store.entries(symbol, "quarterly")
+        store.entries(symbol, "annual")
+    upstream.fetches.clear()
+
+    assert store.warm("SOON", within=5 * DAY, frequency="quarterly") == len(STATEMENTS)
+    assert store.warm("LATER", within=5 * DAY, frequency="quarterly") == 0
+    # only the quarterly statements were refetched; a wider window reaches LATER
+    assert set(upstream.fetches) == {("SOON", f"quarterly_{name}") for name in STATEMENTS}
+    assert store.warm("LATER", within=45 * DAY, frequency="annual") == len(STATEMENTS)
+    assert sum(upstream.fetches.values()) == 2 * len(STATEMENTS)
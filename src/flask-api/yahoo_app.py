@@ -5,6 +5,7 @@ import os
 
 # import blueprints containing all the route handlers
 from app.routes import pi_bp, health_bp, finance_bp
+from app import prefetch
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'mysecret')
@@ -14,6 +15,9 @@ app.register_blueprint(pi_bp)
 app.register_blueprint(health_bp)
 app.register_blueprint(finance_bp)
 
+# warm the watchlist's cache entries in the background (PREFETCH_ENABLED)
+prefetch.start()
+
 SWAGGER_URL = '/swagger'
 API_URL = '/swagger.json'
 